@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.chunk import ChunkService
-from app.schemas.response import ResponseModel
+from app.schemas.response import ResponseModel, PageResult
 from app.schemas.common_config import ConfigParams
 from app.schemas.chunk import LangChainChunk
-from typing import List
+from app.schemas.job import Job, JobType
+from app.services.job import JobService
+from typing import List, Optional, Union
 
 router = APIRouter()
 
@@ -18,12 +20,33 @@ def get_chunk_config(document_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="未找到分块配置")
     return ResponseModel[ConfigParams](data=config)
 
-@router.post("/{document_id}/parse", response_model=ResponseModel[List[LangChainChunk]])
+@router.post("/{document_id}/parse", response_model=ResponseModel[Union[List[LangChainChunk], Job]])
 def parse_chunk(
     document_id: int,
     config: ConfigParams = Body(..., description="加载配置参数"),
+    background: bool = Query(False, description="是否作为后台任务执行，为真时返回任务信息"),
     db: Session = Depends(get_db)):
     """分块处理"""
+    if background:
+        job = JobService(db).submit(JobType.CHUNK, document_id, config)
+        return ResponseModel[Job](data=Job.model_validate(job))
     service = ChunkService(db)
     result = service.parse_chunk(document_id, config)
-    return ResponseModel[List[LangChainChunk]](data=result)
\ No newline at end of file
+    return ResponseModel[List[LangChainChunk]](data=result)
+
+@router.get("/{document_id}/chunks", response_model=ResponseModel[PageResult[LangChainChunk]])
+def get_chunks(
+    document_id: int,
+    offset: int = Query(0, ge=0, description="起始位置"),
+    limit: int = Query(50, ge=1, le=1000, description="每页条数"),
+    page: Optional[int] = Query(None, ge=0, description="只返回该页码的分块"),
+    db: Session = Depends(get_db)):
+    """分页获取分块结果"""
+    result = ChunkService(db).get_chunks(document_id, offset=offset, limit=limit, page=page)
+    return ResponseModel[PageResult[LangChainChunk]](data=result)
+
+@router.get("/{document_id}/chunks/{chunk_id}", response_model=ResponseModel[LangChainChunk])
+def get_chunk(document_id: int, chunk_id: int, db: Session = Depends(get_db)):
+    """获取单个分块"""
+    result = ChunkService(db).get_chunk(document_id, chunk_id)
+    return ResponseModel[LangChainChunk](data=result)
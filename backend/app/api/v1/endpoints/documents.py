@@ -1,9 +1,11 @@
-from typing import Optional, List, Dict, Any
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Body
+from typing import Optional, List, Dict, Any, Union
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Body, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+import os
 import json
 import logging
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.schemas.common_config import ConfigParams
 from app.schemas.configuration.document import get_default_config
 from app.schemas.document import (
@@ -11,8 +13,13 @@ from app.schemas.document import (
     DocumentStatus
 )
 from app.services.document import DocumentService
-from app.schemas.response import ResponseModel
+from app.schemas.response import ResponseModel, PageResult
 from app.schemas.document import LangChainDocument
+from app.schemas.job import Job, JobType
+from app.schemas.ingest import BulkIngestRequest, IngestRequest, IngestResult
+from app.services.job import JobService
+from app.services.ingest import IngestService
+from app.services.bulk_ingest import resolve_import_paths
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -90,6 +97,27 @@ async def upload_document(
             detail=f"上传文档失败: {str(e)}"
         )
 
+@router.post("/bulk-ingest", response_model=ResponseModel[Job])
+def bulk_ingest_documents(
+    request: BulkIngestRequest,
+    db: Session = Depends(get_db)
+) -> ResponseModel[Job]:
+    """批量入库服务器上的文件
+
+    路径相对于批量导入目录（BULK_INGEST_DIR），目录会按支持的文件类型扫描。
+    批量入库总是作为后台任务执行，通过任务接口查看进度和吞吐量统计。
+    """
+    try:
+        paths = resolve_import_paths(request.paths)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    missing = [path for path, full_path in zip(request.paths, paths) if not os.path.exists(full_path)]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"路径不存在: {', '.join(missing)}")
+    job = JobService(db).submit(JobType.BULK_INGEST, None, request)
+    return ResponseModel[Job](data=Job.model_validate(job))
+
+
 @router.get("/", response_model=ResponseModel[List[Document]])
 def get_documents(
     db: Session = Depends(get_db)
@@ -219,10 +247,11 @@ def delete_document(
     service.delete_document(document_id)
     return ResponseModel[Document](data=None)
 
-@router.post("/{document_id}/parse", response_model=ResponseModel[List[LangChainDocument]])
+@router.post("/{document_id}/parse", response_model=ResponseModel[Union[List[LangChainDocument], Job]])
 def process_document(
     document_id: int,
     config: ConfigParams = Body(..., description="加载配置参数"),
+    background: bool = Query(False, description="是否作为后台任务执行，为真时返回任务信息"),
     db: Session = Depends(get_db)
 ):
     """
@@ -240,6 +269,83 @@ def process_document(
             status_code=500,
             detail=f"获取文档信息失败: {str(e)}"
         )
+    if not document:
+        raise HTTPException(status_code=404, detail=f"文档不存在: ID={document_id}")
+
+    if background:
+        job = JobService(db).submit(JobType.PARSE, document_id, config)
+        return ResponseModel[Job](data=Job.model_validate(job))
 
     doc = service.parse_document(document=document, config=config)
-    return ResponseModel[List[LangChainDocument]](data=doc)
\ No newline at end of file
+    return ResponseModel[List[LangChainDocument]](data=doc)
+
+@router.post("/{document_id}/parse/stream")
+def process_document_stream(
+    document_id: int,
+    config: ConfigParams = Body(..., description="加载配置参数"),
+    db: Session = Depends(get_db)
+):
+    """
+    流式处理文档，参数结构与 load-config 返回一致
+
+    以 NDJSON 格式逐行返回，每解析出一页就返回一行：
+    - {"event": "page", "data": LangChainDocument}
+    - {"event": "done", "data": {"pages": 页数}}
+    - {"event": "error", "code": 状态码, "message": 错误信息}
+    """
+    service = DocumentService(db)
+    if not service.get_document(document_id):
+        raise HTTPException(status_code=404, detail=f"文档不存在: ID={document_id}")
+
+    def generate():
+        # 依赖注入的数据库会话在响应开始前就会关闭，流式响应需要自己的会话
+        stream_db = SessionLocal()
+        try:
+            stream_service = DocumentService(stream_db)
+            document = stream_service.get_document(document_id)
+            pages = 0
+            for page in stream_service.iter_parse_document(document=document, config=config):
+                pages += 1
+                yield json.dumps({"event": "page", "data": page.model_dump()}, ensure_ascii=False) + "\n"
+            yield json.dumps({"event": "done", "data": {"pages": pages}}) + "\n"
+        except HTTPException as e:
+            logger.error(f"流式处理文档失败: document_id={document_id}, detail={e.detail}")
+            yield json.dumps({"event": "error", "code": e.status_code, "message": e.detail}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"流式处理文档失败: document_id={document_id}, error={str(e)}", exc_info=True)
+            yield json.dumps({"event": "error", "code": 500, "message": f"处理文档失败: {str(e)}"}, ensure_ascii=False) + "\n"
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.post("/{document_id}/ingest", response_model=ResponseModel[Union[IngestResult, Job]])
+def ingest_document(
+    document_id: int,
+    request: IngestRequest = Body(IngestRequest(), description="各阶段配置，未提供时使用默认配置"),
+    background: bool = Query(False, description="是否作为后台任务执行，为真时返回任务信息"),
+    db: Session = Depends(get_db)
+):
+    """
+    端到端入库：一次完成解析、分块、嵌入和向量存储
+
+    各阶段流水线执行，只保存最终状态，不保存中间阶段的结果。
+    """
+    if background:
+        job = JobService(db).submit(JobType.INGEST, document_id, request)
+        return ResponseModel[Job](data=Job.model_validate(job))
+    result = IngestService(db).ingest(document_id, request)
+    return ResponseModel[IngestResult](data=result)
+
+
+@router.get("/{document_id}/pages", response_model=ResponseModel[PageResult[LangChainDocument]])
+def get_document_pages(
+    document_id: int,
+    offset: int = Query(0, ge=0, description="起始位置"),
+    limit: int = Query(50, ge=1, le=1000, description="每页条数"),
+    page: Optional[int] = Query(None, ge=0, description="只返回该页码（从 0 开始）的结果"),
+    db: Session = Depends(get_db)
+):
+    """分页获取文档的解析结果"""
+    result = DocumentService(db).get_pages(document_id, offset=offset, limit=limit, page=page)
+    return ResponseModel[PageResult[LangChainDocument]](data=result)
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.embedding import EmbeddingService
-from app.schemas.response import ResponseModel
+from app.schemas.response import ResponseModel, PageResult
 from app.schemas.common_config import ConfigParams
 from app.services.embedding import EmbeddingService
 from app.schemas.embedding import LangChainEmbedding
-from typing import List
+from app.schemas.job import Job, JobType
+from app.services.job import JobService
+from typing import List, Union
 
 router = APIRouter()
 
@@ -19,12 +21,26 @@ def get_embedding_config(document_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="未找到分块配置")
     return ResponseModel[ConfigParams](data=config)
 
-@router.post("/{document_id}/parse", response_model=ResponseModel[List[LangChainEmbedding]])
+@router.post("/{document_id}/parse", response_model=ResponseModel[Union[List[LangChainEmbedding], Job]])
 def parse_embedding(
     document_id: int,
     config: ConfigParams = Body(..., description="加载配置参数"),
+    background: bool = Query(False, description="是否作为后台任务执行，为真时返回任务信息"),
     db: Session = Depends(get_db)):
     """分块处理"""
+    if background:
+        job = JobService(db).submit(JobType.EMBEDDING, document_id, config)
+        return ResponseModel[Job](data=Job.model_validate(job))
     service = EmbeddingService(db)
     result = service.parse_embedding(document_id, config)
-    return ResponseModel[List[LangChainEmbedding]](data=result)
\ No newline at end of file
+    return ResponseModel[List[LangChainEmbedding]](data=result)
+
+@router.get("/{document_id}/embeddings", response_model=ResponseModel[PageResult[LangChainEmbedding]])
+def get_embeddings(
+    document_id: int,
+    offset: int = Query(0, ge=0, description="起始位置"),
+    limit: int = Query(50, ge=1, le=1000, description="每页条数"),
+    db: Session = Depends(get_db)):
+    """分页获取嵌入结果"""
+    result = EmbeddingService(db).get_embeddings(document_id, offset=offset, limit=limit)
+    return ResponseModel[PageResult[LangChainEmbedding]](data=result)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.services.job import JobService
+from app.schemas.response import ResponseModel
+from app.schemas.job import Job, JobStatus
+from typing import List, Optional
+
+router = APIRouter()
+
+@router.get("/", response_model=ResponseModel[List[Job]])
+def get_jobs(
+    document_id: Optional[int] = Query(None, description="按文档ID过滤"),
+    status: Optional[JobStatus] = Query(None, description="按任务状态过滤"),
+    limit: int = Query(100, ge=1, le=1000, description="返回数量"),
+    db: Session = Depends(get_db)):
+    """获取后台任务列表"""
+    service = JobService(db)
+    jobs = service.get_jobs(document_id=document_id, status=status, limit=limit)
+    return ResponseModel[List[Job]](data=[Job.model_validate(job) for job in jobs])
+
+@router.get("/{job_id}", response_model=ResponseModel[Job])
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """获取后台任务状态和进度"""
+    service = JobService(db)
+    job = service.get_job(job_id)
+    return ResponseModel[Job](data=Job.model_validate(job))
+
+@router.post("/{job_id}/cancel", response_model=ResponseModel[Job])
+def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    """取消后台任务"""
+    service = JobService(db)
+    job = service.cancel_job(job_id)
+    return ResponseModel[Job](data=Job.model_validate(job))
@@ -2,10 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.store import StoreService
-from app.schemas.response import ResponseModel
+from app.schemas.response import ResponseModel, PageResult
 from app.schemas.common_config import ConfigParams
-from app.schemas.store import LangChainStore
-from typing import List
+from app.schemas.store import (
+    LangChainStore, StoreBatchSearchRequest, StoreBatchSearchResult, StoreSearchRequest, StoreSearchResult
+)
+from app.schemas.job import Job, JobType
+from app.services.job import JobService
+from typing import Annotated, List, Union
 
 router = APIRouter()
 
@@ -18,22 +22,46 @@ def get_store_config(document_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="未找到存储配置")
     return ResponseModel[ConfigParams](data=config)
 
-@router.post("/{document_id}/parse", response_model=ResponseModel[List[LangChainStore]])
+@router.post("/{document_id}/parse", response_model=ResponseModel[Union[List[LangChainStore], Job]])
 def parse(
     document_id: int,
     config: ConfigParams = Body(..., description="加载配置参数"),
+    background: bool = Query(False, description="是否作为后台任务执行，为真时返回任务信息"),
     db: Session = Depends(get_db)):
     """解析"""
+    if background:
+        job = JobService(db).submit(JobType.STORE, document_id, config)
+        return ResponseModel[Job](data=Job.model_validate(job))
     service = StoreService(db)
     result = service.do_parse(document_id, config)
     return ResponseModel[List[LangChainStore]](data=result)
 
-@router.get("/{document_id}/search", response_model=ResponseModel[str])
+@router.get("/{document_id}/search", response_model=ResponseModel[StoreSearchResult])
 def search(
     document_id: int,
-    query: str = Query(..., description="查询参数"),
+    params: Annotated[StoreSearchRequest, Query()],
     db: Session = Depends(get_db)):
-    """搜索"""
+    """搜索，返回得分最高的 top_k 个分块"""
     service = StoreService(db)
-    result = service.do_search(document_id, query)
-    return ResponseModel[str](data=result)
+    result = service.do_search(document_id, params)
+    return ResponseModel[StoreSearchResult](data=result)
+
+@router.post("/{document_id}/search/batch", response_model=ResponseModel[StoreBatchSearchResult])
+def batch_search(
+    document_id: int,
+    request: StoreBatchSearchRequest = Body(..., description="批量检索参数"),
+    db: Session = Depends(get_db)):
+    """批量搜索，每个查询返回得分最高的 top_k 个分块"""
+    service = StoreService(db)
+    result = service.do_batch_search(document_id, request)
+    return ResponseModel[StoreBatchSearchResult](data=result)
+
+@router.get("/{document_id}/items", response_model=ResponseModel[PageResult[LangChainStore]])
+def get_store_items(
+    document_id: int,
+    offset: int = Query(0, ge=0, description="起始位置"),
+    limit: int = Query(50, ge=1, le=1000, description="每页条数"),
+    db: Session = Depends(get_db)):
+    """分页获取存储结果"""
+    result = StoreService(db).get_items(document_id, offset=offset, limit=limit)
+    return ResponseModel[PageResult[LangChainStore]](data=result)
@@ -0,0 +1,120 @@
+"""命令行工具
+
+用法（在 backend 目录下执行）:
+    python -m app.cli ingest /data/archive --documents 8 --parse 4 --embedding 8
+    python -m app.cli rebuild-index
+"""
+import sys
+import json
+import logging
+import argparse
+from app.core.database import Base, SessionLocal, engine
+from app.schemas.ingest import BulkIngestConcurrency, BulkIngestRequest, IngestRequest
+from app.schemas.common_config import ConfigParams
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def _load_config(path: str) -> ConfigParams:
+    with open(path, "r", encoding="utf-8") as f:
+        return ConfigParams.model_validate(json.load(f))
+
+
+def ingest(args: argparse.Namespace) -> int:
+    """批量入库本地文件或目录"""
+    # 导入全部模型，确保建表
+    from app.models import chunk, configuration, document, embedding, embedding_cache, job, parse_cache, store  # noqa: F401
+    from app.services.config import ConfigService
+    from app.services.bulk_ingest import BulkIngestService, collect_files
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        ConfigService(db).load_default_configs()
+    finally:
+        db.close()
+
+    request = BulkIngestRequest(
+        paths=args.paths,
+        recursive=not args.no_recursive,
+        skip_stored=not args.no_skip_stored,
+        ingest=IngestRequest(
+            load_config=_load_config(args.load_config) if args.load_config else None,
+            chunk_config=_load_config(args.chunk_config) if args.chunk_config else None,
+            embedding_config=_load_config(args.embedding_config) if args.embedding_config else None,
+            store_config=_load_config(args.store_config) if args.store_config else None,
+        ),
+        concurrency=BulkIngestConcurrency(
+            documents=args.documents,
+            parse=args.parse,
+            embedding=args.embedding,
+            store=args.store,
+        ),
+    )
+    try:
+        files = collect_files(request.paths, request.recursive)
+    except ValueError as e:
+        logger.error(str(e))
+        return 2
+
+    from app.services.embeddinger.LangChainEmbe import close_engines
+    from app.services.storer.milvus import milvus_manager
+    try:
+        result = BulkIngestService().run(files, request)
+    finally:
+        close_engines()
+        milvus_manager.close()
+    print(result.model_dump_json(indent=2))
+    return 1 if result.failed else 0
+
+
+def rebuild_index(args: argparse.Namespace) -> int:
+    """按向量数重建共享集合的索引，重建期间共享集合不可检索"""
+    from app.core.config import settings
+    from app.models.store import Store
+    from app.services.storer.milvus import milvus_manager, rebuild_shared_indexes
+
+    # 共享集合名从存储结果中读取
+    db = SessionLocal()
+    try:
+        prefix = f"{settings.MILVUS_SHARED_COLLECTION}_"
+        names = {(store.meta_data or {}).get("collection") or "" for store in db.query(Store).all()}
+    finally:
+        db.close()
+    try:
+        plans = rebuild_shared_indexes(name for name in names if name.startswith(prefix))
+    finally:
+        milvus_manager.close()
+    print(json.dumps({name: plan.to_dict() for name, plan in plans.items()}, ensure_ascii=False, indent=2))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="RAG 参数调测平台命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="批量入库本地文件或目录")
+    ingest_parser.add_argument("paths", nargs="+", help="文件或目录路径")
+    ingest_parser.add_argument("--no-recursive", action="store_true", help="不递归扫描子目录")
+    ingest_parser.add_argument("--no-skip-stored", action="store_true", help="重新入库已入库的相同内容文档")
+    ingest_parser.add_argument("--documents", type=int, help="同时入库的文档数")
+    ingest_parser.add_argument("--parse", type=int, help="同时解析的页数")
+    ingest_parser.add_argument("--embedding", type=int, help="同时进行的嵌入批次数")
+    ingest_parser.add_argument("--store", type=int, help="同时写入向量库的批次数")
+    ingest_parser.add_argument("--load-config", help="加载配置 JSON 文件")
+    ingest_parser.add_argument("--chunk-config", help="分块配置 JSON 文件")
+    ingest_parser.add_argument("--embedding-config", help="嵌入配置 JSON 文件")
+    ingest_parser.add_argument("--store-config", help="存储配置 JSON 文件")
+    ingest_parser.set_defaults(func=ingest)
+
+    rebuild_parser = subparsers.add_parser("rebuild-index", help="按向量数重建共享集合的索引（维护时执行）")
+    rebuild_parser.set_defaults(func=rebuild_index)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
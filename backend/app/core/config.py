@@ -20,12 +20,55 @@ class Settings(BaseSettings):
 
     # 文件上传配置
     UPLOAD_DIR: str = "uploads"
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 流式上传每次读写的字节数
+
+    # 解析结果缓存配置
+    PARSE_CACHE_MAX_ENTRIES: int = 256
+    PARSE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    PARSE_PAGE_BATCH_SIZE: int = 200  # 解析结果每批写入的页数
+
+    # 分阶段嵌入时每批嵌入并上报进度的分块数
+    EMBEDDING_PROGRESS_BATCH_SIZE: int = 1024
+
+    # 后台任务配置
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL: float = 1.0  # 空闲时轮询任务队列的间隔（秒）
+
+    # 端到端入库配置
+    INGEST_EMBEDDING_BATCH_SIZE: int = 64  # 每批嵌入的分块数
+    INGEST_QUEUE_SIZE: int = 4  # 相邻阶段之间缓冲的批次数
+
+    # 批量入库配置
+    BULK_INGEST_DIR: str = "imports"  # 通过接口批量入库时，路径必须位于该目录下
+    BULK_INGEST_DOCUMENTS: int = 4  # 同时入库的文档数
+    BULK_INGEST_PARSE_CONCURRENCY: int = 2  # 同时解析的页数
+    BULK_INGEST_EMBEDDING_CONCURRENCY: int = 4  # 同时进行的嵌入批次数
+    BULK_INGEST_STORE_CONCURRENCY: int = 2  # 同时写入向量库的批次数
+    BULK_INGEST_MAX_ERRORS: int = 100  # 结果中保留的失败文件数
 
     # 数据库配置
     SQLALCHEMY_DATABASE_URI: str = "sqlite:///./rag_tuning.db"
 
     # 向量数据库配置
-    VECTOR_DB_DIR: str = "vector_db"
+    VECTOR_DB_DIR: str = "vector_db"  # 本地存储（store_method 为 local）的集合目录
+    MILVUS_URI: str = "./milvus.db"  # Milvus Lite 数据文件，或 Milvus 服务地址（如 http://milvus:19530）
+    MILVUS_TOKEN: Optional[str] = None
+    MILVUS_SHARED_COLLECTION: str = "chunks"  # 共享集合名前缀，实际集合名带向量维度后缀
+    MILVUS_NUM_PARTITIONS: int = 64  # 共享集合按文档ID划分的分区数
+    MILVUS_SHARED_INDEX_TYPE: str = "auto"  # 共享集合的索引类型，由集合统一管理，不使用单个文档的存储配置
+    MILVUS_SHARED_TARGET_RECALL: float = 0.95  # 共享集合自动推算索引参数时的目标召回率
+    EMBEDDING_DIR: str = "embeddings"  # 嵌入向量文件（.npy）的存放目录
+    EMBEDDING_MODEL_DIR: str = "models"  # 本地嵌入模型（ONNX / sentence-transformers）的存放目录
+
+    # 嵌入缓存配置
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 1000000
+    EMBEDDING_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # 检索缓存配置（进程内，条目数或有效期为 0 时不缓存）
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+    QUERY_EMBEDDING_CACHE_TTL: float = 3600  # 查询向量的有效期（秒）
+    SEARCH_RESULT_CACHE_MAX_ENTRIES: int = 1000
+    SEARCH_RESULT_CACHE_TTL: float = 300  # 检索结果的有效期（秒）
 
     # 大模型配置
     OPENAI_API_KEY: Optional[str] = None
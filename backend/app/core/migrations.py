@@ -0,0 +1,174 @@
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import Column, Table, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from app.models.chunk import ChunkItem
+from app.models.document import Document, DocumentPage
+from app.models.embedding import Embedding, EmbeddingVector
+from app.models.store import StoreItem
+from app.utils.vectors import get_vector_path, save_vectors
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 已有表上新增的列：create_all 只创建不存在的表，不会修改已有的表
+ADDED_COLUMNS: List[Tuple[str, Column]] = [
+    ("documents", Document.__table__.c.file_hash),
+    ("embeddings", Embedding.__table__.c.vector_file),
+    ("embeddings", Embedding.__table__.c.vector_dtype),
+    ("embeddings", Embedding.__table__.c.dimension),
+]
+
+
+def add_missing_columns(engine: Engine) -> List[str]:
+    """为旧数据库的已有表补充新增的列及其索引，可重复执行
+
+    Returns:
+        List[str]: 新增的列（表名.列名）
+    """
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    added = []
+    with engine.begin() as connection:
+        for table_name, column in ADDED_COLUMNS:
+            if table_name not in tables:
+                continue
+            existing = {item["name"] for item in inspector.get_columns(table_name)}
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column_type}"))
+            for index in column.table.indexes:
+                if column.name in index.columns:
+                    index.create(bind=connection, checkfirst=True)
+            added.append(f"{table_name}.{column.name}")
+    return added
+
+
+# 把旧的 result 列中的一项转换为新表的一行: (文档ID, 序号, 结果项) -> 行
+RowBuilder = Callable[[int, int, Dict[str, Any]], Dict[str, Any]]
+
+
+def _page_row(document_id: int, index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = item.get("metadata") or {}
+    return {"document_id": document_id, "page_index": index, "page": metadata.get("page"),
+            "content": item.get("page_content") or "", "meta_data": metadata}
+
+
+def _chunk_row(document_id: int, index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = {**(item.get("metadata") or {}), "chunk_id": index}
+    return {"document_id": document_id, "chunk_id": index, "page": metadata.get("page"),
+            "content": item.get("page_content") or "", "meta_data": metadata}
+
+
+def _store_row(document_id: int, index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = {**(item.get("metadata") or {}), "chunk_id": index}
+    return {"document_id": document_id, "chunk_id": index, "page": metadata.get("page"),
+            "vector_id": metadata.get("store_id"), "meta_data": metadata}
+
+
+# 旧版本把各阶段结果整体存在 result 列中，升级后每项一行：(旧表, 文档ID列, 新表, 行转换)
+LEGACY_RESULTS: List[Tuple[str, str, Table, RowBuilder]] = [
+    ("documents", "id", DocumentPage.__table__, _page_row),
+    ("chunks", "document_id", ChunkItem.__table__, _chunk_row),
+    ("stores", "document_id", StoreItem.__table__, _store_row),
+]
+
+
+def _load_json(value: Any) -> Optional[Any]:
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+def legacy_result_rows(
+    connection: Connection,
+    table_name: str,
+    document_column: str
+) -> List[Tuple[int, int, List[Dict[str, Any]]]]:
+    """读取旧 result 列中尚未迁移的结果，同一文档有多行时新的在前
+
+    Returns:
+        List[Tuple[int, int, List[Dict[str, Any]]]]: (行ID, 文档ID, 结果列表)
+    """
+    if "result" not in {column["name"] for column in inspect(connection).get_columns(table_name)}:
+        return []
+    rows = connection.execute(text(
+        f"SELECT id, {document_column}, result FROM {table_name} WHERE result IS NOT NULL ORDER BY id DESC"
+    )).all()
+    return [(row_id, document_id, _load_json(result) or []) for row_id, document_id, result in rows]
+
+
+def migrate_legacy_results(engine: Engine) -> Dict[str, int]:
+    """把旧 result 列中的解析、分块和存储结果迁移到按行存储的新表，可重复执行
+
+    新表中已有该文档的结果时不覆盖；迁移后清空旧行的 result，避免重复迁移和占用空间。
+
+    Returns:
+        Dict[str, int]: 每个新表迁移的文档数
+    """
+    tables = set(inspect(engine).get_table_names())
+    migrated: Dict[str, int] = {}
+    with engine.begin() as connection:
+        for table_name, document_column, target, build_row in LEGACY_RESULTS:
+            if table_name not in tables:
+                continue
+            for row_id, document_id, items in legacy_result_rows(connection, table_name, document_column):
+                exists = connection.execute(
+                    select(target.c.id).where(target.c.document_id == document_id).limit(1)
+                ).first()
+                if items and not exists:
+                    connection.execute(insert(target), [build_row(document_id, index, item)
+                                                        for index, item in enumerate(items)])
+                    migrated[target.name] = migrated.get(target.name, 0) + 1
+                connection.execute(text(f"UPDATE {table_name} SET result = NULL WHERE id = :id"), {"id": row_id})
+    return migrated
+
+
+def migrate_legacy_embeddings(engine: Engine) -> int:
+    """把旧 embeddings.result 中的向量转存为 .npy 文件，并逐行写入嵌入结果，可重复执行
+
+    每个文档只转存最新的一行；已有向量文件的文档不覆盖。迁移后清空旧行的 result。
+
+    Returns:
+        int: 迁移的文档数
+    """
+    if "embeddings" not in inspect(engine).get_table_names():
+        return 0
+    migrated = 0
+    table = EmbeddingVector.__table__
+    with engine.begin() as connection:
+        for row_id, document_id, items in legacy_result_rows(connection, "embeddings", "document_id"):
+            exists = connection.execute(
+                select(table.c.id).where(table.c.document_id == document_id).limit(1)
+            ).first()
+            if items and not exists:
+                vector_file = get_vector_path(document_id)
+                vectors = np.asarray([item["embedding"] for item in items], dtype=np.float32)
+                save_vectors(vector_file, vectors)
+                connection.execute(insert(table), [
+                    {"document_id": document_id, "chunk_id": index,
+                     "page": (item.get("metadata") or {}).get("page"), "row_index": index,
+                     "meta_data": item.get("metadata") or {}}
+                    for index, item in enumerate(items)
+                ])
+                connection.execute(text(
+                    "UPDATE embeddings SET vector_file = :file, vector_dtype = 'float32', dimension = :dimension "
+                    "WHERE id = :id"
+                ), {"file": vector_file, "dimension": vectors.shape[1], "id": row_id})
+                migrated += 1
+            connection.execute(text("UPDATE embeddings SET result = NULL WHERE id = :id"), {"id": row_id})
+    return migrated
+
+
+def upgrade_database(engine: Engine) -> None:
+    """升级旧版本创建的数据库，在 create_all 之后调用"""
+    added = add_missing_columns(engine)
+    if added:
+        logger.info(f"数据库新增列: {', '.join(added)}")
+    migrated = migrate_legacy_results(engine)
+    embeddings = migrate_legacy_embeddings(engine)
+    if embeddings:
+        migrated[EmbeddingVector.__tablename__] = embeddings
+    if migrated:
+        logger.info(f"迁移旧版本的阶段结果: {migrated}")
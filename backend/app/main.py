@@ -12,7 +12,7 @@ from dotenv import load_dotenv
 import logging
 from contextlib import asynccontextmanager
 
-from app.api.v1.endpoints import vec_store
+from app.api.v1.endpoints import vec_store, jobs
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -38,6 +38,9 @@ async def lifespan(app: FastAPI):
     # 初始化逻辑
     load_env()
     Base.metadata.create_all(bind=engine)
+    # 旧版本创建的数据库补充新增的列
+    from app.core.migrations import upgrade_database
+    upgrade_database(engine)
 
     # 初始化默认配置
     from app.services.config import ConfigService
@@ -47,9 +50,27 @@ async def lifespan(app: FastAPI):
     config_service.load_default_configs()
     logger.info("默认配置初始化完成")
 
+    # 打开共享的向量库连接
+    from app.services.storer.milvus import milvus_manager
+    try:
+        milvus_manager.open()
+    except Exception as e:
+        # 向量库暂不可用时不阻止启动，首次使用时重试
+        logger.error(f"连接 Milvus 失败: {str(e)}")
+
+    # 启动后台任务执行器
+    from app.services.job import job_runner
+    job_runner.start()
+
     logger.info("应用初始化完成")
     yield
-    # 可选：关闭资源等清理逻辑
+    # 关闭资源等清理逻辑
+    job_runner.stop(timeout=5)
+    from app.services.parsers.langchain_parser import shutdown_parse_executor
+    shutdown_parse_executor()
+    from app.services.embeddinger.LangChainEmbe import close_engines
+    close_engines()
+    milvus_manager.close()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -103,6 +124,12 @@ app.include_router(
     tags=["generate"]
 )
 
+app.include_router(
+    jobs.router,
+    prefix=f"{settings.API_V1_STR}/jobs",
+    tags=["jobs"]
+)
+
 app.include_router(
     settings_router.router,
     prefix=f"{settings.API_V1_STR}/config",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -14,7 +14,6 @@ class Chunk(Base):
         content: 分块内容
         chunk_metadata: 分块元数据(如分块原因、位置等)
         chunk_config: 分块配置(如分块大小、重叠度等)
-        chunk_result: 分块结果(如分块质量评估等)
         document: 关联的文档对象
 
     关系:
@@ -29,7 +28,34 @@ class Chunk(Base):
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
     meta_data = Column(JSON, nullable=True)
     config = Column(JSON, nullable=True)
-    result = Column(JSON, nullable=True)
 
     def __repr__(self):
-        return f"Chunk(id={self.id}, document_id={self.document_id}, page={self.page})"
\ No newline at end of file
+        return f"Chunk(id={self.id}, document_id={self.document_id})"
+
+
+class ChunkItem(Base):
+    """
+    分块结果，每个分块一行
+
+    属性:
+        document_id: 关联的文档ID
+        chunk_id: 分块在文档内的序号（从 0 开始）
+        page: 分块所在页码
+        content: 分块内容
+        meta_data: 分块元数据
+    """
+    __tablename__ = "chunk_items"
+    __table_args__ = (
+        Index("ix_chunk_items_document_chunk", "document_id", "chunk_id", unique=True),
+        Index("ix_chunk_items_document_page", "document_id", "page"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    chunk_id = Column(Integer, nullable=False)
+    page = Column(Integer, nullable=True)
+    content = Column(Text, nullable=False)
+    meta_data = Column(JSON, nullable=True)
+
+    def __repr__(self):
+        return f"ChunkItem(document_id={self.document_id}, chunk_id={self.chunk_id})"
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum as SQLEnum, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Enum as SQLEnum, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -14,6 +14,7 @@ class Document(Base):
     file_path = Column(String(512), nullable=False)
     file_type = Column(String(10), nullable=False, index=True)
     file_size = Column(Integer, nullable=False)
+    file_hash = Column(String(64), nullable=True, index=True)  # 文件内容 SHA-256
     status = Column(
         SQLEnum(DocumentStatus),
         nullable=False,
@@ -22,7 +23,6 @@ class Document(Base):
     )
     meta_data = Column(JSON, nullable=True)
     config = Column(JSON, nullable=True)
-    result = Column(JSON, nullable=True)
     # 时间字段
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -34,3 +34,31 @@ class Document(Base):
 
     def __repr__(self):
         return f"<Document(id={self.id}, filename='{self.filename}', status='{self.status}')>"
+
+
+class DocumentPage(Base):
+    """
+    文档解析结果，每页一行
+
+    属性:
+        document_id: 关联的文档ID
+        page_index: 页面在解析结果中的序号（从 0 开始）
+        page: 页码（来自解析元数据，从 0 开始）
+        content: 页面内容
+        meta_data: 页面元数据
+    """
+    __tablename__ = "document_pages"
+    __table_args__ = (
+        Index("ix_document_pages_document_page_index", "document_id", "page_index", unique=True),
+        Index("ix_document_pages_document_page", "document_id", "page"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    page_index = Column(Integer, nullable=False)
+    page = Column(Integer, nullable=True)
+    content = Column(Text, nullable=False)
+    meta_data = Column(JSON, nullable=True)
+
+    def __repr__(self):
+        return f"<DocumentPage(document_id={self.document_id}, page_index={self.page_index})>"
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Text, JSON
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Text, JSON, Index
 from app.core.database import Base
 
 class Embedding(Base):
@@ -9,7 +9,9 @@ class Embedding(Base):
     属性:
         id: 主键
         document_id: 关联的文档ID
-        embedding: 嵌入向量
+        vector_file: 嵌入向量文件（.npy）路径，向量按行连续存放
+        vector_dtype: 向量存储精度（float32/float16）
+        dimension: 向量维度
         status: 状态
         created_at: 创建时间
         updated_at: 更新时间
@@ -19,4 +21,30 @@ class Embedding(Base):
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
     meta_data = Column(JSON, nullable=True)
     config = Column(JSON, nullable=True)
-    result = Column(JSON, nullable=True)
+    vector_file = Column(String(512), nullable=True)
+    vector_dtype = Column(String(16), nullable=True)
+    dimension = Column(Integer, nullable=True)
+
+
+class EmbeddingVector(Base):
+    """
+    嵌入结果，每个向量一行；向量本身保存在 Embedding.vector_file 中
+
+    属性:
+        document_id: 关联的文档ID
+        chunk_id: 对应分块在文档内的序号
+        page: 对应分块所在页码
+        row_index: 向量在向量文件中的行号
+        meta_data: 嵌入元数据
+    """
+    __tablename__ = "embedding_vectors"
+    __table_args__ = (
+        Index("ix_embedding_vectors_document_chunk", "document_id", "chunk_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    chunk_id = Column(Integer, nullable=False)
+    page = Column(Integer, nullable=True)
+    row_index = Column(Integer, nullable=False)
+    meta_data = Column(JSON, nullable=True)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class EmbeddingCache(Base):
+    """
+    嵌入向量缓存
+
+    属性:
+        id: 主键
+        cache_key: 缓存键，由模型标识和规范化后文本的哈希组成
+        model_id: 模型标识（含影响结果的参数）
+        vector: float32 向量的原始字节
+        size: 向量字节数，用于按容量淘汰
+        created_at: 创建时间
+        accessed_at: 最近访问时间，用于 LRU 淘汰
+    """
+    __tablename__ = "embedding_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(320), nullable=False, unique=True, index=True)
+    model_id = Column(String(255), nullable=False, index=True)
+    vector = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    accessed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"EmbeddingCache(id={self.id}, model_id={self.model_id})"
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, Boolean, Text, Enum as SQLEnum
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.schemas.job import JobStatus, JobType
+
+class Job(Base):
+    """
+    后台任务模型类，同时作为持久化的任务队列
+
+    属性:
+        id: 主键
+        job_type: 任务类型(解析、分块、嵌入、存储等)
+        document_id: 关联的文档ID
+        status: 任务状态
+        config: 任务配置
+        progress: 任务进度(0-1)
+        message: 进度信息
+        result: 任务结果摘要
+        error: 错误信息
+        cancel_requested: 是否已请求取消，执行中的任务在检查点响应取消
+    """
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(SQLEnum(JobType), nullable=False, index=True)
+    document_id = Column(Integer, nullable=True, index=True)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.PENDING, index=True)
+    config = Column(JSON, nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    message = Column(String(512), nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, job_type='{self.job_type}', status='{self.status}')>"
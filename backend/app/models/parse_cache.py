@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ParseCache(Base):
+    """
+    文档解析结果缓存
+
+    属性:
+        id: 主键
+        cache_key: 缓存键，由文件内容哈希和解析相关配置哈希组成
+        file_hash: 文件内容 SHA-256
+        config_hash: 解析相关配置的哈希
+        result: 解析结果(List[LangChainDocument] 的序列化结果)
+        size: 结果序列化后的字节数，用于按容量淘汰
+        created_at: 创建时间
+        accessed_at: 最近访问时间，用于 LRU 淘汰
+    """
+    __tablename__ = "parse_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(129), nullable=False, unique=True, index=True)
+    file_hash = Column(String(64), nullable=False, index=True)
+    config_hash = Column(String(64), nullable=False)
+    result = Column(JSON, nullable=False)
+    size = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    accessed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"ParseCache(id={self.id}, file_hash={self.file_hash}, config_hash={self.config_hash})"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, JSON
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -11,7 +11,6 @@ class Store(Base):
         document_id: 关联的文档ID
         meta_data: 存储元数据(如文档信息、存储配置等)
         config: 存储配置(如向量化参数、索引设置等)
-        result: 存储结果(如向量化结果、索引信息等)
         document: 关联的文档对象
 
     关系:
@@ -26,7 +25,33 @@ class Store(Base):
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
     meta_data = Column(JSON, nullable=True)
     config = Column(JSON, nullable=True)
-    result = Column(JSON, nullable=True)
 
     def __repr__(self):
-        return f"Store(id={self.id}, document_id={self.document_id}, page={self.page})"
\ No newline at end of file
+        return f"Store(id={self.id}, document_id={self.document_id})"
+
+
+class StoreItem(Base):
+    """
+    向量存储结果，每个写入向量库的向量一行
+
+    属性:
+        document_id: 关联的文档ID
+        chunk_id: 对应分块在文档内的序号
+        page: 对应分块所在页码
+        vector_id: 向量库中的主键
+        meta_data: 存储元数据
+    """
+    __tablename__ = "store_items"
+    __table_args__ = (
+        Index("ix_store_items_document_chunk", "document_id", "chunk_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    chunk_id = Column(Integer, nullable=False)
+    page = Column(Integer, nullable=True)
+    vector_id = Column(BigInteger, nullable=True)
+    meta_data = Column(JSON, nullable=True)
+
+    def __repr__(self):
+        return f"StoreItem(document_id={self.document_id}, chunk_id={self.chunk_id})"
\ No newline at end of file
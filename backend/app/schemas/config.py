@@ -28,6 +28,7 @@ class ModelConfig(BaseModel):
     openai: Dict[str, Any] = Field(default_factory=dict, description="OpenAI 配置")
     deepseek: Dict[str, Any] = Field(default_factory=dict, description="DeepSeek 配置")
     anthropic: Dict[str, Any] = Field(default_factory=dict, description="Anthropic 配置")
+    cohere: Dict[str, Any] = Field(default_factory=dict, description="Cohere 配置")
     local: Dict[str, Any] = Field(default_factory=dict, description="本地模型配置")
 
 class ConnectionConfig(BaseModel):
@@ -43,6 +44,7 @@ class SystemConfig(BaseModel):
     log_level: str = Field(default="INFO", description="日志级别")
     max_file_size: int = Field(default=100 * 1024 * 1024, description="最大文件大小（字节）")
     allowed_file_types: list = Field(default_factory=list, description="允许的文件类型")
+    parse_workers: int = Field(default=0, description="PDF并行解析进程数（0 表示使用 CPU 核数）")
 
 class AllConfig(BaseModel):
     """所有配置"""
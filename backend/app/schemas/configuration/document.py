@@ -38,6 +38,15 @@ PDF_FIELDS = [
         group="页面设置",
         dependencies=ConfigDependency(field="loader_tool", value=["pypdf", "pdfplumber", "langchain"])
     ),
+    ConfigField(
+        name="parallel_parse",
+        label="并行解析",
+        type="switch",
+        description="按页拆分，使用多进程并行解析PDF，进程数取自系统配置",
+        default=False,
+        group="页面设置",
+        dependencies=ConfigDependency(field="loader_tool", value=["langchain"])
+    ),
     ConfigField(
         name="password",
         label="文档密码",
@@ -551,4 +560,21 @@ def get_file_type_config(file_ext: str) -> ConfigParams:
 def get_default_config(file_ext: str) -> ConfigParams:
     """根据文件类型获取默认配置"""
     config = get_file_type_config(file_ext)
-    return config
\ No newline at end of file
+    return config
+
+# 不影响解析结果的分组（仅供下游分块等步骤使用）和字段（仅影响解析性能）
+PARSE_IRRELEVANT_GROUPS = {"大模型/分块"}
+PARSE_IRRELEVANT_FIELDS = {"parallel_parse"}
+
+def get_parser_config(config: ConfigParams) -> Dict[str, Any]:
+    """提取影响解析结果的配置值
+
+    下游分组中的字段变化不会改变解析结果，不参与解析缓存键的计算。
+    """
+    irrelevant = PARSE_IRRELEVANT_FIELDS | {
+        field.name for field in config.fields if field.group in PARSE_IRRELEVANT_GROUPS
+    }
+    return {
+        "name": config.name,
+        **{key: value for key, value in config.default_config.items() if key not in irrelevant},
+    }
\ No newline at end of file
@@ -1,23 +1,157 @@
 # 分块相关配置，可根据需要扩展
-from app.schemas.common_config import ConfigField, ConfigParams, ConfigFieldOption
+from app.schemas.common_config import ConfigField, ConfigParams, ConfigFieldOption, ConfigDependency
 
 EMBEDDING_FIELDS = [
     ConfigField(
         name="embedding_tool",
         label="嵌入工具",
         type="select",
-        default="langchain_recursive",
+        default="hashing",
         options=[
-            ConfigFieldOption(label="OpenAI Embedding", value="openai"),
+            ConfigFieldOption(label="特征哈希（无需模型）", value="hashing"),
+            ConfigFieldOption(label="ONNX Runtime", value="onnx"),
             ConfigFieldOption(label="Sentence Transformers", value="sentence_transformers"),
             ConfigFieldOption(label="Hugging Face", value="huggingface"),
+            ConfigFieldOption(label="OpenAI Embedding", value="openai"),
             ConfigFieldOption(label="Cohere", value="cohere"),
-            ConfigFieldOption(label="LangChain Recursive", value="langchain_recursive"),
-            ConfigFieldOption(label="自定义嵌入", value="custom"),
         ],
         description="选择嵌入实现工具",
         group="基本设置"
     ),
+    ConfigField(
+        name="model_name",
+        label="模型",
+        type="text",
+        default="bge-small-zh-v1.5",
+        placeholder="模型目录名（位于模型目录下）或绝对路径",
+        description="本地模型，离线加载，不会自动下载",
+        group="基本设置",
+        dependencies=ConfigDependency(field="embedding_tool", value=["onnx", "sentence_transformers", "huggingface"])
+    ),
+    ConfigField(
+        name="api_model",
+        label="远程模型",
+        type="text",
+        default="",
+        placeholder="留空使用服务商的默认嵌入模型",
+        description="地址和密钥取自系统设置中的模型配置",
+        group="基本设置",
+        dependencies=ConfigDependency(field="embedding_tool", value=["openai", "cohere"])
+    ),
+    ConfigField(
+        name="dimension",
+        label="向量维度",
+        type="number",
+        default=1024,
+        min=64,
+        max=8192,
+        step=64,
+        group="基本设置",
+        dependencies=ConfigDependency(field="embedding_tool", value=["hashing"])
+    ),
+    ConfigField(
+        name="normalize",
+        label="归一化",
+        type="switch",
+        default=True,
+        description="将向量归一化为单位长度，使内积等价于余弦相似度",
+        group="基本设置"
+    ),
+    ConfigField(
+        name="vector_dtype",
+        label="向量存储精度",
+        type="select",
+        default="float32",
+        options=[
+            ConfigFieldOption(label="float32", value="float32"),
+            ConfigFieldOption(label="float16（占用减半）", value="float16"),
+        ],
+        description="嵌入向量文件的存储精度",
+        group="基本设置"
+    ),
+    ConfigField(
+        name="use_cache",
+        label="嵌入缓存",
+        type="switch",
+        default=True,
+        description="按模型和分块内容缓存向量，内容未变的分块不重复嵌入",
+        group="性能设置"
+    ),
+    ConfigField(
+        name="batch_size",
+        label="批大小",
+        type="number",
+        default=32,
+        min=1,
+        max=512,
+        description="每批最多嵌入的分块数",
+        group="性能设置"
+    ),
+    ConfigField(
+        name="max_batch_tokens",
+        label="每批最大 token 数",
+        type="number",
+        default=16384,
+        min=512,
+        max=262144,
+        description="按长度分批，每批补齐后的 token 总数不超过该值",
+        group="性能设置"
+    ),
+    ConfigField(
+        name="max_seq_length",
+        label="最大序列长度",
+        type="number",
+        default=512,
+        min=16,
+        max=8192,
+        description="超过该长度的分块会被截断",
+        group="性能设置",
+        dependencies=ConfigDependency(field="embedding_tool", value=["onnx", "sentence_transformers", "huggingface"])
+    ),
+    ConfigField(
+        name="max_concurrency",
+        label="并发请求数",
+        type="number",
+        default=4,
+        min=1,
+        max=64,
+        description="同时发出的嵌入请求数",
+        group="性能设置",
+        dependencies=ConfigDependency(field="embedding_tool", value=["openai", "cohere"])
+    ),
+    ConfigField(
+        name="requests_per_minute",
+        label="每分钟请求数上限",
+        type="number",
+        default=3000,
+        min=1,
+        max=100000,
+        description="按服务商的 RPM 限额设置",
+        group="性能设置",
+        dependencies=ConfigDependency(field="embedding_tool", value=["openai", "cohere"])
+    ),
+    ConfigField(
+        name="tokens_per_minute",
+        label="每分钟 token 数上限",
+        type="number",
+        default=1000000,
+        min=1000,
+        max=100000000,
+        description="按服务商的 TPM 限额设置",
+        group="性能设置",
+        dependencies=ConfigDependency(field="embedding_tool", value=["openai", "cohere"])
+    ),
+    ConfigField(
+        name="num_threads",
+        label="线程数",
+        type="number",
+        default=0,
+        min=0,
+        max=128,
+        description="模型推理使用的 CPU 线程数，0 表示自动",
+        group="性能设置",
+        dependencies=ConfigDependency(field="embedding_tool", value=["onnx", "sentence_transformers", "huggingface"])
+    ),
 ]
 
 EMBEDDING_CONFIG = ConfigParams(
@@ -29,6 +163,7 @@ EMBEDDING_CONFIG = ConfigParams(
     allowed_extensions=["*"],
     group_order=[
         "基本设置",
+        "性能设置",
     ]
 )
 
@@ -9,12 +9,237 @@ STORE_FIELDS = [
         default="milvus",
         options=[
             ConfigFieldOption(label="Milvus", value="milvus"),
+            ConfigFieldOption(label="本地", value="local", description="进程内 NumPy / HNSW 检索，无需外部向量库，只支持向量检索"),
             ConfigFieldOption(label="Elasticsearch", value="elasticsearch"),
         ],
         description="选择存储方式，如Milvus、Elasticsearch等",
         group="基本设置",
         required=True,
     ),
+    ConfigField(
+        name="collection_mode",
+        label="集合方式",
+        type="select",
+        default="per_document",
+        options=[
+            ConfigFieldOption(label="共享集合", value="shared",
+                              description="所有文档写入同一集合，按文档ID分区，支持跨文档检索；索引由集合统一管理，需在维护时重建"),
+            ConfigFieldOption(label="每个文档一个集合", value="per_document"),
+        ],
+        description="向量在向量库中的组织方式",
+        group="基本设置",
+        dependencies=ConfigDependency(field="store_method", value=["milvus"])
+    ),
+    ConfigField(
+        name="write_mode",
+        label="写入方式",
+        type="select",
+        default="incremental",
+        options=[
+            ConfigFieldOption(label="增量更新", value="incremental", description="只写入新增和变化的分块，删除已移除的分块"),
+            ConfigFieldOption(label="全量重建", value="rebuild", description="删除集合后重新写入全部分块"),
+        ],
+        description="重新存储时如何更新向量库",
+        group="基本设置",
+    ),
+    ConfigField(
+        name="search_mode",
+        label="检索方式",
+        type="select",
+        default="dense",
+        options=[
+            ConfigFieldOption(label="混合检索", value="hybrid", description="稠密向量和 BM25 关键词检索结果融合，编号、条款号等关键词也能精确召回，检索耗时约为向量检索的 4 倍"),
+            ConfigFieldOption(label="向量检索", value="dense", description="只检索稠密向量"),
+        ],
+        description="旧集合没有 BM25 字段时只进行向量检索",
+        group="检索设置",
+    ),
+    ConfigField(
+        name="fusion",
+        label="融合方式",
+        type="select",
+        default="rrf",
+        options=[
+            ConfigFieldOption(label="倒数排名融合 (RRF)", value="rrf", description="只看排名，不受两路得分尺度影响"),
+            ConfigFieldOption(label="加权融合", value="weighted", description="两路得分归一化后加权求和"),
+        ],
+        group="检索设置",
+        dependencies=ConfigDependency(field="search_mode", value=["hybrid"])
+    ),
+    ConfigField(
+        name="rrf_k",
+        label="RRF k",
+        type="number",
+        default=60,
+        min=1,
+        max=16384,
+        description="越大排名靠后的结果权重越高",
+        group="检索设置",
+        dependencies=ConfigDependency(field="fusion", value=["rrf"])
+    ),
+    ConfigField(
+        name="dense_weight",
+        label="向量检索权重",
+        type="number",
+        default=0.7,
+        min=0,
+        max=1,
+        step=0.05,
+        description="BM25 的权重为 1 减去该值",
+        group="检索设置",
+        dependencies=ConfigDependency(field="fusion", value=["weighted"])
+    ),
+    ConfigField(
+        name="bm25_analyzer",
+        label="BM25 分词器",
+        type="select",
+        default="standard",
+        options=[
+            ConfigFieldOption(label="标准", value="standard", description="按空格和标点分词"),
+            ConfigFieldOption(label="中文 (jieba)", value="jieba", description="Milvus Lite 需安装 jieba"),
+        ],
+        description="创建集合时生效",
+        group="检索设置",
+    ),
+    ConfigField(
+        name="index_type",
+        label="索引类型",
+        type="select",
+        default="auto",
+        options=[
+            ConfigFieldOption(label="自动", value="auto", description="按向量数选择索引和参数"),
+            ConfigFieldOption(label="FLAT", value="FLAT", description="暴力检索，召回率 100%，适合少量向量"),
+            ConfigFieldOption(label="HNSW", value="HNSW", description="图索引，召回率高、检索快，内存占用较大"),
+            ConfigFieldOption(label="HNSW_SQ", value="HNSW_SQ", description="HNSW 加 8 位标量量化，内存更小"),
+            ConfigFieldOption(label="IVF_FLAT", value="IVF_FLAT", description="倒排聚类索引"),
+            ConfigFieldOption(label="IVF_SQ8", value="IVF_SQ8", description="倒排聚类加 8 位标量量化"),
+            ConfigFieldOption(label="IVF_PQ", value="IVF_PQ", description="倒排聚类加乘积量化，Milvus Lite 不支持"),
+        ],
+        description="向量索引类型，写入后按集合中的向量数调整",
+        group="索引设置",
+    ),
+    ConfigField(
+        name="target_recall",
+        label="目标召回率",
+        type="number",
+        default=0.95,
+        min=0.8,
+        max=1,
+        step=0.01,
+        description="未指定检索参数时，按目标召回率推算 ef / nprobe",
+        group="索引设置",
+    ),
+    ConfigField(
+        name="hnsw_m",
+        label="HNSW M",
+        type="number",
+        default=0,
+        min=0,
+        max=64,
+        description="每个节点的最大连接数，0 表示按目标召回率自动选择",
+        group="索引设置",
+        dependencies=ConfigDependency(field="index_type", value=["HNSW", "HNSW_SQ"])
+    ),
+    ConfigField(
+        name="hnsw_ef_construction",
+        label="HNSW efConstruction",
+        type="number",
+        default=0,
+        min=0,
+        max=1024,
+        description="构建索引时的候选集大小，0 表示自动",
+        group="索引设置",
+        dependencies=ConfigDependency(field="index_type", value=["HNSW", "HNSW_SQ"])
+    ),
+    ConfigField(
+        name="hnsw_ef",
+        label="HNSW ef",
+        type="number",
+        default=0,
+        min=0,
+        max=4096,
+        description="检索时的候选集大小，0 表示按目标召回率自动选择",
+        group="索引设置",
+        dependencies=ConfigDependency(field="index_type", value=["HNSW", "HNSW_SQ"])
+    ),
+    ConfigField(
+        name="ivf_nlist",
+        label="IVF nlist",
+        type="number",
+        default=0,
+        min=0,
+        max=65536,
+        description="聚类中心数，0 表示按向量数自动选择（约 4√n）",
+        group="索引设置",
+        dependencies=ConfigDependency(field="index_type", value=["IVF_FLAT", "IVF_SQ8", "IVF_PQ"])
+    ),
+    ConfigField(
+        name="ivf_nprobe",
+        label="IVF nprobe",
+        type="number",
+        default=0,
+        min=0,
+        max=65536,
+        description="检索时访问的聚类数，0 表示按目标召回率自动选择",
+        group="索引设置",
+        dependencies=ConfigDependency(field="index_type", value=["IVF_FLAT", "IVF_SQ8", "IVF_PQ"])
+    ),
+    ConfigField(
+        name="pq_m",
+        label="PQ 子向量数",
+        type="number",
+        default=0,
+        min=0,
+        max=1024,
+        description="需整除向量维度，0 表示每 8 维一个子向量",
+        group="索引设置",
+        dependencies=ConfigDependency(field="index_type", value=["IVF_PQ"])
+    ),
+    ConfigField(
+        name="quantization",
+        label="向量量化",
+        type="select",
+        default="none",
+        options=[
+            ConfigFieldOption(label="不量化", value="none"),
+            ConfigFieldOption(label="int8", value="int8", description="8 位标量量化，内存为 float32 的 1/4，HNSW 时使用 HNSW_SQ"),
+            ConfigFieldOption(label="二值", value="binary", description="每维 1 位，内存为 float32 的 1/32，召回率较低，需配合重排"),
+        ],
+        description="检索在量化编码上进行，完整向量保存在磁盘上用于重排；存储结果中报告压缩比和 recall@10",
+        group="索引设置",
+        dependencies=ConfigDependency(field="store_method", value=["local"])
+    ),
+    ConfigField(
+        name="rescore_factor",
+        label="重排倍数",
+        type="number",
+        default=0,
+        min=0,
+        max=64,
+        description="在量化编码上取 top_k × 该倍数个候选，再用完整向量重新计算得分；为 1 时不重排，0 表示自动（int8 取 2，二值取 10）",
+        group="索引设置",
+        dependencies=ConfigDependency(field="quantization", value=["int8", "binary"])
+    ),
+    ConfigField(
+        name="insert_batch_size",
+        label="每批写入行数",
+        type="number",
+        default=1000,
+        min=1,
+        max=100000,
+        description="写入向量库时每批最多的分块数",
+        group="性能设置",
+    ),
+    ConfigField(
+        name="insert_batch_mb",
+        label="每批写入大小 (MB)",
+        type="number",
+        default=16,
+        min=1,
+        max=256,
+        description="每批写入的估算大小上限，需小于向量库的单次请求限制（Milvus 默认 64 MB）",
+        group="性能设置",
+    ),
 ]
 
 STORE_CONFIG = ConfigParams(
@@ -26,6 +251,9 @@ STORE_CONFIG = ConfigParams(
     allowed_extensions=["*"],
     group_order=[
         "基本设置",
+        "检索设置",
+        "索引设置",
+        "性能设置",
     ]
 )
 
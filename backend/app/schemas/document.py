@@ -83,6 +83,7 @@ class Document(DocumentBase):
     """文档完整模型"""
     id: int = Field(..., description="文档ID")
     file_path: str = Field(..., description="文件路径")
+    file_hash: Optional[str] = Field(None, description="文件内容 SHA-256 哈希")
     status: DocumentStatus = Field(default=DocumentStatus.PENDING, description="文档状态")
     load_config: Optional[LoadConfig] = Field(None, description="加载配置")
     load_result: Optional[LoadResult] = Field(None, description="加载结果")
@@ -0,0 +1,51 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from app.schemas.common_config import ConfigParams
+
+class IngestRequest(BaseModel):
+    """端到端入库请求，未提供的阶段配置使用该阶段的默认配置"""
+    load_config: Optional[ConfigParams] = Field(None, description="加载配置")
+    chunk_config: Optional[ConfigParams] = Field(None, description="分块配置")
+    embedding_config: Optional[ConfigParams] = Field(None, description="嵌入配置")
+    store_config: Optional[ConfigParams] = Field(None, description="存储配置")
+
+class IngestResult(BaseModel):
+    """端到端入库结果"""
+    document_id: int = Field(..., description="文档ID")
+    pages: int = Field(0, description="解析的页数")
+    chunks: int = Field(0, description="写入向量库的分块数")
+    elapsed: float = Field(0.0, description="总耗时（秒）")
+
+class BulkIngestConcurrency(BaseModel):
+    """批量入库的并发上限，未提供时使用系统默认值"""
+    documents: Optional[int] = Field(None, ge=1, description="同时入库的文档数")
+    parse: Optional[int] = Field(None, ge=1, description="同时解析的页数（CPU 密集）")
+    embedding: Optional[int] = Field(None, ge=1, description="同时进行的嵌入批次数（I/O 密集）")
+    store: Optional[int] = Field(None, ge=1, description="同时写入向量库的批次数")
+
+class BulkIngestRequest(BaseModel):
+    """批量入库请求，路径相对于服务器的批量导入目录"""
+    paths: List[str] = Field(..., min_length=1, description="文件或目录路径")
+    recursive: bool = Field(True, description="是否递归扫描子目录")
+    skip_stored: bool = Field(True, description="跳过已入库的相同内容文档，便于中断后续跑")
+    ingest: IngestRequest = Field(IngestRequest(), description="各阶段配置")
+    concurrency: BulkIngestConcurrency = Field(BulkIngestConcurrency(), description="并发上限")
+
+class BulkIngestError(BaseModel):
+    """单个文件的入库错误"""
+    path: str = Field(..., description="文件路径")
+    error: str = Field(..., description="错误信息")
+
+class BulkIngestResult(BaseModel):
+    """批量入库统计"""
+    total: int = Field(0, description="文件总数")
+    succeeded: int = Field(0, description="入库成功的文档数")
+    skipped: int = Field(0, description="已入库而跳过的文档数")
+    failed: int = Field(0, description="入库失败的文档数")
+    pages: int = Field(0, description="解析的总页数")
+    chunks: int = Field(0, description="写入向量库的总分块数")
+    elapsed: float = Field(0.0, description="总耗时（秒）")
+    docs_per_min: float = Field(0.0, description="吞吐量：文档/分钟")
+    pages_per_sec: float = Field(0.0, description="吞吐量：页/秒")
+    chunks_per_sec: float = Field(0.0, description="吞吐量：分块/秒")
+    errors: List[BulkIngestError] = Field(default_factory=list, description="失败文件（最多保留前若干条）")
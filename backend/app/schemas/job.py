@@ -0,0 +1,39 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+
+class JobType(str, Enum):
+    """任务类型枚举"""
+    PARSE = "parse"          # 文档解析
+    CHUNK = "chunk"          # 分块
+    EMBEDDING = "embedding"  # 嵌入
+    STORE = "store"          # 向量存储
+    INGEST = "ingest"        # 端到端入库（解析→分块→嵌入→存储）
+    BULK_INGEST = "bulk_ingest"  # 批量入库
+
+class JobStatus(str, Enum):
+    """任务状态枚举"""
+    PENDING = "pending"      # 排队中
+    RUNNING = "running"      # 执行中
+    SUCCEEDED = "succeeded"  # 已完成
+    FAILED = "failed"        # 失败
+    CANCELLED = "cancelled"  # 已取消
+
+class Job(BaseModel):
+    """后台任务"""
+    id: int = Field(..., description="任务ID")
+    job_type: JobType = Field(..., description="任务类型")
+    document_id: Optional[int] = Field(None, description="关联的文档ID")
+    status: JobStatus = Field(..., description="任务状态")
+    progress: float = Field(0.0, description="任务进度（0-1）")
+    message: Optional[str] = Field(None, description="进度信息")
+    result: Optional[Dict[str, Any]] = Field(None, description="任务结果摘要")
+    error: Optional[str] = Field(None, description="错误信息")
+    cancel_requested: bool = Field(False, description="是否已请求取消")
+    created_at: datetime = Field(..., description="创建时间")
+    started_at: Optional[datetime] = Field(None, description="开始时间")
+    finished_at: Optional[datetime] = Field(None, description="结束时间")
+
+    class Config:
+        from_attributes = True
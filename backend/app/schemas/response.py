@@ -1,9 +1,16 @@
-from typing import Generic, TypeVar, Optional
-from pydantic import BaseModel
+from typing import Generic, List, TypeVar, Optional
+from pydantic import BaseModel, Field
 
 T = TypeVar("T")
 
 class ResponseModel(BaseModel, Generic[T]):
     code: int = 0
     message: str = "success"
-    data: Optional[T] = None
\ No newline at end of file
+    data: Optional[T] = None
+
+class PageResult(BaseModel, Generic[T]):
+    """分页结果"""
+    items: List[T] = Field(default_factory=list, description="当前页的数据")
+    total: int = Field(0, description="总条数")
+    offset: int = Field(0, description="起始位置")
+    limit: int = Field(0, description="每页条数")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 from pydantic import BaseModel, Field, field_validator
 
 class StoreBase(BaseModel):
@@ -77,6 +77,7 @@ class StoreConfig(BaseModel):
 class StoreMetaData(BaseModel):
     source: str = Field(..., description="存储的来源")
     page: Optional[int] = Field(None, description="存储的页码")
+    chunk_id: Optional[int] = Field(None, description="对应分块的序号")
     store_id: Optional[int] = Field(None, description="存储的唯一标识符")
 
 
@@ -84,4 +85,52 @@ class LangChainStore(BaseModel):
     content: str = Field(..., description="存储的主要内容")
     metadata: StoreMetaData = Field(default_factory=StoreMetaData, description="存储的元数据信息")
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+class StoreSearchOptions(BaseModel):
+    """向量检索参数（不含查询）"""
+    top_k: int = Field(10, ge=1, le=100, description="返回的结果数")
+    ef: Optional[int] = Field(None, ge=1, le=4096, description="HNSW 检索候选集大小，为空时按存储配置")
+    nprobe: Optional[int] = Field(None, ge=1, le=65536, description="IVF 检索的聚类数，为空时按存储配置")
+    page_from: Optional[int] = Field(None, ge=0, description="起始页码（含）")
+    page_to: Optional[int] = Field(None, ge=0, description="结束页码（含）")
+    source: Optional[str] = Field(None, description="只检索该来源的分块")
+    filter: Optional[str] = Field(None, description='Milvus 过滤表达式，如 metadata["page"] in [1, 3]')
+    output_fields: List[Literal["content", "metadata"]] = Field(
+        default=["content", "metadata"], description="返回的字段"
+    )
+
+
+
+class StoreSearchRequest(StoreSearchOptions):
+    """向量检索参数"""
+    query: str = Field(..., min_length=1, description="查询文本")
+
+
+class StoreBatchSearchRequest(StoreSearchOptions):
+    """批量检索参数，所有查询使用同样的检索参数"""
+    queries: List[str] = Field(..., min_length=1, max_length=1000, description="查询文本列表")
+
+    @field_validator('queries')
+    @classmethod
+    def validate_queries(cls, v):
+        if any(not query.strip() for query in v):
+            raise ValueError("查询文本不能为空")
+        return v
+
+
+class StoreSearchHit(BaseModel):
+    id: int = Field(..., description="向量库中的主键")
+    score: float = Field(..., description="相似度得分，越大越相似")
+    document_id: Optional[int] = Field(None, description="所属文档ID")
+    content: Optional[str] = Field(None, description="分块内容")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="分块元数据")
+
+
+class StoreSearchResult(BaseModel):
+    query: str = Field(..., description="查询文本")
+    hits: List[StoreSearchHit] = Field(default_factory=list, description="按得分从高到低排序的结果")
+
+
+class StoreBatchSearchResult(BaseModel):
+    results: List[StoreSearchResult] = Field(default_factory=list, description="每个查询的结果，顺序与请求一致")
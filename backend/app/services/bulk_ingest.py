@@ -0,0 +1,206 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Set
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.exceptions import APIException
+from app.schemas.common_config import DocumentStatus
+from app.schemas.configuration.document import FILE_TYPE_CONFIGS
+from app.schemas.ingest import BulkIngestError, BulkIngestRequest, BulkIngestResult, IngestResult
+from app.services.document import DocumentService
+from app.services.ingest import IngestService, StageLimits
+from app.services.job import JobCancelled, JobContext
+from app.utils.file import get_file_extension
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 没有任务上下文时（命令行），输出进度日志的间隔（秒）
+LOG_INTERVAL = 10.0
+
+
+def resolve_import_paths(paths: Iterable[str], root: str = settings.BULK_INGEST_DIR) -> List[str]:
+    """把接口传入的路径解析为批量导入目录下的绝对路径
+
+    Raises:
+        ValueError: 路径位于导入目录之外时抛出
+    """
+    root = os.path.realpath(root)
+    resolved = []
+    for path in paths:
+        full_path = os.path.realpath(os.path.join(root, path))
+        if full_path != root and not full_path.startswith(root + os.sep):
+            raise ValueError(f"路径不在批量导入目录内: {path}")
+        resolved.append(full_path)
+    return resolved
+
+
+def collect_files(paths: Iterable[str], recursive: bool = True) -> List[str]:
+    """收集待入库的文件，目录中只收集支持的文件类型
+
+    Raises:
+        ValueError: 路径不存在时抛出
+    """
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+        elif os.path.isdir(path):
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                if not recursive:
+                    dirnames.clear()
+                for filename in sorted(filenames):
+                    if get_file_extension(filename) in FILE_TYPE_CONFIGS:
+                        files.append(os.path.join(directory, filename))
+        else:
+            raise ValueError(f"路径不存在: {path}")
+    return files
+
+
+class BulkIngestService:
+    """批量入库调度器
+
+    多个文档同时入库，每个文档内部仍按 IngestService 的流水线执行；
+    解析、嵌入、存储三个阶段分别用 StageLimits 限制跨文档的总并发度。
+    每个文档使用独立的数据库会话，单个文档失败不影响其他文档。
+    """
+    def __init__(self, session_factory: sessionmaker = SessionLocal):
+        self.session_factory = session_factory
+        # 正在入库的文档，内容相同的文件同时出现时只入库一次
+        self._active: Set[int] = set()
+        self._active_lock = threading.Lock()
+
+    def run(
+        self,
+        files: List[str],
+        request: BulkIngestRequest,
+        context: Optional[JobContext] = None
+    ) -> BulkIngestResult:
+        """批量入库
+
+        Args:
+            files: 待入库的文件路径
+            request: 批量入库请求，使用其中的阶段配置和并发上限
+            context: 后台任务上下文，用于上报进度和响应取消；取消后不再开始新文档，
+                已开始的文档会执行完毕
+
+        Returns:
+            BulkIngestResult: 汇总统计和吞吐量
+        """
+        concurrency = request.concurrency
+        limits = StageLimits(
+            parse=concurrency.parse or settings.BULK_INGEST_PARSE_CONCURRENCY,
+            embedding=concurrency.embedding or settings.BULK_INGEST_EMBEDDING_CONCURRENCY,
+            store=concurrency.store or settings.BULK_INGEST_STORE_CONCURRENCY,
+        )
+        workers = concurrency.documents or settings.BULK_INGEST_DOCUMENTS
+        result = BulkIngestResult(total=len(files))
+        start = time.perf_counter()
+        last_log = start
+        pending = iter(files)
+        running: Dict[Future, str] = {}
+        logger.info(f"开始批量入库: files={len(files)}, documents={workers}")
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-ingest")
+        try:
+            while True:
+                # 只提交有限个文档，避免一次性为全部文件创建任务
+                while len(running) < workers * 2:
+                    path = next(pending, None)
+                    if path is None:
+                        break
+                    running[executor.submit(self._ingest_file, path, request, limits)] = path
+                if not running:
+                    break
+
+                done, _ = wait(running, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._collect(result, running.pop(future), future)
+                self._summarize(result, time.perf_counter() - start)
+
+                if context:
+                    finished = result.succeeded + result.skipped + result.failed
+                    context.report(
+                        progress=finished / result.total if result.total else None,
+                        message=f"已完成 {finished}/{result.total} 个文档，失败 {result.failed} 个",
+                    )
+                elif time.perf_counter() - last_log >= LOG_INTERVAL:
+                    last_log = time.perf_counter()
+                    self._log_progress(result)
+        except JobCancelled:
+            logger.info(f"批量入库已取消，等待执行中的文档结束: running={len(running)}")
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        self._summarize(result, time.perf_counter() - start)
+        self._log_progress(result)
+        return result
+
+    def _ingest_file(self, path: str, request: BulkIngestRequest, limits: StageLimits) -> Optional[IngestResult]:
+        """入库单个文件，已入库而跳过时返回 None"""
+        db = self.session_factory()
+        try:
+            document = DocumentService(db).create_document_from_path(
+                path, metadata={"source_path": path}, reuse_existing=request.skip_stored
+            )
+            if request.skip_stored and document.status == DocumentStatus.STORED:
+                return None
+            with self._active_lock:
+                if document.id in self._active:
+                    return None
+                self._active.add(document.id)
+            try:
+                return IngestService(db).ingest(document.id, request.ingest, limits=limits)
+            finally:
+                with self._active_lock:
+                    self._active.discard(document.id)
+        finally:
+            db.close()
+
+    def _collect(self, result: BulkIngestResult, path: str, future: Future) -> None:
+        try:
+            ingest_result = future.result()
+        except Exception as e:
+            if isinstance(e, HTTPException):
+                error = str(e.detail)
+            elif isinstance(e, APIException):
+                error = e.message
+            else:
+                error = str(e)
+            logger.warning(f"文件入库失败: path={path}, error={error}")
+            result.failed += 1
+            if len(result.errors) < settings.BULK_INGEST_MAX_ERRORS:
+                result.errors.append(BulkIngestError(path=path, error=error))
+            return
+        if ingest_result is None:
+            result.skipped += 1
+            return
+        result.succeeded += 1
+        result.pages += ingest_result.pages
+        result.chunks += ingest_result.chunks
+
+    @staticmethod
+    def _summarize(result: BulkIngestResult, elapsed: float) -> None:
+        """计算吞吐量"""
+        result.elapsed = elapsed
+        if elapsed > 0:
+            result.docs_per_min = result.succeeded / elapsed * 60
+            result.pages_per_sec = result.pages / elapsed
+            result.chunks_per_sec = result.chunks / elapsed
+
+    @staticmethod
+    def _log_progress(result: BulkIngestResult) -> None:
+        finished = result.succeeded + result.skipped + result.failed
+        logger.info(
+            f"批量入库进度: {finished}/{result.total}, succeeded={result.succeeded}, "
+            f"skipped={result.skipped}, failed={result.failed}, "
+            f"{result.docs_per_min:.1f} docs/min, {result.pages_per_sec:.1f} pages/s, "
+            f"{result.chunks_per_sec:.1f} chunks/s"
+        )
@@ -1,13 +1,24 @@
 from sqlalchemy.orm import Session
-from app.models.document import Document
-from app.models.chunk import Chunk
+from app.models.document import Document, DocumentPage
+from app.models.chunk import Chunk, ChunkItem
 from app.schemas.chunk import LangChainChunk
-from app.schemas.document import LangChainDocument
+from app.schemas.response import PageResult
 from app.schemas.common_config import ConfigParams, DocumentStatus
 from app.schemas.configuration.chunk import get_default_config
-from typing import List
+from typing import Callable, Iterator, List, Optional
 from fastapi import HTTPException
+from sqlalchemy import delete, insert
 from app.services.chunkers.langchain_chunker import LangChainChunker
+from app.services.document import DocumentService
+
+def get_chunker(config: ConfigParams) -> LangChainChunker:
+    """根据分块工具创建分块器"""
+    if config.get("chunk_tool") == "langchain_recursive":
+        return LangChainChunker(config)
+    raise ValueError(f"不支持的chunk工具: {config.get('chunk_tool')}")
+
+def _to_langchain_chunk(row: ChunkItem) -> LangChainChunk:
+    return LangChainChunk(page_content=row.content, metadata=row.meta_data or {})
 
 class ChunkService:
     def __init__(self, db: Session):
@@ -28,8 +39,7 @@ class ChunkService:
                 config=config.model_dump(),
                 meta_data={
                     "document": {"id": document.id, "filename": document.filename}
-                },
-                result=[]
+                }
             )
             self.db.add(chunk)
             self.db.commit()
@@ -42,21 +52,30 @@ class ChunkService:
         # 3. 返回 chunk 配置
         return ConfigParams.model_validate(chunk.config)
 
-    def parse_chunk(self, document_id: int, config: ConfigParams) -> List[LangChainChunk]:
+    def parse_chunk(
+        self,
+        document_id: int,
+        config: ConfigParams,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> List[LangChainChunk]:
+        """分块并保存结果，progress 每处理完一页调用一次，参数为已处理的页数"""
         # 1. 获取文档内容
         document = self.db.query(Document).filter(Document.id == document_id).first()
         if not document:
             raise Exception("文档不存在")
+        if not self.db.query(DocumentPage.id).filter(DocumentPage.document_id == document_id).first():
+            raise HTTPException(status_code=400, detail="文档尚未解析，请先进行解析")
         # 2. 根据类型调用不同的chunkers
         results: List[LangChainChunk] = []
-        if config.get("chunk_tool") == "langchain_recursive":
-            chunker = LangChainChunker(config)
-            for l_document in document.result:
-                langchain_document = LangChainDocument.model_validate(l_document)
-                results.extend(chunker.chunk(langchain_document))
-            results = [result.model_dump() for result in results]
-        else:
-            raise ValueError(f"不支持的chunk工具: {config.get('chunk_tool')}")
+        chunker = get_chunker(config)
+        for pages, langchain_document in enumerate(DocumentService(self.db).iter_pages(document_id), 1):
+            results.extend(chunker.chunk(langchain_document))
+            if progress:
+                progress(pages)
+        # 分块在文档内按顺序编号
+        for index, result in enumerate(results):
+            result.metadata.chunk_id = index
+        self._save_chunks(document_id, results)
 
         # 3. 更新文档状态
         chunk = self.db.query(Chunk).filter(Chunk.id == document.chunk_id).first()
@@ -66,8 +85,7 @@ class ChunkService:
                 config=config.model_dump(),
                 meta_data={
                     "document": {"id": document.id, "filename": document.filename}
-                },
-                result=results,
+                }
             )
             self.db.add(chunk)
             self.db.commit()
@@ -81,8 +99,61 @@ class ChunkService:
             self.db.commit()
             self.db.refresh(document)
             chunk.config = config.model_dump()
-            chunk.result = results
             self.db.commit()
             self.db.refresh(chunk)
 
         return results
+
+    def _save_chunks(self, document_id: int, chunks: List[LangChainChunk]) -> None:
+        """替换文档的分块结果（在调用方提交事务）"""
+        self.db.execute(delete(ChunkItem).where(ChunkItem.document_id == document_id))
+        if chunks:
+            self.db.execute(insert(ChunkItem), [
+                {
+                    "document_id": document_id,
+                    "chunk_id": chunk.metadata.chunk_id,
+                    "page": chunk.metadata.page,
+                    "content": chunk.page_content,
+                    "meta_data": chunk.metadata.model_dump(),
+                }
+                for chunk in chunks
+            ])
+
+    def iter_chunks(self, document_id: int, batch_size: int = 500) -> Iterator[LangChainChunk]:
+        """按顺序逐批读取文档的分块结果"""
+        query = self.db.query(ChunkItem).filter(
+            ChunkItem.document_id == document_id
+        ).order_by(ChunkItem.chunk_id)
+        for row in query.yield_per(batch_size):
+            yield _to_langchain_chunk(row)
+
+    def get_chunks(
+        self,
+        document_id: int,
+        offset: int = 0,
+        limit: int = 50,
+        page: Optional[int] = None
+    ) -> PageResult[LangChainChunk]:
+        """分页获取文档的分块结果，可按页码过滤"""
+        if not self.db.query(Document.id).filter(Document.id == document_id).first():
+            raise HTTPException(status_code=404, detail="文档不存在")
+        query = self.db.query(ChunkItem).filter(ChunkItem.document_id == document_id)
+        if page is not None:
+            query = query.filter(ChunkItem.page == page)
+        rows = query.order_by(ChunkItem.chunk_id).offset(offset).limit(limit).all()
+        return PageResult[LangChainChunk](
+            items=[_to_langchain_chunk(row) for row in rows],
+            total=query.count(),
+            offset=offset,
+            limit=limit,
+        )
+
+    def get_chunk(self, document_id: int, chunk_id: int) -> LangChainChunk:
+        """获取单个分块"""
+        row = self.db.query(ChunkItem).filter(
+            ChunkItem.document_id == document_id,
+            ChunkItem.chunk_id == chunk_id,
+        ).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="分块不存在")
+        return _to_langchain_chunk(row)
@@ -134,6 +134,10 @@ class ConfigService:
                     "model": "claude-3-sonnet-20240229",
                     "max_tokens": 2048
                 },
+                cohere={
+                    "api_key": "",
+                    "base_url": "https://api.cohere.com"
+                },
                 local={
                     "base_url": "http://localhost:11434",
                     "model": "llama2",
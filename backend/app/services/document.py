@@ -1,23 +1,36 @@
 import os
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterable, Iterator, List
 from datetime import datetime
 from fastapi import UploadFile, HTTPException
 from sqlalchemy.orm import Session
-from app.models.document import Document
+from sqlalchemy import delete, insert
+from app.models.document import Document, DocumentPage
+from app.models.chunk import ChunkItem
+from app.models.embedding import Embedding, EmbeddingVector
+from app.models.store import StoreItem
+from app.core.config import settings
 from app.utils.hash import compute_config_hash
-from app.utils.file import save_upload_file, get_file_extension, delete_file
+from app.utils.file import SavedFile, save_upload_file, save_local_file, get_file_extension, delete_file
+from app.utils.vectors import delete_vectors
 from app.schemas.document import (
     LangChainDocument,
     DocumentStatus,
 )
 from app.services.parsers import LangchainParser, LlamaIndexParser
-from app.schemas.configuration.document import get_default_config, get_file_type_config
+from app.schemas.configuration.document import get_default_config, get_file_type_config, get_parser_config
+from app.services.parse_cache import ParseCacheService
+from app.services.query_cache import invalidate_document_results
+from app.services.config import ConfigService
 from app.schemas.common_config import ConfigParams
+from app.schemas.response import PageResult
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+def _to_langchain_document(row: DocumentPage) -> LangChainDocument:
+    return LangChainDocument(page_content=row.content, metadata=row.meta_data or {})
+
 class DocumentService:
     def __init__(self, db: Session):
         self.db = db
@@ -125,28 +138,57 @@ class DocumentService:
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
-            # 保存文件
-            file_path = await save_upload_file(file)
-
-            # 创建文档记录
-            db_document = Document(
-                filename=file.filename,
-                file_path=file_path,
-                file_type=file_ext,
-                file_size=os.path.getsize(file_path),
-                meta_data={
-                    "file_type_info": {
-                        "name": file_config.name,
-                        "description": file_config.description
-                    },
-                    **(metadata or {})
-                }
+            # 流式保存文件，同时得到文件大小和内容哈希
+            saved_file = await save_upload_file(file)
+            if saved_file.reused:
+                logger.info(f"复用已存在的相同内容文件: file_hash={saved_file.sha256}")
+
+            return self._add_document(file.filename, file_ext, file_config, saved_file, metadata)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"创建文档失败: {str(e)}"
             )
-            self.db.add(db_document)
-            self.db.commit()
-            self.db.refresh(db_document)
 
-            return db_document
+    def create_document_from_path(
+        self,
+        file_path: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        reuse_existing: bool = False
+    ) -> Document:
+        """从服务器本地文件创建文档
+
+        Args:
+            file_path: 本地文件路径
+            metadata: 文档元数据
+            reuse_existing: 已存在相同内容的文档时直接返回该文档，不再新建记录
+
+        Returns:
+            Document: 创建（或复用）的文档信息
+
+        Raises:
+            HTTPException: 当文件类型不支持或保存失败时抛出
+        """
+        try:
+            filename = os.path.basename(file_path)
+            file_ext = get_file_extension(filename)
+            try:
+                file_config = get_file_type_config(file_ext)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+            saved_file = save_local_file(file_path)
+            if saved_file.reused and reuse_existing:
+                existing = self.db.query(Document).filter(
+                    Document.file_hash == saved_file.sha256
+                ).order_by(Document.id).first()
+                if existing:
+                    logger.info(f"复用已存在的相同内容文档: document_id={existing.id}, file_path={file_path}")
+                    return existing
+
+            return self._add_document(filename, file_ext, file_config, saved_file, metadata)
         except HTTPException:
             raise
         except Exception as e:
@@ -155,6 +197,34 @@ class DocumentService:
                 detail=f"创建文档失败: {str(e)}"
             )
 
+    def _add_document(
+        self,
+        filename: str,
+        file_ext: str,
+        file_config: ConfigParams,
+        saved_file: SavedFile,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Document:
+        """创建文档记录"""
+        db_document = Document(
+            filename=filename,
+            file_path=saved_file.path,
+            file_type=file_ext,
+            file_size=saved_file.size,
+            file_hash=saved_file.sha256,
+            meta_data={
+                "file_type_info": {
+                    "name": file_config.name,
+                    "description": file_config.description
+                },
+                **(metadata or {})
+            }
+        )
+        self.db.add(db_document)
+        self.db.commit()
+        self.db.refresh(db_document)
+        return db_document
+
     def parse_document(
         self,
         document: Document,
@@ -173,45 +243,213 @@ class DocumentService:
             HTTPException: 当文档不存在或处理失败时抛出
         """
         try:
-            file_type = document.file_type.lower()
-            file_path = document.file_path
+            return list(self.iter_parse_document(document, config, fill_cache=True))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"处理文档失败: {str(e)}"
+            )
+
+    def iter_parse_document(
+        self,
+        document: Document,
+        config: ConfigParams,
+        persist: bool = True,
+        fill_cache: bool = False
+    ) -> Iterator[LangChainDocument]:
+        """逐页处理文档
+
+        每解析出一页就立即产出，解析结果每 PARSE_PAGE_BATCH_SIZE 页写入一批，
+        全部页面产出后与文档状态一起提交。
+
+        Args:
+            document: 文档
+            config: 处理配置
+            persist: 是否保存解析结果并更新文档状态
+            fill_cache: 是否把解析结果写入解析缓存；缓存按整个文档保存，需要在内存中保留全部页面，
+                流式解析时不写入
+
+        Yields:
+            LangChainDocument: 解析出的页面
 
-            if file_type != "pdf":
-                raise HTTPException(status_code=400, detail="仅支持PDF文档处理")
-            loader_tool = config.get("loader_tool", "langchain")
-            parser = None
-            if loader_tool == "langchain":
-                parser = LangchainParser(config)
-            elif loader_tool == "llamaindex":
-                parser = LlamaIndexParser(config)
+        Raises:
+            HTTPException: 当文件类型或加载工具不支持、处理失败时抛出
+        """
+        file_type = document.file_type.lower()
+        file_path = document.file_path
+
+        if file_type != "pdf":
+            raise HTTPException(status_code=400, detail="仅支持PDF文档处理")
+        loader_tool = config.get("loader_tool", "langchain")
+        parser = None
+        if loader_tool == "langchain":
+            system_config = ConfigService(self.db).get_system_config()
+            parser = LangchainParser(config, workers=system_config.parse_workers)
+        elif loader_tool == "llamaindex":
+            parser = LlamaIndexParser(config)
+        else:
+            raise HTTPException(status_code=400, detail=f"不支持的加载工具: {loader_tool}")
+        config_hash = compute_config_hash(config.model_dump())
+        # 解析缓存只关心影响解析结果的配置，下游参数变化不会导致重新解析
+        parser_config_hash = compute_config_hash(get_parser_config(config))
+        cache = ParseCacheService(self.db)
+        cached_result: Optional[List[LangChainDocument]] = None
+        if document.file_hash:
+            cached_result = cache.get(document.file_hash, parser_config_hash)
+        if cached_result is not None:
+            logger.info(f"命中解析缓存: document_id={document.id}")
+            pages: Iterable[LangChainDocument] = cached_result
+        else:
+            duplicate_id = self._find_parsed_duplicate(document, config_hash)
+            if duplicate_id:
+                # 相同内容且相同配置的文档已解析过，直接复用解析结果
+                logger.info(f"复用文档 {duplicate_id} 的解析结果: document_id={document.id}")
+                pages = self.iter_pages(duplicate_id)
             else:
-                raise HTTPException(status_code=400, detail=f"不支持的加载工具: {loader_tool}")
+                pages = parser.iter_parse(file_path)
+
+        # 解析结果逐批写入并提交，不在内存中保留全部页面，解析期间也不长时间占用数据库写锁；
+        # 旧结果在开始时删除，解析失败或提前结束时删除已写入的部分页面
+        if persist:
+            self.db.execute(delete(DocumentPage).where(DocumentPage.document_id == document.id))
+            document.status = DocumentStatus.PENDING
+            self.db.commit()
+        batch: List[LangChainDocument] = []
+        page_index = 0
+        cache_result: Optional[List[LangChainDocument]] = [] if fill_cache and cached_result is None else None
+        completed = False
+        try:
             try:
-                parse_result: List[LangChainDocument] = parser.parse(file_path)
+                for page in pages:
+                    if persist:
+                        batch.append(page)
+                        if len(batch) >= settings.PARSE_PAGE_BATCH_SIZE:
+                            self._insert_pages(document.id, batch, page_index)
+                            self.db.commit()
+                            page_index += len(batch)
+                            batch = []
+                    if cache_result is not None:
+                        cache_result.append(page)
+                    yield page
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"处理文档失败: {str(e)}")
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"处理文档失败: {str(e)}")
+
+            if not persist:
+                return
+            self._insert_pages(document.id, batch, page_index)
             # 存入 metadata
             document.meta_data = document.meta_data or {}
-            document.result = [result.model_dump() for result in parse_result]
             # 更新文档状态
             document.status = DocumentStatus.LOADED
             # 将config转为json进行存储
             document.config = {
                 "config": config.model_dump(),
-                "hash": compute_config_hash(config.model_dump()),
+                "hash": config_hash,
                 "created_at": datetime.now().isoformat()
             }
             self.db.commit()
-            self.db.refresh(document)
-            return parse_result
-
-        except HTTPException:
-            raise
+            completed = True
+        finally:
+            if persist and not completed:
+                self._discard_pages(document.id)
+        self.db.refresh(document)
+        if cache_result is not None and document.file_hash:
+            cache.set(document.file_hash, parser_config_hash, cache_result)
+
+    def _find_parsed_duplicate(self, document: Document, config_hash: str) -> Optional[int]:
+        """查找内容相同、加载配置相同且已有解析结果的其他文档，返回其ID"""
+        if not document.file_hash:
+            return None
+        candidates = self.db.query(Document.id, Document.config).filter(
+            Document.file_hash == document.file_hash,
+            Document.id != document.id,
+            self.db.query(DocumentPage.id).filter(DocumentPage.document_id == Document.id).exists(),
+        ).all()
+        for candidate_id, candidate_config in candidates:
+            if (candidate_config or {}).get("hash") == config_hash:
+                return candidate_id
+        return None
+
+    def _discard_pages(self, document_id: int) -> None:
+        """删除解析失败或中途结束时已提交的部分页面"""
+        try:
+            self.db.rollback()
+            self.db.execute(delete(DocumentPage).where(DocumentPage.document_id == document_id))
+            self.db.commit()
         except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"处理文档失败: {str(e)}"
-            )
+            self.db.rollback()
+            logger.error(f"删除未完成的解析结果失败: document_id={document_id}, error={str(e)}")
+
+    def _save_pages(self, document_id: int, pages: List[LangChainDocument]) -> None:
+        """替换文档的解析结果（在调用方提交事务）"""
+        self.db.execute(delete(DocumentPage).where(DocumentPage.document_id == document_id))
+        self._insert_pages(document_id, pages)
+
+    def _insert_pages(self, document_id: int, pages: List[LangChainDocument], start: int = 0) -> None:
+        """追加一批解析结果，页面序号从 start 开始（在调用方提交事务）"""
+        if pages:
+            self.db.execute(insert(DocumentPage), [
+                {
+                    "document_id": document_id,
+                    "page_index": index,
+                    "page": page.metadata.get("page"),
+                    "content": page.page_content,
+                    "meta_data": page.metadata,
+                }
+                for index, page in enumerate(pages, start)
+            ])
+
+    def iter_pages(self, document_id: int, batch_size: int = 500) -> Iterator[LangChainDocument]:
+        """按顺序逐批读取文档的解析结果
+
+        按页面序号分批查询，不保持打开的游标，调用方在读取期间可以提交事务。
+        """
+        last_index = -1
+        while True:
+            rows = self.db.query(DocumentPage).filter(
+                DocumentPage.document_id == document_id,
+                DocumentPage.page_index > last_index
+            ).order_by(DocumentPage.page_index).limit(batch_size).all()
+            # 先转换整批，调用方提交事务后行对象过期，不会逐行重新查询
+            yield from [_to_langchain_document(row) for row in rows]
+            if len(rows) < batch_size:
+                return
+            last_index = rows[-1].page_index
+
+    def get_pages(
+        self,
+        document_id: int,
+        offset: int = 0,
+        limit: int = 50,
+        page: Optional[int] = None
+    ) -> PageResult[LangChainDocument]:
+        """分页获取文档的解析结果
+
+        Args:
+            document_id: 文档ID
+            offset: 起始位置
+            limit: 每页条数
+            page: 只返回该页码（从 0 开始）的结果
+
+        Raises:
+            HTTPException: 当文档不存在时抛出
+        """
+        if not self.db.query(Document.id).filter(Document.id == document_id).first():
+            raise HTTPException(status_code=404, detail="文档不存在")
+        query = self.db.query(DocumentPage).filter(DocumentPage.document_id == document_id)
+        if page is not None:
+            query = query.filter(DocumentPage.page == page)
+        rows = query.order_by(DocumentPage.page_index).offset(offset).limit(limit).all()
+        return PageResult[LangChainDocument](
+            items=[_to_langchain_document(row) for row in rows],
+            total=query.count(),
+            offset=offset,
+            limit=limit,
+        )
 
     def get_load_config(self, document_id: int) -> ConfigParams:
         """获取文档加载配置
@@ -247,10 +485,33 @@ class DocumentService:
             document = self.get_document(document_id)
             if not document:
                 raise HTTPException(status_code=404, detail="文档不存在")
+            file_path = document.file_path
+            file_hash = document.file_hash
+            vector_files = [vector_file for vector_file, in self.db.query(Embedding.vector_file).filter(
+                Embedding.document_id == document_id
+            )]
+            from app.services.store import StoreService
+            storer = StoreService(self.db).get_document_storer(document)
+            # 删除各阶段的结果
+            for model in (DocumentPage, ChunkItem, EmbeddingVector, StoreItem):
+                self.db.execute(delete(model).where(model.document_id == document_id))
             self.db.delete(document)
             self.db.commit()
-            # upload文件夹下的文档删除
-            delete_file(document.file_path)
+            for vector_file in vector_files:
+                delete_vectors(vector_file)
+            invalidate_document_results(document_id)
+            if storer:
+                try:
+                    # 共享集合中的向量不删除会出现在跨文档检索结果中
+                    storer.clear()
+                except Exception as e:
+                    logger.warning(f"删除文档向量失败: document_id={document_id}, error={str(e)}")
+            # upload文件夹下的文档删除，相同内容的文件被其他文档引用时保留
+            shared = self.db.query(Document).filter(Document.file_path == file_path).count()
+            if not shared:
+                delete_file(file_path)
+                if file_hash:
+                    ParseCacheService(self.db).invalidate(file_hash)
         except HTTPException:
             raise
         except Exception as e:
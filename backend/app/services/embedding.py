@@ -1,15 +1,24 @@
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.document import Document
-from app.models.chunk import Chunk
-from app.models.embedding import Embedding
+from app.models.embedding import Embedding, EmbeddingVector
 from app.schemas.embedding import LangChainEmbedding
-from app.schemas.document import LangChainDocument
+from app.schemas.response import PageResult
 from app.schemas.common_config import ConfigParams, DocumentStatus
 from app.schemas.configuration.embedding import get_default_config
-from typing import List
+from typing import Callable, Iterator, List, Optional
+import numpy as np
 from fastapi import HTTPException
+from sqlalchemy import delete, insert
 from app.services.embeddinger.LangChainEmbe import Embeddinger
+from app.services.embeddinger.remote import RemoteEmbeddingError
 from app.schemas.chunk import LangChainChunk
+from app.services.chunk import ChunkService
+from app.utils.vectors import get_vector_path, load_vectors, save_vectors
+
+def _to_langchain_embedding(row: EmbeddingVector, vectors: np.ndarray) -> LangChainEmbedding:
+    embedding = vectors[row.row_index].astype(np.float32).tolist()
+    return LangChainEmbedding(embedding=embedding, metadata=row.meta_data or {})
 
 class EmbeddingService:
     def __init__(self, db: Session):
@@ -30,8 +39,7 @@ class EmbeddingService:
                 config=config.model_dump(),
                 meta_data={
                     "document": {"id": document.id, "filename": document.filename}
-                },
-                result=[]
+                }
             )
             self.db.add(embedding)
             self.db.commit()
@@ -44,39 +52,140 @@ class EmbeddingService:
         # 3. 返回 embedding 配置
         return ConfigParams.model_validate(embedding.config)
 
-    def parse_embedding(self, document_id: int, config: ConfigParams) -> List[LangChainEmbedding]:
+    def parse_embedding(
+        self,
+        document_id: int,
+        config: ConfigParams,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> List[LangChainEmbedding]:
+        """嵌入文档的全部分块并保存结果
+
+        分块每 EMBEDDING_PROGRESS_BATCH_SIZE 个嵌入一批，progress 每批完成后调用，参数为已嵌入的分块数。
+        """
         # 1. 获取文档内容
         document = self.db.query(Document).filter(Document.id == document_id).first()
         if not document:
             raise Exception("文档不存在")
-        chunk = self.db.query(Chunk).filter(Chunk.id == document.chunk_id).first()
-        if not chunk:
+        chunks: List[LangChainChunk] = list(ChunkService(self.db).iter_chunks(document_id))
+        if not chunks:
             raise Exception("分块不存在")
-        chunks: List[LangChainChunk] = [LangChainChunk.model_validate(chunk) for chunk in chunk.result]
-        results = Embeddinger(config).embedding(chunks)
-        # 2. 获取或创建 embedding
-        if not document.embedding_id:
-            # 如果不存在 embedding，则创建新的 embedding 配置
+        try:
+            embeddinger = Embeddinger(config, self.db)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            batches = []
+            for start in range(0, len(chunks), settings.EMBEDDING_PROGRESS_BATCH_SIZE):
+                batch = chunks[start:start + settings.EMBEDDING_PROGRESS_BATCH_SIZE]
+                batches.append(embeddinger.embed(batch))
+                if progress:
+                    progress(start + len(batch))
+            vectors = np.concatenate(batches)
+        except RemoteEmbeddingError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+        results = embeddinger.to_embeddings(chunks, vectors)
+        if embeddinger.cache:
+            embeddinger.cache.evict()
+
+        # 2. 向量保存为 .npy 文件，数据库只记录文件路径和每个向量的行号
+        vector_file = get_vector_path(document_id)
+        vector_dtype = config.get("vector_dtype", "float32")
+        try:
+            save_vectors(vector_file, vectors, vector_dtype)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        self._save_rows(document_id, chunks, results)
+
+        # 3. 获取或创建 embedding
+        embedding = None
+        if document.embedding_id:
+            embedding = self.db.query(Embedding).filter(Embedding.id == document.embedding_id).first()
+        if not embedding:
             embedding = Embedding(
                 document_id=document_id,
-                config=config.model_dump(),
                 meta_data={
                     "document": {"id": document.id, "filename": document.filename}
-                },
-                result= [result.model_dump() for result in results]
+                }
             )
             self.db.add(embedding)
-            self.db.commit()
-            self.db.refresh(embedding)
-            document.embedding_id = embedding.id
-            self.db.commit()
-            self.db.refresh(document)
-            document.status = DocumentStatus.EMBEDDED
-            self.db.commit()
-            self.db.refresh(document)
-        else:
-            embedding = self.db.query(Embedding).filter(Embedding.id == document.embedding_id).first()
-            document.status = DocumentStatus.EMBEDDED
-            self.db.commit()
-            self.db.refresh(document)
+        embedding.config = config.model_dump()
+        embedding.vector_file = vector_file
+        embedding.vector_dtype = vector_dtype
+        embedding.dimension = vectors.shape[1]
+        self.db.commit()
+        self.db.refresh(embedding)
+        document.embedding_id = embedding.id
+        document.status = DocumentStatus.EMBEDDED
+        self.db.commit()
+        self.db.refresh(document)
         return results
+
+    def _save_rows(
+        self,
+        document_id: int,
+        chunks: List[LangChainChunk],
+        embeddings: List[LangChainEmbedding]
+    ) -> None:
+        """替换文档的嵌入结果记录（在调用方提交事务）"""
+        self.db.execute(delete(EmbeddingVector).where(EmbeddingVector.document_id == document_id))
+        if embeddings:
+            self.db.execute(insert(EmbeddingVector), [
+                {
+                    "document_id": document_id,
+                    "chunk_id": chunk.metadata.chunk_id,
+                    "page": chunk.metadata.page,
+                    "row_index": row_index,
+                    "meta_data": embedding.metadata.model_dump(),
+                }
+                for row_index, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+            ])
+
+    def _open_vectors(self, document_id: int) -> Optional[np.ndarray]:
+        """以内存映射方式打开文档的向量文件"""
+        vector_file = self.db.query(Embedding.vector_file).join(
+            Document, Document.embedding_id == Embedding.id
+        ).filter(Document.id == document_id).scalar()
+        return load_vectors(vector_file) if vector_file else None
+
+    def get_vector_matrix(self, document_id: int) -> Optional[np.ndarray]:
+        """按分块顺序获取文档的向量矩阵
+
+        行号与分块顺序一致时直接返回内存映射的矩阵，不复制数据。
+
+        Returns:
+            np.ndarray: 向量矩阵，尚未嵌入时返回 None
+        """
+        vectors = self._open_vectors(document_id)
+        if vectors is None:
+            return None
+        row_indexes = [row_index for row_index, in self.db.query(EmbeddingVector.row_index).filter(
+            EmbeddingVector.document_id == document_id
+        ).order_by(EmbeddingVector.chunk_id)]
+        if row_indexes == list(range(len(vectors))):
+            return vectors
+        return vectors[row_indexes]
+
+    def iter_embeddings(self, document_id: int, batch_size: int = 500) -> Iterator[LangChainEmbedding]:
+        """按分块顺序逐批读取文档的嵌入结果"""
+        vectors = self._open_vectors(document_id)
+        if vectors is None:
+            return
+        query = self.db.query(EmbeddingVector).filter(
+            EmbeddingVector.document_id == document_id
+        ).order_by(EmbeddingVector.chunk_id)
+        for row in query.yield_per(batch_size):
+            yield _to_langchain_embedding(row, vectors)
+
+    def get_embeddings(self, document_id: int, offset: int = 0, limit: int = 50) -> PageResult[LangChainEmbedding]:
+        """分页获取文档的嵌入结果，只读取当前页对应的向量"""
+        if not self.db.query(Document.id).filter(Document.id == document_id).first():
+            raise HTTPException(status_code=404, detail="文档不存在")
+        vectors = self._open_vectors(document_id)
+        query = self.db.query(EmbeddingVector).filter(EmbeddingVector.document_id == document_id)
+        rows = query.order_by(EmbeddingVector.chunk_id).offset(offset).limit(limit).all() if vectors is not None else []
+        return PageResult[LangChainEmbedding](
+            items=[_to_langchain_embedding(row, vectors) for row in rows],
+            total=query.count() if vectors is not None else 0,
+            offset=offset,
+            limit=limit,
+        )
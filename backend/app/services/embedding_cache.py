@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.embedding_cache import EmbeddingCache
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 单条 SQL 中 IN 列表的最大长度（SQLite 对参数个数有限制）
+QUERY_BATCH_SIZE = 500
+# 淘汰时清理到容量上限的比例，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：Unicode NFC，合并连续空白"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> str:
+    """规范化后文本的 SHA-256"""
+    return hashlib.sha256(normalize_text(text).encode()).hexdigest()
+
+
+def _batched(items: Sequence, size: int) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class EmbeddingCacheService:
+    """嵌入向量缓存
+
+    以 (模型标识, 规范化文本哈希) 为键持久化向量，内容相同的分块（重复嵌入、
+    不同文档间的重叠分块）只计算一次；按条目数和总字节数做 LRU 淘汰。
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def make_key(model_id: str, hash_value: str) -> str:
+        return f"{model_id}:{hash_value}"
+
+    def get_many(self, model_id: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """批量读取缓存，命中的条目刷新访问时间
+
+        Returns:
+            Dict[str, np.ndarray]: 命中的 文本哈希 → 向量
+        """
+        found: Dict[str, np.ndarray] = {}
+        hit_ids: List[int] = []
+        prefix = len(model_id) + 1
+        for batch in _batched(list(hashes), QUERY_BATCH_SIZE):
+            rows = self.db.query(EmbeddingCache.id, EmbeddingCache.cache_key, EmbeddingCache.vector).filter(
+                EmbeddingCache.cache_key.in_([self.make_key(model_id, hash_value) for hash_value in batch])
+            ).all()
+            for entry_id, cache_key, vector in rows:
+                found[cache_key[prefix:]] = np.frombuffer(vector, dtype=np.float32)
+                hit_ids.append(entry_id)
+        if hit_ids:
+            now = datetime.now()
+            for batch in _batched(hit_ids, QUERY_BATCH_SIZE):
+                self.db.execute(update(EmbeddingCache).where(EmbeddingCache.id.in_(batch)).values(accessed_at=now))
+            self.db.commit()
+        return found
+
+    def set_many(self, model_id: str, items: Iterable[Tuple[str, np.ndarray]]) -> int:
+        """批量写入缓存，已存在的条目跳过
+
+        Returns:
+            int: 写入的条目数
+        """
+        entries = {
+            self.make_key(model_id, hash_value): np.asarray(vector, dtype=np.float32).tobytes()
+            for hash_value, vector in items
+        }
+        if not entries:
+            return 0
+        for batch in _batched(list(entries), QUERY_BATCH_SIZE):
+            for cache_key, in self.db.query(EmbeddingCache.cache_key).filter(EmbeddingCache.cache_key.in_(batch)):
+                entries.pop(cache_key, None)
+        now = datetime.now()
+        rows = [
+            {"cache_key": cache_key, "model_id": model_id, "vector": vector, "size": len(vector), "accessed_at": now}
+            for cache_key, vector in entries.items()
+        ]
+        if rows:
+            self.db.execute(insert(EmbeddingCache), rows)
+            self.db.commit()
+        return len(rows)
+
+    def evict(self) -> int:
+        """超出条目数或总字节数时，按最近访问时间淘汰到上限的 90%
+
+        Returns:
+            int: 淘汰的条目数
+        """
+        count, total_size = self.db.query(func.count(EmbeddingCache.id), func.sum(EmbeddingCache.size)).one()
+        total_size = total_size or 0
+        if count <= settings.EMBEDDING_CACHE_MAX_ENTRIES and total_size <= settings.EMBEDDING_CACHE_MAX_BYTES:
+            return 0
+
+        target_count = int(settings.EMBEDDING_CACHE_MAX_ENTRIES * EVICT_TARGET_RATIO)
+        target_size = int(settings.EMBEDDING_CACHE_MAX_BYTES * EVICT_TARGET_RATIO)
+        expired_ids: List[int] = []
+        query = self.db.query(EmbeddingCache.id, EmbeddingCache.size).order_by(
+            EmbeddingCache.accessed_at, EmbeddingCache.id
+        )
+        for entry_id, size in query.yield_per(QUERY_BATCH_SIZE):
+            if count <= target_count and total_size <= target_size:
+                break
+            expired_ids.append(entry_id)
+            count -= 1
+            total_size -= size or 0
+        for batch in _batched(expired_ids, QUERY_BATCH_SIZE):
+            self.db.query(EmbeddingCache).filter(EmbeddingCache.id.in_(batch)).delete(synchronize_session=False)
+        self.db.commit()
+        logger.debug(f"淘汰嵌入缓存: count={len(expired_ids)}")
+        return len(expired_ids)
@@ -1,20 +1,235 @@
-from typing import List, Dict, Any
-from dataclasses import dataclass
+import os
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.schemas.common_config import ConfigParams
+from app.schemas.config import ConnectionConfig
+from app.schemas.chunk import LangChainChunk
 from app.schemas.embedding import EmbeddingMetaData, LangChainEmbedding
-import numpy as np
+from app.services.embeddinger.base import EmbeddingEngine
+from app.services.embeddinger.hashing import HashingEngine
+from app.services.embedding_cache import EmbeddingCacheService, normalize_text, text_hash
+from app.services.query_cache import query_embedding_cache
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 旧版本配置的默认值（误用了分块工具名），按特征哈希处理
+_LEGACY_TOOLS = {"langchain_recursive": "hashing"}
+
+# 加载模型开销较大，相同参数的引擎在进程内复用
+_engines: Dict[Tuple, EmbeddingEngine] = {}
+# 每个引擎位置当前使用的引擎参数，连接参数变化（如更换密钥）时关闭旧引擎
+_engine_keys: Dict[Tuple, Tuple] = {}
+# 远程服务的连接参数，来自全局的模型和连接配置
+_CONNECTION_OPTIONS = ("api_key", "timeout", "retry_count")
+_engines_lock = threading.Lock()
+
+
+def resolve_model_path(model_name: str) -> str:
+    """模型名为相对路径时，在模型目录下查找"""
+    if not model_name:
+        raise ValueError("未配置嵌入模型")
+    if os.path.isabs(model_name):
+        return model_name
+    return os.path.join(settings.EMBEDDING_MODEL_DIR, model_name)
+
+
+def load_remote_options(tool: str, config: ConfigParams, db: Optional[Session] = None) -> Dict[str, Any]:
+    """远程嵌入服务的连接参数
+
+    地址和密钥取自模型配置（OpenAI 缺省时使用环境变量），超时和重试次数取自连接配置。
+    """
+    from app.services.embeddinger.remote import REMOTE_PROVIDERS
+    from app.services.config import ConfigService
+    if db is not None:
+        service = ConfigService(db)
+        provider_config = getattr(service.get_model_config(), tool, None) or {}
+        connection = service.get_connection_config()
+    else:
+        provider_config, connection = {}, ConnectionConfig()
+    defaults = REMOTE_PROVIDERS.get(tool, {})
+    if tool == "openai":
+        defaults = {**defaults, "base_url": settings.OPENAI_API_BASE or defaults["base_url"]}
+    return {
+        "base_url": provider_config.get("base_url") or defaults.get("base_url", ""),
+        "api_key": provider_config.get("api_key") or (settings.OPENAI_API_KEY if tool == "openai" else "") or "",
+        "model": config.get("api_model") or defaults.get("model", ""),
+        "timeout": connection.timeout,
+        "retry_count": connection.retry_count,
+        "max_concurrency": int(config.get("max_concurrency", 4)),
+        "requests_per_minute": int(config.get("requests_per_minute", 3000)),
+        "tokens_per_minute": int(config.get("tokens_per_minute", 1000000)),
+    }
+
+
+def _create_engine(tool: str, config: ConfigParams, remote_options: Dict[str, Any]) -> EmbeddingEngine:
+    options = {
+        "batch_size": int(config.get("batch_size", 32)),
+        "max_batch_tokens": int(config.get("max_batch_tokens", 16384)),
+        "normalize": bool(config.get("normalize", True)),
+    }
+    if tool == "hashing":
+        return HashingEngine(dimension=int(config.get("dimension", 1024)), **options)
+    if tool in ("openai", "cohere"):
+        from app.services.embeddinger.remote import RemoteEngine
+        return RemoteEngine(tool, **remote_options, **options)
+
+    model_options = {
+        "num_threads": int(config.get("num_threads", 0) or 0),
+        "max_seq_length": int(config.get("max_seq_length", 512)),
+    }
+    model_path = resolve_model_path(config.get("model_name"))
+    if tool == "onnx":
+        from app.services.embeddinger.onnx_engine import OnnxEngine
+        return OnnxEngine(model_path, **model_options, **options)
+    if tool in ("sentence_transformers", "huggingface"):
+        from app.services.embeddinger.sentence_transformer import SentenceTransformerEngine
+        return SentenceTransformerEngine(model_path, **model_options, **options)
+    raise ValueError(f"不支持的嵌入工具: {tool}")
+
+
+def get_engine(config: ConfigParams, db: Optional[Session] = None) -> EmbeddingEngine:
+    """根据嵌入配置获取（或创建）嵌入引擎
+
+    Args:
+        config: 嵌入配置
+        db: 数据库会话，远程嵌入服务从中读取连接配置
+
+    Raises:
+        ValueError: 嵌入工具不支持或模型无法加载时抛出
+    """
+    tool = config.get("embedding_tool", "hashing")
+    tool = _LEGACY_TOOLS.get(tool, tool)
+    remote_options = load_remote_options(tool, config, db) if tool in ("openai", "cohere") else {}
+    # 同一工具、模型和调优参数的引擎占一个位置，连接参数变化时替换该位置上的旧引擎
+    slot = (tool,) + tuple(
+        config.get(name) for name in (
+            "model_name", "dimension", "batch_size", "max_batch_tokens",
+            "max_seq_length", "num_threads", "normalize",
+        )
+    ) + tuple(sorted((name, value) for name, value in remote_options.items() if name not in _CONNECTION_OPTIONS))
+    key = slot + tuple(sorted((name, value) for name, value in remote_options.items() if name in _CONNECTION_OPTIONS))
+    replaced = None
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = _create_engine(tool, config, remote_options)
+            previous = _engine_keys.get(slot)
+            if previous is not None and previous != key:
+                replaced = _engines.pop(previous, None)
+            _engine_keys[slot] = key
+    if replaced is not None:
+        # 旧引擎可能仍有进行中的请求，在后台等它们完成后关闭
+        logger.info(f"嵌入服务的连接参数已变化，关闭旧引擎: {replaced.model_id}")
+        threading.Thread(target=replaced.close, name="embedding-close", daemon=True).start()
+    return engine
+
+
+def close_engines() -> None:
+    """关闭并清空进程内复用的全部嵌入引擎，应用退出时调用"""
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+        _engine_keys.clear()
+    for engine in engines:
+        try:
+            engine.close()
+        except Exception as e:
+            logger.warning(f"关闭嵌入引擎失败: {str(e)}")
 
-from app.schemas.chunk import LangChainChunk
 
 class Embeddinger:
-    def __init__(self, config: ConfigParams):
+    def __init__(self, config: ConfigParams, db: Optional[Session] = None):
+        """
+        Args:
+            config: 嵌入配置
+            db: 数据库会话，用于嵌入缓存和读取远程服务的连接配置；为空时不使用缓存
+        """
         self.config = config
+        self.engine = get_engine(config, db)
+        self.cache = EmbeddingCacheService(db) if db is not None and config.get("use_cache", True) else None
 
-    def embedding(self, chunks: List[LangChainChunk]) -> List[LangChainEmbedding]:
-        # 此处使用 numpy 随机生成向量
-        embd = np.random.rand(1024).tolist()  # 假设嵌入维度为768
-        return [LangChainEmbedding(embedding=embd,
-                                   metadata=EmbeddingMetaData(source="LangChainEmbe",
+    @property
+    def model_id(self) -> str:
+        return self.engine.model_id
+
+    @property
+    def dimension(self) -> int:
+        return self.engine.dimension
+
+    def embed(self, chunks: List[LangChainChunk]) -> np.ndarray:
+        """嵌入一组分块
+
+        Returns:
+            np.ndarray: 形状为 (len(chunks), dimension) 的 float32 矩阵，行顺序与分块一致
+        """
+        return self.embed_texts([chunk.page_content for chunk in chunks])
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """嵌入一组文本"""
+        if self.cache is None or not texts:
+            return self.engine.embed(texts)
+        return self._embed_cached(texts, self.engine.cache_id, self.engine.embed)
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """嵌入检索的查询：先查进程内的查询向量缓存，未命中的查询再由引擎按查询嵌入
+
+        调参时相同的几个查询会反复检索，命中时不访问数据库和嵌入模型。
+        """
+        if not queries or not self.config.get("use_cache", True):
+            return self._embed_query_texts(queries)
+        cache_id = self.engine.query_cache_id
+        keys = [(cache_id, normalize_text(query)) for query in queries]
+        vectors = [query_embedding_cache.get(key) for key in keys]
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            for index, vector in zip(missing, self._embed_query_texts([queries[index] for index in missing])):
+                vectors[index] = vector.copy()
+                query_embedding_cache.set(keys[index], vectors[index])
+        return np.stack(vectors)
+
+    def _embed_query_texts(self, queries: List[str]) -> np.ndarray:
+        """使用引擎的查询嵌入（如 Cohere 的 search_query），与文档向量分开缓存"""
+        if self.cache is None or not queries:
+            return self.engine.embed_queries(queries)
+        return self._embed_cached(queries, self.engine.query_cache_id, self.engine.embed_queries)
+
+    def _embed_cached(self, texts: List[str], cache_id: str, embed: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """先批量查缓存，只嵌入未命中的文本（批内重复的文本只嵌入一次）"""
+        hashes = [text_hash(text) for text in texts]
+        unique: Dict[str, str] = dict(zip(hashes, texts))
+        try:
+            found = self.cache.get_many(cache_id, list(unique))
+        except SQLAlchemyError as e:
+            # 缓存不可用时不影响嵌入
+            logger.warning(f"读取嵌入缓存失败: {str(e)}")
+            self.cache.db.rollback()
+            found = {}
+
+        missing = [hash_value for hash_value in unique if hash_value not in found]
+        if missing:
+            vectors = embed([unique[hash_value] for hash_value in missing])
+            found.update(zip(missing, vectors))
+            try:
+                self.cache.set_many(cache_id, zip(missing, vectors))
+            except SQLAlchemyError as e:
+                logger.warning(f"写入嵌入缓存失败: {str(e)}")
+                self.cache.db.rollback()
+        logger.debug(f"嵌入缓存: total={len(texts)}, unique={len(unique)}, miss={len(missing)}")
+        return np.stack([found[hash_value] for hash_value in hashes]).astype(np.float32, copy=False)
+
+    def to_embeddings(self, chunks: List[LangChainChunk], vectors: np.ndarray) -> List[LangChainEmbedding]:
+        """将向量矩阵转换为接口返回的嵌入结果"""
+        return [LangChainEmbedding(embedding=vector.tolist(),
+                                   metadata=EmbeddingMetaData(source=self.model_id,
                                                               page=chunk.metadata.page,
-                                                              embedding_id=chunk.metadata.page)) for chunk in chunks]
\ No newline at end of file
+                                                              embedding_id=chunk.metadata.chunk_id))
+                for chunk, vector in zip(chunks, vectors)]
+
+    def embedding(self, chunks: List[LangChainChunk]) -> List[LangChainEmbedding]:
+        return self.to_embeddings(chunks, self.embed(chunks))
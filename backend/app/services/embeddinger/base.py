@@ -0,0 +1,121 @@
+import re
+from typing import Iterator, List, Optional, Sequence
+import numpy as np
+
+# 估算 token 数：中日韩字符按一个 token 计，其余字符约 4 个算一个 token
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数"""
+    cjk = len(_CJK_PATTERN.findall(text))
+    return max(1, cjk + (len(text) - cjk + 3) // 4)
+
+
+def iter_token_batches(
+    lengths: Sequence[int],
+    batch_size: int,
+    max_batch_tokens: int,
+) -> Iterator[List[int]]:
+    """按 token 预算分批
+
+    先按长度从长到短排序，使同一批内的文本长度接近、补齐（padding）浪费最少；
+    每批的条数不超过 batch_size，且 条数 × 批内最大长度 不超过 max_batch_tokens。
+    单条文本超过预算时单独成批。
+
+    Args:
+        lengths: 每条文本的 token 数
+        batch_size: 每批最多条数
+        max_batch_tokens: 每批（补齐后）最多 token 数
+
+    Yields:
+        List[int]: 一批文本在原列表中的下标
+    """
+    order = sorted(range(len(lengths)), key=lambda index: lengths[index], reverse=True)
+    batch: List[int] = []
+    batch_max = 0
+    for index in order:
+        # 按降序排列，批内最大长度就是第一条的长度
+        longest = batch_max or lengths[index]
+        if batch and (len(batch) >= batch_size or (len(batch) + 1) * longest > max_batch_tokens):
+            yield batch
+            batch = []
+            longest = lengths[index]
+        batch.append(index)
+        batch_max = longest
+    if batch:
+        yield batch
+
+
+class EmbeddingEngine:
+    """嵌入引擎基类
+
+    子类实现 _embed_batch（一批文本 → 向量矩阵），由 embed 负责按 token 预算分批，
+    并把各批结果按原顺序拼成一个 float32 矩阵。
+    """
+    def __init__(self, batch_size: int = 32, max_batch_tokens: int = 16384, normalize: bool = True):
+        self.batch_size = max(1, batch_size)
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.normalize = normalize
+        self._dimension: Optional[int] = None
+
+    @property
+    def model_id(self) -> str:
+        """模型标识，相同标识的引擎对相同文本产生相同的向量"""
+        raise NotImplementedError
+
+    @property
+    def cache_id(self) -> str:
+        """缓存标识，在模型标识基础上加入影响输出的参数"""
+        return f"{self.model_id}:norm={int(self.normalize)}"
+
+    @property
+    def query_cache_id(self) -> str:
+        """查询向量的缓存标识；区分查询和文档的模型需要与文档向量分开缓存"""
+        return self.cache_id
+
+    @property
+    def dimension(self) -> int:
+        """向量维度"""
+        if self._dimension is None:
+            self._dimension = self._embed_batch(["dimension"]).shape[1]
+        return self._dimension
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """计算每条文本的 token 数，用于分批"""
+        return [estimate_tokens(text) for text in texts]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """嵌入一组文本
+
+        Returns:
+            np.ndarray: 形状为 (len(texts), dimension) 的 float32 矩阵，行顺序与输入一致
+        """
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        result: Optional[np.ndarray] = None
+        lengths = self.count_tokens(texts)
+        for batch in iter_token_batches(lengths, self.batch_size, self.max_batch_tokens):
+            vectors = self._embed_batch([texts[index] for index in batch])
+            if result is None:
+                result = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+                self._dimension = vectors.shape[1]
+            result[batch] = vectors
+        return self._normalize(result)
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """嵌入一组检索查询，默认与文档相同；区分查询和文档的模型（如 Cohere）在子类中覆盖"""
+        return self.embed(texts)
+
+    def close(self) -> None:
+        """释放引擎持有的资源（如连接池、后台线程），默认无需释放"""
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        """按配置将向量原地归一化为单位长度"""
+        if self.normalize:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
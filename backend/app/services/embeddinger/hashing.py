@@ -0,0 +1,35 @@
+import re
+import zlib
+from typing import List
+import numpy as np
+from app.services.embeddinger.base import EmbeddingEngine
+
+# 英文按单词、中日韩文字按单字切分
+_TOKEN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]|[^\W_]+")
+
+
+class HashingEngine(EmbeddingEngine):
+    """特征哈希嵌入
+
+    把单词（单字）和相邻二元组哈希到固定维度，不需要模型文件，结果确定且可复现，
+    适合离线调试整条流水线；只反映词面相似度，不具备语义能力。
+    """
+    def __init__(self, dimension: int = 1024, **kwargs):
+        super().__init__(**kwargs)
+        self._dimension = dimension
+
+    @property
+    def model_id(self) -> str:
+        return f"hashing-{self._dimension}"
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_PATTERN.findall(text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.array([zlib.crc32(feature.encode()) for feature in features], dtype=np.uint32)
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self._dimension, signs)
+        return vectors
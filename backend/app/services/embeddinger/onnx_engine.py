@@ -0,0 +1,79 @@
+import os
+from typing import List
+import numpy as np
+from app.services.embeddinger.base import EmbeddingEngine
+
+# 模型目录中 ONNX 模型文件的常见位置（optimum / sentence-transformers 导出格式）
+ONNX_MODEL_FILES = ("model.onnx", os.path.join("onnx", "model.onnx"))
+
+
+class OnnxEngine(EmbeddingEngine):
+    """基于 ONNX Runtime 的本地嵌入模型（CPU）
+
+    模型目录需包含 ONNX 模型（model.onnx 或 onnx/model.onnx）和 tokenizer.json，
+    输出 token 级向量时按 attention_mask 做平均池化。
+    """
+    def __init__(self, model_path: str, num_threads: int = 0, max_seq_length: int = 512, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ValueError("使用 ONNX 嵌入模型需要安装 onnxruntime 和 tokenizers")
+
+        model_file = next(
+            (os.path.join(model_path, name) for name in ONNX_MODEL_FILES
+             if os.path.exists(os.path.join(model_path, name))),
+            None,
+        )
+        tokenizer_file = os.path.join(model_path, "tokenizer.json")
+        if not model_file or not os.path.exists(tokenizer_file):
+            raise ValueError(f"模型目录缺少 ONNX 模型或 tokenizer.json: {model_path}")
+
+        self.model_path = model_path
+        self.model_file = model_file
+        self.max_seq_length = max_seq_length
+        self.tokenizer = Tokenizer.from_file(tokenizer_file)
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        # 引擎会被多个线程共用，不修改 tokenizer 的补齐设置，在 _embed_batch 中手动补齐
+        self.tokenizer.no_padding()
+        self.pad_id = self.tokenizer.token_to_id("[PAD]") or self.tokenizer.token_to_id("<pad>") or 0
+
+        options = ort.SessionOptions()
+        # 0 表示由 ONNX Runtime 按 CPU 核数决定
+        options.intra_op_num_threads = max(0, num_threads)
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    @property
+    def model_id(self) -> str:
+        return f"onnx:{os.path.basename(os.path.normpath(self.model_path))}"
+
+    @property
+    def cache_id(self) -> str:
+        # 模型文件被替换后缓存随之失效
+        return f"{super().cache_id}:seq={self.max_seq_length}:mtime={int(os.path.getmtime(self.model_file))}"
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        return [len(encoding.ids) for encoding in self.tokenizer.encode_batch(texts)]
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        # 批内按最长文本补齐
+        length = max(1, max(len(encoding.ids) for encoding in encodings))
+        input_ids = np.full((len(encodings), length), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        output = self.session.run(None, {name: value for name, value in feeds.items() if name in self.input_names})[0]
+        if output.ndim == 2:
+            return output.astype(np.float32, copy=False)
+        # 平均池化，忽略补齐的位置
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (output * mask).sum(axis=1)
+        return (summed / np.clip(mask.sum(axis=1), 1e-9, None)).astype(np.float32)
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import httpx
+import numpy as np
+from app.services.embeddinger.base import EmbeddingEngine, iter_token_batches
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 各服务商的默认地址和模型
+REMOTE_PROVIDERS: Dict[str, Dict[str, str]] = {
+    "openai": {"base_url": "https://api.openai.com/v1", "model": "text-embedding-3-small"},
+    "cohere": {"base_url": "https://api.cohere.com", "model": "embed-multilingual-v3.0"},
+}
+
+# 需要重试的状态码：限流和服务端错误
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# Cohere 区分文档和查询的向量，入库和检索分别使用
+COHERE_DOCUMENT_INPUT = "search_document"
+COHERE_QUERY_INPUT = "search_query"
+# 重试等待的上限（秒）
+MAX_BACKOFF = 60.0
+# 限流后批大小减半，之后每成功一次加一，恢复到配置的批大小
+BATCH_RECOVER_STEP = 1
+
+
+class RemoteEmbeddingError(Exception):
+    """远程嵌入服务请求失败（重试耗尽或返回了不可重试的错误）"""
+
+
+class TokenBucket:
+    """令牌桶限流
+
+    令牌按 rate（每秒）匀速补充，最多积累 capacity 个；取不到足够令牌时等待。
+    只在引擎的事件循环中使用。
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # 单次请求超过桶容量时按容量计，避免永远等不到
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class RemoteEngine(EmbeddingEngine):
+    """远程嵌入服务（OpenAI / Cohere 兼容接口）
+
+    引擎持有一个后台事件循环和连接池化的 httpx.AsyncClient，
+    各调用线程提交的批次在同一个循环中并发请求，共享并发上限和令牌桶：
+
+    - 请求数和 token 数各有一个令牌桶，对应服务商的 RPM / TPM 限额
+    - 限流、超时和服务端错误按指数退避加随机抖动重试，优先使用 Retry-After
+    - 收到 429 时批大小减半（当前批次拆分后重试），之后逐步恢复
+    """
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        base_url: str,
+        api_key: str = "",
+        timeout: float = 30,
+        retry_count: int = 3,
+        max_concurrency: int = 4,
+        requests_per_minute: int = 3000,
+        tokens_per_minute: int = 1000000,
+        retry_backoff: float = 0.5,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        if provider not in REMOTE_PROVIDERS:
+            raise ValueError(f"不支持的远程嵌入服务: {provider}")
+        self.provider = provider
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.retry_count = max(0, retry_count)
+        self.max_concurrency = max(1, max_concurrency)
+        self.retry_backoff = retry_backoff
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # 当前批大小，收到 429 时下调
+        self.batch_limit = self.batch_size
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name=f"embedding-{provider}", daemon=True)
+        self._thread.start()
+        # 限流状态在事件循环中创建
+        self._run(self._setup())
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    @property
+    def query_cache_id(self) -> str:
+        return f"{self.cache_id}:query" if self.provider == "cohere" else self.cache_id
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _setup(self) -> None:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._request_bucket = TokenBucket(self.requests_per_minute / 60, max(1, self.requests_per_minute / 60))
+        self._token_bucket = TokenBucket(self.tokens_per_minute / 60, max(self.max_batch_tokens, self.tokens_per_minute / 60))
+
+    def close(self) -> None:
+        """等待进行中的请求完成后关闭连接池并停止事件循环，可重复调用"""
+        if self._loop.is_closed():
+            return
+        if self._client is not None:
+            self._run(self._shutdown())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _shutdown(self) -> None:
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._client.aclose()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self._embed_texts(texts, COHERE_DOCUMENT_INPUT)
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        return self._embed_texts(texts, COHERE_QUERY_INPUT)
+
+    def _embed_texts(self, texts: List[str], input_type: str) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return self._normalize(self._run(self._embed_all(texts, input_type)))
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        return self._run(self._embed_all(texts, COHERE_DOCUMENT_INPUT))
+
+    async def _embed_all(self, texts: List[str], input_type: str) -> np.ndarray:
+        """所有批次并发请求，结果按原顺序写回"""
+        lengths = self.count_tokens(texts)
+        vectors: Dict[int, np.ndarray] = {}
+        batches = iter_token_batches(lengths, self.batch_limit, self.max_batch_tokens)
+        await asyncio.gather(*(self._embed_indexes(texts, lengths, batch, vectors, input_type, 0)
+                               for batch in batches))
+        result = np.stack([vectors[index] for index in range(len(texts))]).astype(np.float32, copy=False)
+        self._dimension = result.shape[1]
+        return result
+
+    async def _embed_indexes(
+        self,
+        texts: List[str],
+        lengths: List[int],
+        batch: List[int],
+        vectors: Dict[int, np.ndarray],
+        input_type: str,
+        attempt: int
+    ) -> None:
+        while True:
+            async with self._semaphore:
+                await self._request_bucket.acquire()
+                await self._token_bucket.acquire(sum(lengths[index] for index in batch))
+                try:
+                    response = await self._client.post(self._path(), json=self._payload([texts[index] for index in batch], input_type))
+                except httpx.TransportError as e:
+                    response, error = None, f"{type(e).__name__}: {e}"
+                else:
+                    error = f"HTTP {response.status_code}: {response.text[:200]}"
+
+            if response is not None and response.status_code < 300:
+                for index, vector in zip(batch, self._parse(response.json(), len(batch))):
+                    vectors[index] = vector
+                self.batch_limit = min(self.batch_size, self.batch_limit + BATCH_RECOVER_STEP)
+                return
+            if response is not None and response.status_code not in RETRY_STATUS:
+                raise RemoteEmbeddingError(f"嵌入请求失败: {error}")
+            if attempt >= self.retry_count:
+                raise RemoteEmbeddingError(f"嵌入请求重试 {self.retry_count} 次后仍失败: {error}")
+
+            attempt += 1
+            await asyncio.sleep(self._backoff(attempt, response))
+            if response is not None and response.status_code == 429:
+                self.batch_limit = max(1, min(self.batch_limit, len(batch)) // 2)
+                if len(batch) > self.batch_limit:
+                    logger.info(f"嵌入请求被限流，批大小降为 {self.batch_limit}")
+                    # 拆成更小的批次并发重试
+                    await asyncio.gather(*(
+                        self._embed_indexes(texts, lengths, batch[start:start + self.batch_limit], vectors, input_type,
+                                            attempt)
+                        for start in range(0, len(batch), self.batch_limit)
+                    ))
+                    return
+            logger.debug(f"嵌入请求重试: attempt={attempt}, error={error}")
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """优先使用 Retry-After，否则指数退避加全抖动"""
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            try:
+                if retry_after is not None:
+                    return min(MAX_BACKOFF, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(MAX_BACKOFF, self.retry_backoff * 2 ** attempt))
+
+    def _path(self) -> str:
+        return "/embeddings" if self.provider == "openai" else "/v2/embed"
+
+    def _payload(self, texts: List[str], input_type: str = COHERE_DOCUMENT_INPUT) -> Dict[str, Any]:
+        if self.provider == "openai":
+            return {"model": self.model, "input": texts, "encoding_format": "float"}
+        return {"model": self.model, "texts": texts, "input_type": input_type, "embedding_types": ["float"]}
+
+    def _parse(self, data: Dict[str, Any], count: int) -> List[np.ndarray]:
+        if self.provider == "openai":
+            items = sorted(data["data"], key=lambda item: item["index"])
+            embeddings = [item["embedding"] for item in items]
+        else:
+            embeddings = data["embeddings"]
+            if isinstance(embeddings, dict):
+                embeddings = embeddings["float"]
+        if len(embeddings) != count:
+            raise RemoteEmbeddingError(f"嵌入服务返回 {len(embeddings)} 个向量，期望 {count} 个")
+        return [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
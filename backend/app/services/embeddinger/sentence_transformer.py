@@ -0,0 +1,45 @@
+from typing import List
+import numpy as np
+from app.services.embeddinger.base import EmbeddingEngine
+
+
+class SentenceTransformerEngine(EmbeddingEngine):
+    """基于 sentence-transformers 的本地嵌入模型（CPU）
+
+    sentence-transformers 和 torch 为可选依赖，未安装时抛出 ValueError。
+    """
+    def __init__(self, model_path: str, num_threads: int = 0, max_seq_length: int = 512, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            import torch
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError("使用 Sentence Transformers 嵌入模型需要安装 sentence-transformers")
+
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+        self.model_path = model_path
+        self.max_seq_length = max_seq_length
+        self.model = SentenceTransformer(model_path, device="cpu")
+        self.model.max_seq_length = max_seq_length
+
+    @property
+    def model_id(self) -> str:
+        return f"sentence_transformers:{self.model_path}"
+
+    @property
+    def cache_id(self) -> str:
+        return f"{super().cache_id}:seq={self.max_seq_length}"
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        return [len(ids) for ids in self.model.tokenizer(texts, add_special_tokens=True)["input_ids"]]
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        # 归一化由基类统一处理
+        return self.model.encode(
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            normalize_embeddings=False,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
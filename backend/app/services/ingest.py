@@ -0,0 +1,196 @@
+import time
+import logging
+import threading
+import uuid
+from contextlib import nullcontext
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.core.config import settings
+from app.exceptions import APIException
+from app.models.document import Document
+from app.models.store import Store
+from app.schemas.chunk import LangChainChunk
+from app.schemas.common_config import ConfigParams, DocumentStatus
+from app.schemas.configuration.chunk import get_default_config as get_chunk_default_config
+from app.schemas.configuration.document import get_default_config as get_load_default_config
+from app.schemas.configuration.embedding import get_default_config as get_embedding_default_config
+from app.schemas.configuration.store import get_default_config as get_store_default_config
+from app.schemas.ingest import IngestRequest, IngestResult
+from app.schemas.store import LangChainStore
+from app.services.chunk import get_chunker
+from app.services.document import DocumentService
+from app.services.embeddinger.LangChainEmbe import Embeddinger
+from app.services.job import JobCancelled, JobContext
+from app.services.query_cache import invalidate_document_results
+from app.services.store import StoreService
+from app.services.storer.base import ChunkKeyer, SyncStats
+from app.utils.pipeline import batched, iter_in_thread, iter_with_limit
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class StageLimits:
+    """各阶段的并发上限
+
+    在多个文档的入库之间共享：解析（CPU 密集）按页、嵌入按批、存储按批占用名额，
+    因此可以为不同类型的阶段设置不同的并发度。
+    """
+    def __init__(self, parse: int, embedding: int, store: int):
+        self.parse = threading.BoundedSemaphore(max(1, parse))
+        self.embedding = threading.BoundedSemaphore(max(1, embedding))
+        self.store = threading.BoundedSemaphore(max(1, store))
+
+class IngestService:
+    """端到端入库：解析 → 分块 → 嵌入 → 存储
+
+    各阶段以流水线方式并行执行：页面解析出来就分块，分块按批嵌入，
+    嵌入结果到达后立即写入向量库。阶段之间通过有界队列衔接，
+    中间结果不写入数据库，只在结束时保存文档的最终状态。
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ingest(
+        self,
+        document_id: int,
+        request: IngestRequest,
+        context: Optional[JobContext] = None,
+        limits: Optional[StageLimits] = None
+    ) -> IngestResult:
+        """执行端到端入库
+
+        Args:
+            document_id: 文档ID
+            request: 各阶段配置
+            context: 后台任务上下文，用于上报进度和响应取消
+            limits: 与其他入库共享的各阶段并发上限，为空时不限制
+
+        Returns:
+            IngestResult: 入库统计
+
+        Raises:
+            HTTPException: 当文档不存在、配置无效或处理失败时抛出
+        """
+        document = self.db.query(Document).filter(Document.id == document_id).first()
+        if not document:
+            raise HTTPException(status_code=404, detail="文档不存在")
+
+        try:
+            load_config = request.load_config or get_load_default_config(document.file_type)
+            chunk_config = request.chunk_config or get_chunk_default_config()
+            embedding_config = request.embedding_config or get_embedding_default_config()
+            store_config = request.store_config or get_store_default_config()
+            chunker = get_chunker(chunk_config)
+            embeddinger = Embeddinger(embedding_config, self.db)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        result = IngestResult(document_id=document_id)
+        start = time.perf_counter()
+        batch_size = settings.INGEST_EMBEDDING_BATCH_SIZE
+
+        def iter_chunks() -> Iterator[LangChainChunk]:
+            # 解析和分块（CPU 密集），逐页进行
+            pages = DocumentService(self.db).iter_parse_document(document, load_config, persist=False)
+            if limits:
+                pages = iter_with_limit(pages, limits.parse)
+            chunk_id = 0
+            for page in pages:
+                result.pages += 1
+                for chunk in chunker.chunk(page):
+                    # 分块在文档内按顺序编号
+                    chunk.metadata.chunk_id = chunk_id
+                    chunk_id += 1
+                    yield chunk
+
+        def iter_embeddings() -> Iterator[Tuple[List[LangChainChunk], np.ndarray]]:
+            # 分块按批嵌入；解析线程在使用 self.db，嵌入缓存使用独立的会话
+            chunks = iter_in_thread(iter_chunks(), maxsize=batch_size * settings.INGEST_QUEUE_SIZE, name="ingest-parse")
+            with Session(bind=self.db.get_bind()) as cache_db:
+                cached_embeddinger = Embeddinger(embedding_config, cache_db)
+                for batch in batched(chunks, batch_size):
+                    with limits.embedding if limits else nullcontext():
+                        embedding = cached_embeddinger.embed(batch)
+                    yield batch, embedding
+                if cached_embeddinger.cache:
+                    cached_embeddinger.cache.evict()
+
+        sync = SyncStats()
+        try:
+            storer, existing = StoreService(self.db).prepare_storer(
+                document, store_config, embeddinger.dimension, embedding_config.default_config)
+            embeddings = iter_in_thread(iter_embeddings(), maxsize=settings.INGEST_QUEUE_SIZE, name="ingest-embed")
+
+            def report(written: int) -> None:
+                result.chunks = written
+                if context:
+                    context.report(message=f"已解析 {result.pages} 页，已写入 {result.chunks} 个分块")
+
+            stored = storer.write_stream(
+                (pair for chunks, embedding in embeddings for pair in zip(chunks, embedding)),
+                ChunkKeyer(document.id),
+                existing,
+                sync,
+                progress=report,
+                limit=limits.store if limits else None
+            )
+            if existing:
+                # 删除本次不再出现的分块
+                sync.deleted = storer.delete(set(existing) - {item.metadata.store_id for item in stored})
+            index = storer.optimize()
+        except (HTTPException, APIException, JobCancelled):
+            raise
+        except Exception as e:
+            logger.error(f"入库失败: document_id={document_id}, error={str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"入库失败: {str(e)}")
+        result.elapsed = time.perf_counter() - start
+
+        self._save_status(document, store_config, result, stored, {
+            "collection": storer.collection_name,
+            "embedding": embedding_config.default_config,
+            "sync": asdict(sync),
+            "index": index.to_dict(),
+            "quantization": storer.quantization_report(),
+            "version": uuid.uuid4().hex,
+        })
+        invalidate_document_results(document_id)
+        logger.info(
+            f"入库完成: document_id={document_id}, pages={result.pages}, "
+            f"chunks={result.chunks}, elapsed={result.elapsed:.2f}s, {sync}"
+        )
+        return result
+
+    def _save_status(
+        self,
+        document: Document,
+        store_config: ConfigParams,
+        result: IngestResult,
+        stored: List[LangChainStore],
+        storage: Dict[str, Any]
+    ) -> None:
+        """只保存最终状态、存储配置（检索时依赖）和存储结果，不保存中间阶段的结果"""
+        store = None
+        if document.store_id:
+            store = self.db.query(Store).filter(Store.id == document.store_id).first()
+        if not store:
+            store = Store(document_id=document.id)
+            self.db.add(store)
+        store.config = store_config.model_dump()
+        StoreService(self.db).save_items(document.id, stored)
+        store.meta_data = {
+            "document": {"id": document.id, "filename": document.filename},
+            "ingest": result.model_dump(),
+            **storage,
+        }
+        self.db.commit()
+        self.db.refresh(store)
+
+        document.store_id = store.id
+        document.status = DocumentStatus.STORED
+        document.processed_at = func.now()
+        self.db.commit()
+        self.db.refresh(document)
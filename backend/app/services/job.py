@@ -0,0 +1,351 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import func
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.exceptions import APIException
+from app.models.job import Job
+from app.schemas.common_config import ConfigParams
+from app.schemas.job import JobStatus, JobType
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 已结束的任务状态
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+
+class JobCancelled(Exception):
+    """任务已被取消"""
+
+
+class JobContext:
+    """任务执行上下文
+
+    任务处理函数通过 report 上报进度，同时在每次上报时检查是否已被取消，
+    被取消时抛出 JobCancelled。进度写入使用独立的数据库会话并做了节流。
+    """
+    REPORT_INTERVAL = 0.5
+
+    def __init__(self, job_id: int, session_factory: sessionmaker = SessionLocal):
+        self.job_id = job_id
+        self.session_factory = session_factory
+        self._last_report = 0.0
+
+    def report(self, progress: Optional[float] = None, message: Optional[str] = None, force: bool = False) -> None:
+        """上报进度
+
+        Args:
+            progress: 任务进度（0-1），为空时不更新
+            message: 进度信息，为空时不更新
+            force: 是否忽略节流立即写入
+
+        Raises:
+            JobCancelled: 任务已被请求取消
+        """
+        now = time.monotonic()
+        if not force and now - self._last_report < self.REPORT_INTERVAL:
+            return
+        self._last_report = now
+
+        db = self.session_factory()
+        try:
+            job = db.query(Job).filter(Job.id == self.job_id).first()
+            if not job:
+                raise JobCancelled()
+            if progress is not None:
+                job.progress = progress
+            if message is not None:
+                job.message = message
+            cancel_requested = job.cancel_requested
+            db.commit()
+        finally:
+            db.close()
+        if cancel_requested:
+            raise JobCancelled()
+
+    def check_cancelled(self) -> None:
+        """立即检查任务是否已被取消"""
+        self.report(force=True)
+
+
+# 任务处理函数: (db, document_id, 任务配置, context) -> 结果摘要
+JobHandler = Callable[[Session, Optional[int], Dict[str, Any], JobContext], Optional[Dict[str, Any]]]
+
+
+def _run_parse(db: Session, document_id: int, config: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from app.services.document import DocumentService
+    service = DocumentService(db)
+    document = service.get_document(document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="文档不存在")
+    pages = 0
+    for _ in service.iter_parse_document(document, ConfigParams.model_validate(config)):
+        pages += 1
+        context.report(message=f"已解析 {pages} 页")
+    return {"pages": pages}
+
+
+def _batch_progress(context: JobContext, message: str) -> Callable[[int], None]:
+    """分批处理的进度回调：每批完成后立即上报进度，同时检查任务是否已被取消"""
+    return lambda done: context.report(message=message.format(done), force=True)
+
+
+def _run_chunk(db: Session, document_id: int, config: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from app.services.chunk import ChunkService
+    # 与解析任务一样逐页上报，按节流间隔写入进度和检查取消
+    results = ChunkService(db).parse_chunk(document_id, ConfigParams.model_validate(config),
+                                           progress=lambda pages: context.report(message=f"已分块 {pages} 页"))
+    return {"chunks": len(results)}
+
+
+def _run_embedding(db: Session, document_id: int, config: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from app.services.embedding import EmbeddingService
+    results = EmbeddingService(db).parse_embedding(document_id, ConfigParams.model_validate(config),
+                                                   progress=_batch_progress(context, "已嵌入 {} 个分块"))
+    return {"embeddings": len(results)}
+
+
+def _run_store(db: Session, document_id: int, config: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from app.services.store import StoreService
+    results = StoreService(db).do_parse(document_id, ConfigParams.model_validate(config),
+                                        progress=_batch_progress(context, "已写入 {} 个分块"))
+    return {"stored": len(results)}
+
+
+def _run_ingest(db: Session, document_id: int, config: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from app.services.ingest import IngestService
+    from app.schemas.ingest import IngestRequest
+    result = IngestService(db).ingest(document_id, IngestRequest.model_validate(config), context)
+    return result.model_dump()
+
+
+def _run_bulk_ingest(db: Session, document_id: Optional[int], config: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    from app.services.bulk_ingest import BulkIngestService, collect_files, resolve_import_paths
+    from app.schemas.ingest import BulkIngestRequest
+    request = BulkIngestRequest.model_validate(config)
+    files = collect_files(resolve_import_paths(request.paths), request.recursive)
+    context.report(message=f"共 {len(files)} 个文件", force=True)
+    return BulkIngestService().run(files, request, context).model_dump()
+
+
+JOB_HANDLERS: Dict[JobType, JobHandler] = {
+    JobType.PARSE: _run_parse,
+    JobType.CHUNK: _run_chunk,
+    JobType.EMBEDDING: _run_embedding,
+    JobType.STORE: _run_store,
+    JobType.INGEST: _run_ingest,
+    JobType.BULK_INGEST: _run_bulk_ingest,
+}
+
+
+class JobRunner:
+    """后台任务执行器
+
+    jobs 表即持久化的任务队列，多个工作线程按提交顺序领取 pending 任务执行。
+    服务重启时，上次未执行完的任务会重新排队。
+    """
+    def __init__(
+        self,
+        workers: int = settings.JOB_WORKERS,
+        poll_interval: float = settings.JOB_POLL_INTERVAL,
+        session_factory: sessionmaker = SessionLocal,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self) -> None:
+        """恢复中断的任务并启动工作线程"""
+        if self._threads:
+            return
+        self._recover()
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"后台任务执行器已启动: workers={self.workers}")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """停止工作线程，最多等待 timeout 秒让执行中的任务结束"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self) -> None:
+        """唤醒空闲的工作线程"""
+        self._wakeup.set()
+
+    def _recover(self) -> None:
+        db = self.session_factory()
+        try:
+            recovered = db.query(Job).filter(Job.status == JobStatus.RUNNING).update(
+                {"status": JobStatus.PENDING, "started_at": None}, synchronize_session=False
+            )
+            db.commit()
+            if recovered:
+                logger.info(f"重新排队中断的任务: count={recovered}")
+        finally:
+            db.close()
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job_id = self._claim_next()
+            except Exception as e:
+                logger.error(f"领取任务失败: {str(e)}", exc_info=True)
+                job_id = None
+            if job_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._execute(job_id)
+
+    def _claim_next(self) -> Optional[int]:
+        """领取最早提交的 pending 任务，通过条件更新保证一个任务只被领取一次"""
+        db = self.session_factory()
+        try:
+            while True:
+                row = db.query(Job.id).filter(Job.status == JobStatus.PENDING).order_by(Job.id).first()
+                if not row:
+                    return None
+                claimed = db.query(Job).filter(Job.id == row.id, Job.status == JobStatus.PENDING).update(
+                    {"status": JobStatus.RUNNING, "started_at": func.now()}, synchronize_session=False
+                )
+                db.commit()
+                if claimed:
+                    return row.id
+        finally:
+            db.close()
+
+    def _execute(self, job_id: int) -> None:
+        db = self.session_factory()
+        context = JobContext(job_id, self.session_factory)
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            handler = JOB_HANDLERS.get(job.job_type)
+            if not handler:
+                raise ValueError(f"不支持的任务类型: {job.job_type}")
+            context.check_cancelled()
+            logger.info(f"开始执行任务: job_id={job_id}, job_type={job.job_type}, document_id={job.document_id}")
+            result = handler(db, job.document_id, job.config or {}, context)
+            self._finish(job_id, JobStatus.SUCCEEDED, result=result)
+        except JobCancelled:
+            db.rollback()
+            logger.info(f"任务已取消: job_id={job_id}")
+            self._finish(job_id, JobStatus.CANCELLED)
+        except HTTPException as e:
+            db.rollback()
+            logger.warning(f"任务失败: job_id={job_id}, detail={e.detail}")
+            self._finish(job_id, JobStatus.FAILED, error=str(e.detail))
+        except APIException as e:
+            db.rollback()
+            logger.warning(f"任务失败: job_id={job_id}, message={e.message}")
+            self._finish(job_id, JobStatus.FAILED, error=e.message)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"任务失败: job_id={job_id}, error={str(e)}", exc_info=True)
+            self._finish(job_id, JobStatus.FAILED, error=str(e))
+        finally:
+            db.close()
+
+    def _finish(
+        self,
+        job_id: int,
+        status: JobStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        db = self.session_factory()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            job.status = status
+            job.result = result
+            job.error = error
+            if status == JobStatus.SUCCEEDED:
+                job.progress = 1.0
+                job.message = "已完成"
+            job.finished_at = func.now()
+            db.commit()
+        finally:
+            db.close()
+
+
+# 全局任务执行器，在应用启动时启动
+job_runner = JobRunner()
+
+
+class JobService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def submit(self, job_type: JobType, document_id: Optional[int], config: Optional[BaseModel] = None) -> Job:
+        """提交后台任务
+
+        Args:
+            job_type: 任务类型
+            document_id: 关联的文档ID
+            config: 任务配置，序列化后随任务持久化
+        """
+        job = Job(
+            job_type=job_type,
+            document_id=document_id,
+            status=JobStatus.PENDING,
+            config=config.model_dump() if config else None,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        job_runner.notify()
+        logger.info(f"提交后台任务: job_id={job.id}, job_type={job_type}, document_id={document_id}")
+        return job
+
+    def get_job(self, job_id: int) -> Job:
+        """获取任务"""
+        job = self.db.query(Job).filter(Job.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        return job
+
+    def get_jobs(
+        self,
+        document_id: Optional[int] = None,
+        status: Optional[JobStatus] = None,
+        limit: int = 100,
+    ) -> List[Job]:
+        """获取任务列表，按创建时间倒序"""
+        query = self.db.query(Job)
+        if document_id is not None:
+            query = query.filter(Job.document_id == document_id)
+        if status is not None:
+            query = query.filter(Job.status == status)
+        return query.order_by(Job.id.desc()).limit(limit).all()
+
+    def cancel_job(self, job_id: int) -> Job:
+        """取消任务
+
+        排队中的任务直接取消；执行中的任务标记取消请求，在下次上报进度时中断。
+        """
+        job = self.get_job(job_id)
+        if job.status in FINISHED_STATUSES:
+            raise HTTPException(status_code=400, detail=f"任务已结束: {job.status.value}")
+        cancelled = self.db.query(Job).filter(Job.id == job_id, Job.status == JobStatus.PENDING).update(
+            {"status": JobStatus.CANCELLED, "cancel_requested": True, "finished_at": func.now()},
+            synchronize_session=False,
+        )
+        if not cancelled:
+            job.cancel_requested = True
+        self.db.commit()
+        self.db.refresh(job)
+        return job
@@ -0,0 +1,89 @@
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.parse_cache import ParseCache
+from app.schemas.document import LangChainDocument
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+class ParseCacheService:
+    """文档解析结果缓存
+
+    以 (文件内容哈希, 解析配置哈希) 为键持久化解析结果，
+    按条目数和总字节数做 LRU 淘汰。
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def make_key(file_hash: str, config_hash: str) -> str:
+        return f"{file_hash}:{config_hash}"
+
+    def get(self, file_hash: str, config_hash: str) -> Optional[List[LangChainDocument]]:
+        """读取缓存，命中时刷新访问时间"""
+        entry = self.db.query(ParseCache).filter(
+            ParseCache.cache_key == self.make_key(file_hash, config_hash)
+        ).first()
+        if not entry:
+            return None
+        entry.accessed_at = datetime.now()
+        self.db.commit()
+        logger.debug(f"解析缓存命中: file_hash={file_hash}, config_hash={config_hash}")
+        return [LangChainDocument.model_validate(result) for result in entry.result]
+
+    def set(self, file_hash: str, config_hash: str, results: List[LangChainDocument]) -> None:
+        """写入缓存并按容量淘汰"""
+        data = [result.model_dump() for result in results]
+        size = len(json.dumps(data, ensure_ascii=False).encode())
+        if size > settings.PARSE_CACHE_MAX_BYTES:
+            logger.debug(f"解析结果超过缓存容量，跳过缓存: file_hash={file_hash}, size={size}")
+            return
+
+        key = self.make_key(file_hash, config_hash)
+        entry = self.db.query(ParseCache).filter(ParseCache.cache_key == key).first()
+        if entry:
+            entry.result = data
+            entry.size = size
+            entry.accessed_at = datetime.now()
+        else:
+            entry = ParseCache(
+                cache_key=key,
+                file_hash=file_hash,
+                config_hash=config_hash,
+                result=data,
+                size=size,
+                accessed_at=datetime.now(),
+            )
+            self.db.add(entry)
+        self.db.commit()
+        self.evict()
+
+    def evict(self) -> int:
+        """按最近访问时间淘汰超出条目数或总字节数的缓存
+
+        Returns:
+            int: 淘汰的条目数
+        """
+        rows = self.db.query(ParseCache.id, ParseCache.size).order_by(
+            ParseCache.accessed_at.desc(), ParseCache.id.desc()
+        ).all()
+        total_size = 0
+        expired_ids = []
+        for index, (entry_id, size) in enumerate(rows):
+            total_size += size or 0
+            if index >= settings.PARSE_CACHE_MAX_ENTRIES or total_size > settings.PARSE_CACHE_MAX_BYTES:
+                expired_ids.append(entry_id)
+        if expired_ids:
+            self.db.query(ParseCache).filter(ParseCache.id.in_(expired_ids)).delete(synchronize_session=False)
+            self.db.commit()
+            logger.debug(f"淘汰解析缓存: count={len(expired_ids)}")
+        return len(expired_ids)
+
+    def invalidate(self, file_hash: str) -> None:
+        """删除某个文件的全部缓存"""
+        self.db.query(ParseCache).filter(ParseCache.file_hash == file_hash).delete(synchronize_session=False)
+        self.db.commit()
@@ -1,18 +1,101 @@
-from typing import List
+import math
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
 from app.schemas.document import LangChainDocument
 from langchain_community.document_loaders import (
     PyPDFLoader,
 )
 from app.schemas.common_config import ConfigParams
+from app.services.parsers.pdf_pages import (
+    extract_page,
+    extract_pages,
+    get_document_metadata,
+    is_all_pages,
+    open_pdf,
+    parse_page_range,
+)
+
+# 并行解析时每个进程平均分到的任务数，任务越细负载越均衡
+TASKS_PER_WORKER = 2
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_parse_executor(workers: int) -> ProcessPoolExecutor:
+    """获取全局解析进程池，进程数变化时重建"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # 使用 spawn 避免在多线程的服务进程中 fork
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown_parse_executor() -> None:
+    """关闭全局解析进程池"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+            _executor_workers = 0
+
 
 class LangchainParser:
-    def __init__(self, config: ConfigParams):
+    def __init__(self, config: ConfigParams, workers: int = 0):
         self.config = config
+        # 并行解析进程数，0 表示使用 CPU 核数
+        self.workers = workers or os.cpu_count() or 1
 
     def parse(self, file_path: str)-> List[LangChainDocument]:
-        if self.config.get("loader_tool") == "langchain":
-            loader = PyPDFLoader(file_path)
-        else:
+        return list(self.iter_parse(file_path))
+
+    def iter_parse(self, file_path: str) -> Iterator[LangChainDocument]:
+        """逐页解析，每解析出一页就立即产出"""
+        if self.config.get("loader_tool") != "langchain":
             raise ValueError(f"不支持的加载工具: {self.config.get('loader_tool')}")
-        documents = loader.load()
-        return [LangChainDocument(page_content=doc.page_content, metadata=doc.metadata) for doc in documents]
+        page_range = self.config.get("page_range", "all")
+        parallel = self.config.get("parallel_parse", False) and self.workers > 1
+        if is_all_pages(page_range) and not parallel:
+            loader = PyPDFLoader(file_path)
+            for doc in loader.lazy_load():
+                yield LangChainDocument(page_content=doc.page_content, metadata=doc.metadata)
+            return
+
+        # 只打开一次文件，仅解码页码范围内的页
+        password = self.config.get("password")
+        reader = open_pdf(file_path, password)
+        page_numbers = parse_page_range(page_range, len(reader.pages))
+        if parallel and len(page_numbers) > 1:
+            yield from self.iter_parse_parallel(file_path, page_numbers)
+            return
+        doc_metadata = get_document_metadata(reader, file_path)
+        for page_number in page_numbers:
+            yield extract_page(reader, page_number, doc_metadata)
+
+    def iter_parse_parallel(self, file_path: str, page_numbers: List[int]) -> Iterator[LangChainDocument]:
+        """按页拆分后在进程池中并行解析，结果按页码顺序产出"""
+        password = self.config.get("password")
+        workers = min(self.workers, len(page_numbers))
+        batch_size = max(1, math.ceil(len(page_numbers) / (workers * TASKS_PER_WORKER)))
+        batches = [page_numbers[start:start + batch_size] for start in range(0, len(page_numbers), batch_size)]
+        executor = get_parse_executor(self.workers)
+        futures = [executor.submit(extract_pages, file_path, batch, password) for batch in batches]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # 提前结束时取消尚未开始的任务
+            for future in futures:
+                future.cancel()
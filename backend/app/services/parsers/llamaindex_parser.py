@@ -1,5 +1,5 @@
 from app.schemas.common_config import ConfigParams
-from typing import List
+from typing import Iterator, List
 from app.schemas.chunk import LangChainChunk
 
 class LlamaIndexParser:
@@ -7,4 +7,7 @@ class LlamaIndexParser:
         self.config = config
 
     def parse(self, file_path: str)-> List[LangChainChunk]:
-        raise NotImplementedError("LlamaIndexParser is not implemented")
\ No newline at end of file
+        raise NotImplementedError("LlamaIndexParser is not implemented")
+
+    def iter_parse(self, file_path: str) -> Iterator[LangChainChunk]:
+        raise NotImplementedError("LlamaIndexParser is not implemented")
@@ -0,0 +1,136 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, cast
+import pypdf
+from app.schemas.document import LangChainDocument
+
+try:
+    # pypdf 的私有函数，只计算一页的页码标签；升级后不可用时退回公开的 reader.page_labels
+    from pypdf._page_labels import index2label
+except ImportError:  # pragma: no cover
+    index2label = None
+
+# 按页解析 PDF 的工具函数
+# 均为模块级函数，可以直接提交到进程池中执行；元数据格式与 PyPDFLoader 保持一致
+
+def is_all_pages(page_range: Optional[str]) -> bool:
+    """页码范围是否表示全部页"""
+    return not page_range or page_range.strip().lower() == "all"
+
+
+def parse_page_range(page_range: Optional[str], total_pages: int) -> List[int]:
+    """解析页码范围
+
+    Args:
+        page_range: "all" 或 "1-5,7,9-12" 形式的页码范围（从 1 开始）
+        total_pages: 文档总页数
+
+    Returns:
+        List[int]: 去重并排序后的页码（从 0 开始），超出总页数的部分会被忽略
+
+    Raises:
+        ValueError: 页码范围格式错误时抛出
+    """
+    if is_all_pages(page_range):
+        return list(range(total_pages))
+
+    pages = set()
+    for part in page_range.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"页码范围格式错误: {part}")
+        if start < 1 or end < start:
+            raise ValueError(f"页码范围无效: {part}")
+        pages.update(range(start - 1, min(end, total_pages)))
+    return sorted(pages)
+
+
+def open_pdf(file_path: str, password: Optional[str] = None) -> pypdf.PdfReader:
+    """打开 PDF 文件"""
+    return pypdf.PdfReader(file_path, password=password or None)
+
+
+def purge_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """规范化 PDF 元数据，与 langchain_community PDF 解析器的 _purge_metadata 相同
+
+    键名去掉开头的 "/" 并转为小写，page_count、file_path 同时以 total_pages、source 记录，
+    创建和修改时间转为 ISO 格式，其他非字符串、非整数的值转为字符串。
+    """
+    new_metadata: Dict[str, Any] = {}
+    map_key = {
+        "page_count": "total_pages",
+        "file_path": "source",
+    }
+    for key, value in metadata.items():
+        if type(value) not in [str, int]:
+            value = str(value)
+        if key.startswith("/"):
+            key = key[1:]
+        key = key.lower()
+        if key in ["creationdate", "moddate"]:
+            try:
+                new_metadata[key] = datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+            except ValueError:
+                new_metadata[key] = value
+        elif key in map_key:
+            new_metadata[map_key[key]] = value
+            new_metadata[key] = value
+        elif isinstance(value, str):
+            new_metadata[key] = value.strip()
+        elif isinstance(value, int):
+            new_metadata[key] = value
+    return new_metadata
+
+
+def page_label(reader: pypdf.PdfReader, page_number: int) -> str:
+    """页码标签（与 PyPDFLoader 相同）"""
+    if index2label is not None:
+        # reader.page_labels 每次都会计算全部页码标签，这里只计算需要的页
+        return index2label(reader, page_number)
+    return reader.page_labels[page_number]
+
+
+def get_document_metadata(reader: pypdf.PdfReader, file_path: str) -> Dict[str, Any]:
+    """获取文档级元数据（与 PyPDFLoader 相同）"""
+    return purge_metadata(
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | cast(dict, reader.metadata or {})
+        | {
+            "source": file_path,
+            "total_pages": len(reader.pages),
+        }
+    )
+
+
+def extract_page(
+    reader: pypdf.PdfReader,
+    page_number: int,
+    doc_metadata: Dict[str, Any],
+) -> LangChainDocument:
+    """提取单页文本"""
+    text = reader.pages[page_number].extract_text(extraction_mode="plain")
+    return LangChainDocument(
+        page_content=text.strip(),
+        metadata=doc_metadata | {
+            "page": page_number,
+            "page_label": page_label(reader, page_number),
+        },
+    )
+
+
+def extract_pages(
+    file_path: str,
+    page_numbers: List[int],
+    password: Optional[str] = None,
+) -> List[LangChainDocument]:
+    """提取指定页（页码从 0 开始），按传入顺序返回"""
+    reader = open_pdf(file_path, password)
+    doc_metadata = get_document_metadata(reader, file_path)
+    return [extract_page(reader, page_number, doc_metadata) for page_number in page_numbers]
@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, Tuple, TypeVar
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """进程内的 LRU + TTL 缓存，线程安全
+
+    超过 max_entries 时淘汰最久未使用的条目，条目写入超过 ttl 秒后失效；
+    max_entries 或 ttl 为 0 时不缓存。
+    """
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, T]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: T) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Any], bool]) -> int:
+        """删除键满足条件的条目
+
+        Returns:
+            int: 删除的条目数
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 查询向量：(模型缓存标识, 规范化查询文本) → 向量
+query_embedding_cache: TTLCache = TTLCache(settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES, settings.QUERY_EMBEDDING_CACHE_TTL)
+# 检索结果：(文档ID, 集合, 索引版本, 检索参数, 查询文本) → 检索结果
+search_result_cache: TTLCache = TTLCache(settings.SEARCH_RESULT_CACHE_MAX_ENTRIES, settings.SEARCH_RESULT_CACHE_TTL)
+
+
+def invalidate_document_results(document_id: int) -> int:
+    """删除文档的检索结果缓存，文档重新存储或删除后调用"""
+    return search_result_cache.invalidate(lambda key: key[0] == document_id)
@@ -1,20 +1,45 @@
+import json
+import logging
+import uuid
+from dataclasses import asdict
 from sqlalchemy.orm import Session
 from app.models.document import Document
-from app.models.store import Store
-from app.schemas.store import LangChainStore, StoreMetaData
-from app.schemas.document import LangChainDocument
-from app.models.chunk import Chunk
 from app.models.embedding import Embedding
+from app.models.store import Store, StoreItem
+from app.schemas.store import (
+    LangChainStore, StoreBatchSearchRequest, StoreBatchSearchResult, StoreMetaData, StoreSearchHit,
+    StoreSearchOptions, StoreSearchRequest, StoreSearchResult
+)
+from app.schemas.response import PageResult
 from app.schemas.common_config import ConfigParams, DocumentStatus
+from app.schemas.configuration.embedding import get_default_config as get_embedding_default_config
 from app.schemas.configuration.store import get_default_config
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from fastapi import HTTPException
-from app.services.chunkers.langchain_chunker import LangChainChunker
-from app.services.storer.milvus import MilvusStorer
+from sqlalchemy import delete, insert
+from app.services.chunk import ChunkService
+from app.services.embedding import EmbeddingService
+from app.services.embeddinger.LangChainEmbe import Embeddinger
+from app.services.embeddinger.remote import RemoteEmbeddingError
+from app.services.query_cache import invalidate_document_results, search_result_cache
+from app.services.storer.base import ChunkKeyer, SyncStats, VectorStorer, check_filter
+from app.services.storer.milvus import get_storer
 from app.schemas.chunk import LangChainChunk
 from app.exceptions import APIException
 from app.schemas.embedding import LangChainEmbedding
 
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 决定向量取值的嵌入配置项，其中任一项变化时已有向量不可复用
+EMBEDDING_MODEL_FIELDS = ("embedding_tool", "model_name", "api_model", "dimension", "normalize",
+                          "vector_dtype", "max_seq_length")
+
+
+def embedding_model(values: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """嵌入配置中决定向量取值的部分"""
+    return {field: (values or {}).get(field) for field in EMBEDDING_MODEL_FIELDS}
+
 class StoreService:
     def __init__(self, db: Session):
         self.db = db
@@ -34,8 +59,7 @@ class StoreService:
                 config=config.model_dump(),
                 meta_data={
                     "document": {"id": document.id, "filename": document.filename}
-                },
-                result=[]
+                }
             )
             self.db.add(store)
             self.db.commit()
@@ -48,22 +72,55 @@ class StoreService:
         # 3. 返回 store 配置
         return ConfigParams.model_validate(store.config)
 
-    def do_parse(self, document_id: int, config: ConfigParams) -> List[LangChainStore]:
+    def do_parse(
+        self,
+        document_id: int,
+        config: ConfigParams,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> List[LangChainStore]:
+        """将文档的分块和向量写入向量库，progress 每写完一批调用，参数为已写入的分块数"""
         document = self.db.query(Document).filter(Document.id == document_id).first()
-        chunk = self.db.query(Chunk).filter(Chunk.id == document.chunk_id).first()
-        embedding = self.db.query(Embedding).filter(Embedding.id == document.embedding_id).first()
-        store = self.db.query(Store).filter(Store.id == document.store_id).first()
+        if not document:
+            raise APIException(code=404, message="文档或分块不存在")
 
-        if not document or not chunk:
+        chunks: List[LangChainChunk] = list(ChunkService(self.db).iter_chunks(document_id))
+        embedding = EmbeddingService(self.db).get_vector_matrix(document_id)
+        if not chunks:
             raise APIException(code=404, message="文档或分块不存在")
+        if embedding is None:
+            raise APIException(code=400, message="文档的嵌入结果没有向量文件（尚未嵌入或由旧版本生成），请重新进行嵌入")
+        if len(embedding) != len(chunks):
+            raise APIException(code=400, message="嵌入结果与分块不一致，请重新进行嵌入")
+
+        # 增量更新：按稳定主键比对，只写入新增和变化的分块，删除已移除的分块
+        embedding_values = EmbeddingService(self.db).get_embedding_config(document_id).default_config
+        storer, existing = self.prepare_storer(document, config, embedding.shape[1], embedding_values)
+        stats = SyncStats()
+        res = storer.write_stream(zip(chunks, embedding), ChunkKeyer(document.id), existing, stats,
+                                  progress=progress)
+        if existing:
+            stats.deleted = storer.delete(set(existing) - {item.metadata.store_id for item in res})
+        index = storer.optimize()
+        quantization = storer.quantization_report()
+        self.save_items(document_id, res)
+        logger.info(f"向量存储完成: document_id={document_id}, {stats}, {index}, quantization={quantization}")
 
-        chunks:List[LangChainChunk] = [LangChainChunk.model_validate(chunk) for chunk in chunk.result]
-        embedding:List[LangChainEmbedding] = [LangChainEmbedding.model_validate(embedding) for embedding in embedding.result]
-        storer = MilvusStorer(config, "doc_"+str(document.id))
-        storer.delete_collection()
-        storer.create_collection()
-        res = storer.insert(chunks=chunks, embedding=embedding)
-        store.result = [result.model_dump() for result in res]
+        store = None
+        if document.store_id:
+            store = self.db.query(Store).filter(Store.id == document.store_id).first()
+        if not store:
+            store = Store(
+                document_id=document_id,
+                meta_data={
+                    "document": {"id": document.id, "filename": document.filename}
+                }
+            )
+        store.config = config.model_dump()
+        store.meta_data = {**(store.meta_data or {}), "collection": storer.collection_name,
+                           "version": uuid.uuid4().hex,
+                           "embedding": embedding_values,
+                           "sync": asdict(stats), "index": index.to_dict(),
+                           "quantization": quantization}
         self.db.add(store)
         self.db.commit()
         self.db.refresh(store)
@@ -72,28 +129,228 @@ class StoreService:
         document.store_id = store.id
         self.db.commit()
         self.db.refresh(document)
+        invalidate_document_results(document_id)
 
         return res
 
-    def do_search(self, document_id: int, query: str) -> str:
-        document = self.db.query(Document).filter(Document.id == document_id).first()
-        if not document:
+    def get_document_storer(self, document: Document) -> Optional[VectorStorer]:
+        """按上次存储时的配置和集合获取文档的存储器，尚未存储时返回 None"""
+        store = self.db.query(Store).filter(Store.id == document.store_id).first() if document.store_id else None
+        if not store or not store.config:
+            return None
+        try:
+            return get_storer(
+                ConfigParams.model_validate(store.config),
+                document.id,
+                collection_name=(store.meta_data or {}).get("collection")
+            )
+        except ValueError:
+            # 配置为共享集合但尚未写入过
+            return None
+
+    def prepare_storer(
+        self,
+        document: Document,
+        config: ConfigParams,
+        dimension: int,
+        embedding: Optional[Dict[str, Any]] = None
+    ) -> Tuple[VectorStorer, Optional[Dict[int, Optional[int]]]]:
+        """准备写入文档的向量
+
+        集合方式或向量维度变化导致集合改变时，清除旧集合中本文档的向量并全量写入；
+        嵌入模型与上次存储时不同（即使维度相同）时，已有向量不可复用，同样全量写入。
+
+        Args:
+            document: 文档
+            config: 存储配置
+            dimension: 向量维度
+            embedding: 本次使用的嵌入配置，为空时不比对嵌入模型
+
+        Returns:
+            Tuple[VectorStorer, Optional[Dict[int, Optional[int]]]]:
+                存储器，以及增量写入时集合中已有的 主键 → 页码（全量写入时为 None）
+        """
+        storer = get_storer(config, document.id, dimension)
+        previous = self.get_document_storer(document)
+        moved = previous is not None and previous.collection_name != storer.collection_name
+        if moved:
+            try:
+                previous.clear()
+            except Exception as e:
+                logger.warning(f"清除旧集合中的向量失败: document_id={document.id}, error={str(e)}")
+        store = self.db.query(Store).filter(Store.id == document.store_id).first() if document.store_id else None
+        recorded = (store.meta_data or {}).get("embedding") if store else None
+        model_changed = embedding is not None and previous is not None \
+            and embedding_model(recorded) != embedding_model(embedding)
+        if model_changed:
+            logger.info(f"嵌入模型已变化，全量写入: document_id={document.id}")
+        incremental = config.get("write_mode", "incremental") == "incremental" and not moved and not model_changed
+        if storer.prepare(dimension, incremental):
+            return storer, self.get_vector_pages(document.id)
+        return storer, None
+
+    def save_items(self, document_id: int, items: List[LangChainStore]) -> None:
+        """替换文档的存储结果（在调用方提交事务）"""
+        self.db.execute(delete(StoreItem).where(StoreItem.document_id == document_id))
+        if items:
+            self.db.execute(insert(StoreItem), [
+                {
+                    "document_id": document_id,
+                    "chunk_id": item.metadata.chunk_id,
+                    "page": item.metadata.page,
+                    "vector_id": item.metadata.store_id,
+                    "meta_data": item.metadata.model_dump(),
+                }
+                for item in items
+            ])
+
+    def get_vector_pages(self, document_id: int) -> Dict[int, Optional[int]]:
+        """上次存储写入向量库的 主键 → 页码"""
+        return {
+            vector_id: page for vector_id, page in self.db.query(StoreItem.vector_id, StoreItem.page).filter(
+                StoreItem.document_id == document_id, StoreItem.vector_id.isnot(None)
+            )
+        }
+
+    def get_items(self, document_id: int, offset: int = 0, limit: int = 50) -> PageResult[LangChainStore]:
+        """分页获取文档的存储结果"""
+        if not self.db.query(Document.id).filter(Document.id == document_id).first():
             raise HTTPException(status_code=404, detail="文档不存在")
+        query = self.db.query(StoreItem).filter(StoreItem.document_id == document_id)
+        rows = query.order_by(StoreItem.chunk_id).offset(offset).limit(limit).all()
+        return PageResult[LangChainStore](
+            items=[LangChainStore(content="", metadata=row.meta_data or {}) for row in rows],
+            total=query.count(),
+            offset=offset,
+            limit=limit,
+        )
 
-        if not document.store_id:
-            raise HTTPException(status_code=400, detail="文档尚未进行向量存储处理，请先进行向量存储")
+    def do_search(self, document_id: int, request: StoreSearchRequest) -> StoreSearchResult:
+        return self._search(document_id, [request.query], request)[0]
 
-        store = self.db.query(Store).filter(Store.id == document.store_id).first()
-        if not store:
+    def do_batch_search(self, document_id: int, request: StoreBatchSearchRequest) -> StoreBatchSearchResult:
+        """批量检索：查询一次批量嵌入，在一次向量库请求中检索"""
+        return StoreBatchSearchResult(results=self._search(document_id, request.queries, request))
+
+    def _search(self, document_id: int, queries: List[str], options: StoreSearchOptions) -> List[StoreSearchResult]:
+        # 只查询校验和缓存键需要的列，缓存命中时不加载文档和存储对象
+        row = self.db.query(Document.store_id, Store.id, Store.meta_data).outerjoin(
+            Store, Store.id == Document.store_id
+        ).filter(Document.id == document_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="文档不存在")
+        store_id, found_store_id, meta_data = row
+        if not store_id:
+            raise HTTPException(status_code=400, detail="文档尚未进行向量存储处理，请先进行向量存储")
+        if not found_store_id:
             raise HTTPException(status_code=404, detail="存储记录不存在")
 
-        storer = MilvusStorer(ConfigParams.model_validate(store.config), "doc_"+str(document.id))
+        # 检索结果按查询缓存，批量检索与单条检索共用；重新存储后索引版本变化，旧结果不再命中
+        meta_data = meta_data or {}
+        key_prefix = (document_id, meta_data.get("collection"), meta_data.get("version"),
+                      options.model_dump_json(exclude={"query", "queries"}))
+        results: List[Optional[StoreSearchResult]] = [search_result_cache.get(key_prefix + (query,)) for query in queries]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            document = self.db.get(Document, document_id)
+            store = self.db.get(Store, store_id)
+            computed = self._search_store(document, store, [queries[index] for index in missing], options)
+            for index, result in zip(missing, computed):
+                results[index] = result
+                search_result_cache.set(key_prefix + (result.query,), result)
+        return results
+
+    def _search_store(
+        self,
+        document: Document,
+        store: Store,
+        queries: List[str],
+        options: StoreSearchOptions
+    ) -> List[StoreSearchResult]:
+        storer = self.get_document_storer(document)
+        if not storer:
+            raise HTTPException(status_code=400, detail="文档尚未进行向量存储处理，请先进行向量存储")
 
         # 检查集合是否存在
         try:
-            return storer.search(query)
+            vectors = self.get_query_embeddinger(document, store).embed_queries(queries)
+            hit_lists = storer.search_many(
+                queries,
+                vectors,
+                top_k=options.top_k,
+                filter=build_search_filter(options),
+                output_fields=options.output_fields,
+                ef=options.ef,
+                nprobe=options.nprobe,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except RemoteEmbeddingError as e:
+            raise HTTPException(status_code=502, detail=str(e))
         except Exception as e:
             if "collection not found" in str(e):
                 raise HTTPException(status_code=400, detail="文档的向量集合不存在，请先进行向量存储处理")
+            elif options.filter:
+                raise HTTPException(status_code=400, detail=f"搜索失败，请检查过滤表达式: {str(e)}")
             else:
-                raise HTTPException(status_code=500, detail=f"搜索失败: {str(e)}")
\ No newline at end of file
+                raise HTTPException(status_code=500, detail=f"搜索失败: {str(e)}")
+        return self._to_results(document.id, queries, hit_lists)
+
+    def get_query_embeddinger(self, document: Document, store: Store) -> Embeddinger:
+        """使用文档存储时的嵌入配置嵌入查询，查询向量与文档向量来自同一个模型"""
+        values = (store.meta_data or {}).get("embedding")
+        if values is not None:
+            config = get_embedding_default_config()
+            config = config.model_copy(update={"default_config": {**config.default_config, **values}})
+        else:
+            # 旧的存储结果没有记录嵌入配置，使用嵌入阶段的配置
+            embedding = self.db.query(Embedding).filter(Embedding.id == document.embedding_id).first() \
+                if document.embedding_id else None
+            config = ConfigParams.model_validate(embedding.config) if embedding and embedding.config \
+                else get_embedding_default_config()
+        return Embeddinger(config, self.db)
+
+    def _to_results(
+        self,
+        document_id: int,
+        queries: List[str],
+        hit_lists: List[List[Dict[str, Any]]]
+    ) -> List[StoreSearchResult]:
+        """检索结果转为返回结构，分块序号不在向量库中，从存储结果补充"""
+        vector_ids = list({hit["id"] for hits in hit_lists for hit in hits})
+        chunk_ids: Dict[int, int] = {}
+        for start in range(0, len(vector_ids), 500):
+            chunk_ids.update(self.db.query(StoreItem.vector_id, StoreItem.chunk_id).filter(
+                StoreItem.document_id == document_id, StoreItem.vector_id.in_(vector_ids[start:start + 500])
+            ))
+        results = []
+        for query, hits in zip(queries, hit_lists):
+            items = []
+            for hit in hits:
+                entity = hit.get("entity") or {}
+                metadata = entity.get("metadata")
+                if metadata is not None:
+                    metadata = {**metadata, "chunk_id": chunk_ids.get(hit["id"])}
+                items.append(StoreSearchHit(
+                    id=hit["id"],
+                    score=hit["distance"],
+                    document_id=entity.get("document_id", document_id),
+                    content=entity.get("content"),
+                    metadata=metadata,
+                ))
+            results.append(StoreSearchResult(query=query, hits=items))
+        return results
+
+
+def build_search_filter(request: StoreSearchOptions) -> str:
+    """由检索参数生成过滤表达式：页码范围、来源和自定义表达式同时生效"""
+    conditions = []
+    if request.page_from is not None:
+        conditions.append(f'metadata["page"] >= {request.page_from}')
+    if request.page_to is not None:
+        conditions.append(f'metadata["page"] <= {request.page_to}')
+    if request.source:
+        conditions.append(f'metadata["source"] == {json.dumps(request.source, ensure_ascii=False)}')
+    if request.filter and request.filter.strip():
+        conditions.append(f"({check_filter(request.filter)})")
+    return " and ".join(conditions)
@@ -0,0 +1,253 @@
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import hashlib
+import threading
+import numpy as np
+from app.schemas.chunk import LangChainChunk
+from app.schemas.common_config import ConfigParams
+from app.schemas.store import LangChainStore, StoreMetaData
+from app.services.storer.index import IndexPlan
+
+# 估算写入大小时每行元数据和主键的开销（字节）
+ROW_OVERHEAD_BYTES = 256
+
+
+def check_filter(expression: str) -> str:
+    """检查过滤表达式的括号是否配对（忽略字符串字面量中的括号）
+
+    表达式会以括号包裹后与文档过滤条件同时生效，括号不配对时可以闭合外层括号，
+    使条件脱离文档过滤，因此直接拒绝。
+
+    Raises:
+        ValueError: 括号不配对或字符串字面量未闭合
+    """
+    depth = 0
+    quote = None
+    escaped = False
+    for char in expression:
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                break
+    if quote or depth != 0:
+        raise ValueError(f"过滤表达式的括号或引号不配对: {expression}")
+    return expression
+
+
+class ChunkKeyer:
+    """由文档标识和分块内容生成稳定的向量主键
+
+    主键只取决于文档和分块内容，与分块序号无关，重新分块后内容未变的分块主键不变；
+    同一文档内内容相同的分块按出现次序区分，因此一个文档的分块需按顺序交给同一个实例。
+    """
+    def __init__(self, document_key: Union[int, str]):
+        self.document_key = document_key
+        self._occurrences: Dict[str, int] = {}
+
+    def keys(self, chunks: List[LangChainChunk]) -> List[int]:
+        keys = []
+        for chunk in chunks:
+            content_hash = hashlib.sha256(chunk.page_content.encode()).hexdigest()
+            occurrence = self._occurrences.get(content_hash, 0)
+            self._occurrences[content_hash] = occurrence + 1
+            digest = hashlib.sha256(f"{self.document_key}:{content_hash}:{occurrence}".encode()).digest()
+            # Milvus 主键为有符号 INT64，取 63 位
+            keys.append(int.from_bytes(digest[:8], "big") >> 1)
+        return keys
+
+
+@dataclass
+class SyncStats:
+    """增量写入统计"""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+
+class VectorStorer:
+    """向量存储器基类
+
+    子类实现集合的准备、逐批写入（_write_rows）、删除、索引调整和检索；
+    增量写入的比对、分批流式写入由基类完成，各存储方式的写入和检索接口一致。
+    """
+    config: ConfigParams
+    collection_name: str
+    document_id: Optional[int] = None
+
+    def prepare(self, dimension: int, incremental: bool = True) -> bool:
+        """准备集合：可增量写入时保留，否则删除重建
+
+        Returns:
+            bool: 是否保留了已有集合
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """删除本文档的全部向量"""
+        raise NotImplementedError
+
+    def delete(self, ids: Iterable[int]) -> int:
+        """按主键删除向量"""
+        raise NotImplementedError
+
+    def index_plan(self) -> IndexPlan:
+        """集合当前的索引"""
+        raise NotImplementedError
+
+    def optimize(self) -> IndexPlan:
+        """全部写入和删除完成后调用一次，使写入可检索并按向量数调整索引"""
+        raise NotImplementedError
+
+    def quantization_report(self) -> Optional[Dict[str, Any]]:
+        """量化存储报告（压缩比、召回率），不支持量化的存储方式返回 None"""
+        return None
+
+    def search_many(
+        self,
+        queries: List[str],
+        vectors: np.ndarray,
+        top_k: int = 10,
+        filter: str = "",
+        output_fields: Optional[List[str]] = None,
+        ef: Optional[int] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """批量检索：所有查询一次检索，参数同 search
+
+        Returns:
+            List[List[Dict[str, Any]]]: 每个查询的命中，顺序与 queries 一致
+        """
+        raise NotImplementedError
+
+    def _write_rows(self, chunks: List[LangChainChunk], vectors: np.ndarray, keys: List[int], upsert: bool) -> None:
+        """写入一批需要写入的分块，upsert 为 True 时覆盖主键相同的已有向量"""
+        raise NotImplementedError
+
+    def search(
+        self,
+        query: str,
+        vector: Sequence[float],
+        top_k: int = 10,
+        filter: str = "",
+        output_fields: Optional[List[str]] = None,
+        ef: Optional[int] = None,
+        nprobe: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """检索与查询最相似的 top_k 个分块
+
+        Args:
+            query: 查询文本，混合检索时用于 BM25
+            vector: 查询向量，需与文档使用同一个嵌入模型
+            top_k: 返回的结果数
+            filter: 额外的过滤表达式，与文档过滤条件同时生效
+            output_fields: 返回的字段，默认 content 和 metadata
+            ef: HNSW 检索候选集大小，为空时按存储配置
+            nprobe: IVF 检索的聚类数，为空时按存储配置
+
+        Returns:
+            List[Dict[str, Any]]: 按得分从高到低排序的命中，包含 id、distance 和 entity（返回的字段）
+        """
+        return self.search_many([query], np.asarray([vector]), top_k, filter, output_fields, ef, nprobe)[0]
+
+    @staticmethod
+    def _to_stores(chunks: List[LangChainChunk], keys: List[int]) -> List[LangChainStore]:
+        return [LangChainStore(content="",
+                               metadata=StoreMetaData.model_validate(chunk.metadata.model_dump() | {"store_id": key}))
+                for chunk, key in zip(chunks, keys)]
+
+    def write_stream(
+        self,
+        items: Iterable[Tuple[LangChainChunk, np.ndarray]],
+        keyer: ChunkKeyer,
+        existing: Optional[Dict[int, Optional[int]]] = None,
+        stats: Optional[SyncStats] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        limit: Optional[threading.Semaphore] = None
+    ) -> List[LangChainStore]:
+        """流式写入 (分块, 向量)，按行数和字节数分批
+
+        每批不超过配置的 insert_batch_size 行和 insert_batch_mb MB，内存占用与文档大小无关，
+        单次请求也不会超过 Milvus 的消息大小限制。写入后不落盘、不建索引，
+        由调用方在全部写入（和删除）完成后调用一次 optimize。
+
+        Args:
+            items: 按文档顺序的 (分块, 向量)
+            keyer: 文档的主键生成器
+            existing: 同 write
+            stats: 增量写入统计
+            progress: 每写完一批调用，参数为已写入的分块数
+            limit: 与其他入库共享的写入并发上限，每批写入时占用
+
+        Returns:
+            List[LangChainStore]: 全部分块的存储结果
+        """
+        max_rows = max(1, int(self.config.get("insert_batch_size", 1000)))
+        max_bytes = max(1, int(self.config.get("insert_batch_mb", 16))) * 1024 * 1024
+        stats = stats if stats is not None else SyncStats()
+        stored: List[LangChainStore] = []
+        chunks: List[LangChainChunk] = []
+        vectors: List[np.ndarray] = []
+        size = 0
+
+        def write_batch() -> None:
+            with limit if limit else nullcontext():
+                stored.extend(self.write(chunks, np.stack(vectors), keyer.keys(chunks), existing, stats))
+            if progress:
+                progress(len(stored))
+
+        for chunk, vector in items:
+            # 行大小按向量（float32）、内容和元数据估算
+            row_size = vector.size * 4 + len(chunk.page_content.encode()) + ROW_OVERHEAD_BYTES
+            if chunks and (len(chunks) >= max_rows or size + row_size > max_bytes):
+                write_batch()
+                chunks, vectors, size = [], [], 0
+            chunks.append(chunk)
+            vectors.append(vector)
+            size += row_size
+        if chunks:
+            write_batch()
+        return stored
+
+    def write(
+        self,
+        chunks: List[LangChainChunk],
+        embedding: np.ndarray,
+        keys: List[int],
+        existing: Optional[Dict[int, Optional[int]]] = None,
+        stats: Optional[SyncStats] = None
+    ) -> List[LangChainStore]:
+        """增量写入一批分块
+
+        existing 为集合中已有的 主键 → 页码，为 None 表示集合是新建的。
+        页码变化的分块覆盖写入，内容未变的分块跳过；集合是复用的时，新分块也以 upsert 写入，
+        避免上次中途失败时已写入、但未记录的分块产生重复主键。
+
+        Returns:
+            List[LangChainStore]: 这批分块全部的存储结果
+        """
+        stats = stats if stats is not None else SyncStats()
+        vectors = np.asarray(embedding, dtype=np.float32)
+        known = existing or {}
+        written = [index for index, key in enumerate(keys)
+                   if key not in known or known[key] != chunks[index].metadata.page]
+        if written:
+            self._write_rows([chunks[index] for index in written], vectors[written],
+                             [keys[index] for index in written], upsert=existing is not None)
+        updated = sum(1 for index in written if keys[index] in known)
+        stats.inserted += len(written) - updated
+        stats.updated += updated
+        stats.unchanged += len(keys) - len(written)
+        return self._to_stores(chunks, keys)
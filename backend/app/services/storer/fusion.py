@@ -0,0 +1,42 @@
+import math
+from typing import Any, Dict, List, Sequence
+
+# 加权融合前把各路得分归一化到 [0, 1]，与 Milvus WeightedRanker 的做法一致
+NORMALIZERS = {
+    "IP": lambda score: 0.5 + math.atan(score) / math.pi,
+    "COSINE": lambda score: (1 + score) / 2,
+    "L2": lambda score: 1 - 2 * math.atan(score) / math.pi,
+    # Milvus Lite 返回的 BM25 得分为负数，按绝对值计
+    "BM25": lambda score: 2 * math.atan(abs(score)) / math.pi,
+}
+
+
+def rrf_fuse(hit_lists: Sequence[List[Dict[str, Any]]], k: int = 60) -> List[Dict[str, Any]]:
+    """倒数排名融合：每路结果按 1 / (k + 排名) 累加得分"""
+    scores: Dict[Any, float] = {}
+    hits: Dict[Any, Dict[str, Any]] = {}
+    for hit_list in hit_lists:
+        for rank, hit in enumerate(hit_list, start=1):
+            scores[hit["id"]] = scores.get(hit["id"], 0.0) + 1.0 / (k + rank)
+            hits.setdefault(hit["id"], hit)
+    return _ranked(hits, scores)
+
+
+def weighted_fuse(
+    hit_lists: Sequence[List[Dict[str, Any]]],
+    weights: Sequence[float],
+    metrics: Sequence[str]
+) -> List[Dict[str, Any]]:
+    """加权融合：各路得分按度量类型归一化后加权求和"""
+    scores: Dict[Any, float] = {}
+    hits: Dict[Any, Dict[str, Any]] = {}
+    for hit_list, weight, metric in zip(hit_lists, weights, metrics):
+        normalize = NORMALIZERS[metric]
+        for hit in hit_list:
+            scores[hit["id"]] = scores.get(hit["id"], 0.0) + weight * normalize(hit["distance"])
+            hits.setdefault(hit["id"], hit)
+    return _ranked(hits, scores)
+
+
+def _ranked(hits: Dict[Any, Dict[str, Any]], scores: Dict[Any, float]) -> List[Dict[str, Any]]:
+    return [{**hits[key], "distance": score} for key, score in sorted(scores.items(), key=lambda item: -item[1])]
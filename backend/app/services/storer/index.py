@@ -0,0 +1,105 @@
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+from app.schemas.common_config import ConfigParams
+
+# 自动模式下向量数不超过该值时使用暴力检索（FLAT）：召回率为 1，
+# 在 Milvus Lite 上 10 万条 256 维向量以内比 HNSW / IVF 更快
+AUTO_FLAT_THRESHOLD = 65536
+# 自动模式下向量数超过该值时使用 IVF_SQ8，内存约为 HNSW 的 1/4
+AUTO_SQ_THRESHOLD = 5000000
+# faiss 训练 IVF 时每个聚类中心至少需要的向量数
+MIN_POINTS_PER_LIST = 39
+# 目标召回率 → (HNSW ef, IVF nprobe 占 nlist 的比例)，经验值
+RECALL_LEVELS = [
+    (0.90, 32, 1 / 32),
+    (0.95, 64, 1 / 16),
+    (0.99, 128, 1 / 8),
+    (1.00, 256, 1 / 4),
+]
+
+
+@dataclass
+class IndexPlan:
+    """向量索引的类型和构建参数"""
+    index_type: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def bucket_count(count: int) -> int:
+    """向量数向上取到 4 的幂，集合增长 4 倍以内自动参数不变，避免频繁重建索引"""
+    return 4 ** math.ceil(math.log(max(count, 1), 4))
+
+
+def _recall_level(config: ConfigParams):
+    target_recall = config.get("target_recall", 0.95)
+    for level in RECALL_LEVELS:
+        if target_recall <= level[0]:
+            return level
+    return RECALL_LEVELS[-1]
+
+
+def plan_index(config: ConfigParams, count: int, dimension: int) -> IndexPlan:
+    """按存储配置和集合中的向量数确定索引
+
+    index_type 为 auto 时按向量数选择：少量向量用 FLAT，中等规模用 HNSW，
+    超大规模用 IVF_SQ8；参数未配置（为 0）时按向量数和目标召回率推算。
+
+    Args:
+        config: 存储配置
+        count: 集合中的向量数
+        dimension: 向量维度
+    """
+    count = bucket_count(count)
+    index_type = config.get("index_type", "auto")
+    if index_type == "auto":
+        if count <= AUTO_FLAT_THRESHOLD:
+            index_type = "FLAT"
+        elif count <= AUTO_SQ_THRESHOLD:
+            index_type = "HNSW"
+        else:
+            index_type = "IVF_SQ8"
+
+    if index_type == "FLAT":
+        return IndexPlan("FLAT")
+    if index_type in ("HNSW", "HNSW_SQ"):
+        # 召回率要求高时增大图的度数
+        m = config.get("hnsw_m", 0) or (32 if _recall_level(config)[0] > 0.95 else 16)
+        params = {"M": m, "efConstruction": config.get("hnsw_ef_construction", 0) or max(200, 8 * m)}
+        if index_type == "HNSW_SQ":
+            params["sq_type"] = "SQ8"
+        return IndexPlan(index_type, params)
+    if index_type in ("IVF_FLAT", "IVF_SQ8", "IVF_PQ"):
+        # 聚类数未配置时取 4√n，且不超过向量数能训练的上限
+        nlist = config.get("ivf_nlist", 0) or int(4 * math.sqrt(count))
+        params = {"nlist": max(1, min(nlist, count // MIN_POINTS_PER_LIST, 65536))}
+        if index_type == "IVF_PQ":
+            # 子向量数需整除维度，默认每个子向量 8 维
+            m = config.get("pq_m", 0) or max(1, dimension // 8)
+            if dimension % m:
+                raise ValueError(f"PQ 子向量数 {m} 不能整除向量维度 {dimension}")
+            params.update({"m": m, "nbits": 8})
+        return IndexPlan(index_type, params)
+    raise ValueError(f"不支持的索引类型: {index_type}")
+
+
+def search_params(
+    config: ConfigParams,
+    plan: IndexPlan,
+    limit: int = 1,
+    ef: Optional[int] = None,
+    nprobe: Optional[int] = None
+) -> Dict[str, Any]:
+    """检索参数：优先使用本次检索指定的 ef / nprobe，其次是存储配置，都未指定时按目标召回率推算"""
+    _, default_ef, probe_ratio = _recall_level(config)
+    if plan.index_type in ("HNSW", "HNSW_SQ", "BIN_HNSW"):
+        # ef 不能小于返回的条数
+        return {"ef": max(ef or config.get("hnsw_ef", 0) or default_ef, limit)}
+    if "nlist" in plan.params:
+        nlist = plan.params["nlist"]
+        nprobe = nprobe or config.get("ivf_nprobe", 0) or math.ceil(nlist * probe_ratio)
+        return {"nprobe": max(1, min(nprobe, nlist))}
+    return {}
@@ -0,0 +1,553 @@
+import ast
+import json
+import logging
+import operator
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.schemas.chunk import LangChainChunk
+from app.schemas.common_config import ConfigParams
+from app.services.storer.base import VectorStorer
+from app.services.storer.index import IndexPlan, plan_index, search_params
+from app.services.storer.quantize import Quantizer, get_quantizer
+from app.utils.vectors import load_vectors, save_vectors
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 暴力检索时一次计算的 查询数 × 向量数 上限，批量查询按此分块，限制得分矩阵的内存
+EXACT_BLOCK_SCORES = 1 << 24
+# 每个集合缓存的过滤表达式结果数
+MASK_CACHE_SIZE = 64
+# 本地存储支持的索引类型，其余类型自动模式下换成内存更小的 HNSW_SQ
+LOCAL_INDEX_TYPES = ("FLAT", "HNSW", "HNSW_SQ")
+# 配置量化时使用的索引：int8 为 8 位编码暴力检索（SQ8）或 HNSW_SQ，binary 为二值编码暴力检索或二值 HNSW
+QUANTIZED_INDEX_TYPES = {
+    "int8": {"FLAT": "SQ8", "HNSW": "HNSW_SQ", "HNSW_SQ": "HNSW_SQ"},
+    "binary": {"FLAT": "BIN_FLAT", "HNSW": "BIN_HNSW", "HNSW_SQ": "BIN_HNSW"},
+}
+# 量化索引 → 量化方式；HNSW_SQ 由 faiss 量化，其余由本模块的量化器编码
+PLAN_QUANTIZATION = {"SQ8": "int8", "HNSW_SQ": "int8", "BIN_FLAT": "binary", "BIN_HNSW": "binary"}
+# 未配置重排倍数时的默认值：二值编码的得分较粗，需要更多候选
+RESCORE_FACTORS = {"int8": 2, "binary": 10}
+# 存储报告中测量 recall@k 的 k 和抽样查询数
+RECALL_K = 10
+RECALL_SAMPLE = 100
+# 返回字段
+LOCAL_OUTPUT_FIELDS = ("content", "metadata")
+
+_COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+_NAMED_CONSTANTS = {"true": True, "false": False, "True": True, "False": False}
+
+
+def compile_filter(expr: str) -> Callable[[Dict[str, Any]], bool]:
+    """把过滤表达式编译为对一行（id、content、metadata）求值的函数
+
+    支持 Milvus 过滤表达式中与 Python 语法一致的子集：比较（==、!=、<、<=、>、>=、in、not in）、
+    and / or / not、括号，字段为 id、content 和 metadata["键"]。类型不可比较时结果为假。
+
+    Raises:
+        ValueError: 表达式有语法错误或使用了不支持的写法
+    """
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError:
+        raise ValueError(f"过滤表达式语法错误: {expr}")
+    return _compile_condition(tree.body)
+
+
+def _compile_condition(node: ast.AST) -> Callable[[Dict[str, Any]], bool]:
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_condition(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda row: all(part(row) for part in parts)
+        return lambda row: any(part(row) for part in parts)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        inner = _compile_condition(node.operand)
+        return lambda row: not inner(row)
+    if isinstance(node, ast.Compare):
+        operands = [_compile_value(node.left)] + [_compile_value(value) for value in node.comparators]
+        ops = []
+        for op in node.ops:
+            if type(op) not in _COMPARE_OPS:
+                raise ValueError(f"过滤表达式不支持的运算: {type(op).__name__}")
+            ops.append(_COMPARE_OPS[type(op)])
+
+        def compare(row: Dict[str, Any]) -> bool:
+            left = operands[0](row)
+            for op, operand in zip(ops, operands[1:]):
+                right = operand(row)
+                try:
+                    if not op(left, right):
+                        return False
+                except TypeError:
+                    return False
+                left = right
+            return True
+        return compare
+    raise ValueError(f"过滤表达式不支持的写法: {ast.unparse(node)}")
+
+
+def _compile_value(node: ast.AST) -> Callable[[Dict[str, Any]], Any]:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda row: value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+        value = -node.operand.value
+        return lambda row: value
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = [_compile_value(item) for item in node.elts]
+        return lambda row: [value(row) for value in values]
+    if isinstance(node, ast.Name):
+        if node.id in _NAMED_CONSTANTS:
+            value = _NAMED_CONSTANTS[node.id]
+            return lambda row: value
+        if node.id in ("id", "content", "metadata"):
+            name = node.id
+            return lambda row: row.get(name)
+    if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant):
+        base = _compile_value(node.value)
+        key = node.slice.value
+
+        def lookup(row: Dict[str, Any]) -> Any:
+            value = base(row)
+            return value.get(key) if isinstance(value, dict) else None
+        return lookup
+    raise ValueError(f"过滤表达式不支持的写法: {ast.unparse(node)}")
+
+
+class LocalCollection:
+    """已加载的本地集合：向量矩阵和量化编码以只读内存映射打开，HNSW 索引常驻内存"""
+    def __init__(
+        self,
+        version: str,
+        plan: IndexPlan,
+        vectors: np.ndarray,
+        rows: List[Dict[str, Any]],
+        index=None,
+        codes: Optional[np.ndarray] = None,
+        quantizer: Optional[Quantizer] = None
+    ):
+        self.version = version
+        self.plan = plan
+        self.vectors = vectors
+        self.rows = rows
+        self.index = index
+        self.codes = codes
+        self.quantizer = quantizer
+        self._masks: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    def mask(self, expr: str) -> np.ndarray:
+        """满足过滤表达式的行，结果按表达式缓存"""
+        with self._lock:
+            if expr in self._masks:
+                self._masks.move_to_end(expr)
+                return self._masks[expr]
+        condition = compile_filter(expr)
+        mask = np.fromiter((condition(row) for row in self.rows), dtype=bool, count=len(self.rows))
+        with self._lock:
+            self._masks[expr] = mask
+            while len(self._masks) > MASK_CACHE_SIZE:
+                self._masks.popitem(last=False)
+        return mask
+
+
+# 进程内已加载的集合：目录 → 集合，版本变化（重新写入）后重新加载
+_collections: Dict[str, LocalCollection] = {}
+_collections_lock = threading.Lock()
+
+
+def _import_faiss():
+    try:
+        import faiss
+    except ImportError:
+        raise ValueError("本地存储使用 HNSW 索引需要安装 faiss-cpu")
+    return faiss
+
+
+def _uses_quantizer(plan: IndexPlan) -> bool:
+    """索引需要本模块的量化器（HNSW_SQ 由 faiss 自行量化）"""
+    return plan.index_type in PLAN_QUANTIZATION and plan.index_type != "HNSW_SQ"
+
+
+def top_k_rows(
+    score: Callable[[np.ndarray], np.ndarray],
+    count: int,
+    queries: np.ndarray,
+    k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """逐批计算查询对全部 count 行的得分，取得分最高的 k 行
+
+    Args:
+        score: 一批查询 → 形状为 (查询数, count) 的得分
+        count: 行数
+        queries: 查询向量
+        k: 每个查询返回的行数
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (得分, 行号)，形状均为 (查询数, min(k, count))，按得分从高到低
+    """
+    k = min(k, count)
+    if k == 0:
+        empty = np.zeros((len(queries), 0))
+        return empty.astype(np.float32), empty.astype(np.int64)
+    scores_out, rows_out = [], []
+    step = max(1, EXACT_BLOCK_SCORES // count)
+    for start in range(0, len(queries), step):
+        scores = score(queries[start:start + step])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        rows_out.append(np.take_along_axis(top, order, axis=1))
+        scores_out.append(np.take_along_axis(top_scores, order, axis=1))
+    return np.concatenate(scores_out), np.concatenate(rows_out)
+
+
+def exact_top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """暴力检索：内积得分最高的 k 行，返回值同 top_k_rows"""
+    return top_k_rows(lambda block: block @ matrix.T, len(matrix), queries, k)
+
+
+def rescore(vectors: np.ndarray, queries: np.ndarray, positions: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """用完整精度的向量重新计算候选行的得分，取前 k 个；行号为 -1 表示没有候选"""
+    scores = np.full(positions.shape, -np.inf, dtype=np.float32)
+    for row, (query, candidates) in enumerate(zip(queries, positions)):
+        valid = candidates >= 0
+        scores[row, valid] = np.asarray(vectors[candidates[valid]], dtype=np.float32) @ query
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    scores = np.take_along_axis(scores, order, axis=1)
+    positions = np.where(np.isfinite(scores), np.take_along_axis(positions, order, axis=1), -1)
+    return scores, positions
+
+
+class LocalStorer(VectorStorer):
+    """进程内向量存储：每个文档一个目录，不依赖外部向量库
+
+    向量保存为 float32 的 .npy 矩阵并以内存映射方式检索，分块内容和元数据保存为 JSON；
+    FLAT 索引用矩阵乘法暴力检索（召回率为 1，可作为其他索引的召回基准），
+    HNSW / HNSW_SQ 索引由 faiss 构建并与矩阵一起保存。只支持向量检索，检索方式为混合检索时也只检索向量。
+
+    配置了量化（int8 / binary）时，另存一份量化编码，检索在编码上进行，
+    再用磁盘上的完整向量对 top_k × rescore_factor 个候选重排；常驻内存的是编码，完整向量只读取候选行。
+
+    每次 optimize 以新版本号写入全部文件，最后替换 manifest.json，
+    正在检索旧版本的请求不受影响，之后的检索加载新版本。
+    """
+    def __init__(self, config: ConfigParams, collection_name: str, document_id: Optional[int] = None):
+        """
+        Args:
+            config: 存储配置
+            collection_name: 集合名，即存储目录名
+            document_id: 文档ID
+        """
+        self.config = config
+        self.collection_name = collection_name
+        self.document_id = document_id
+        self.path = os.path.join(settings.VECTOR_DB_DIR, collection_name)
+        self._dimension: Optional[int] = None
+        # 尚未保存的写入和删除，optimize 时合并
+        self._pending: Dict[int, Tuple[Dict[str, Any], np.ndarray]] = {}
+        self._deleted: set = set()
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, "manifest.json")
+
+    def _manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _files(self, version: str) -> Dict[str, str]:
+        return {
+            "vectors": os.path.join(self.path, f"vectors.{version}.npy"),
+            "rows": os.path.join(self.path, f"rows.{version}.json"),
+            "index": os.path.join(self.path, f"index.{version}.faiss"),
+            "codes": os.path.join(self.path, f"codes.{version}.npy"),
+            "quantizer": os.path.join(self.path, f"quantizer.{version}.npy"),
+        }
+
+    def _collection(self) -> Optional[LocalCollection]:
+        """加载集合，已加载且版本未变时直接返回"""
+        manifest = self._manifest()
+        if manifest is None:
+            return None
+        with _collections_lock:
+            collection = _collections.get(self.path)
+            if collection is not None and collection.version == manifest["version"]:
+                return collection
+        collection = self._load(manifest["version"], IndexPlan(**manifest["plan"]))
+        with _collections_lock:
+            _collections[self.path] = collection
+        return collection
+
+    def _load(self, version: str, plan: IndexPlan) -> LocalCollection:
+        files = self._files(version)
+        with open(files["rows"], encoding="utf-8") as f:
+            rows = json.load(f)
+        index = codes = quantizer = None
+        if plan.index_type == "BIN_HNSW":
+            index = _import_faiss().read_index_binary(files["index"])
+        elif plan.index_type in ("HNSW", "HNSW_SQ"):
+            index = _import_faiss().read_index(files["index"])
+        if _uses_quantizer(plan):
+            quantizer = get_quantizer(PLAN_QUANTIZATION[plan.index_type])(np.load(files["quantizer"]))
+        if plan.index_type in ("SQ8", "BIN_FLAT"):
+            codes = load_vectors(files["codes"])
+        return LocalCollection(version, plan, load_vectors(files["vectors"]), rows, index, codes, quantizer)
+
+    def clear(self) -> None:
+        """删除集合目录"""
+        with _collections_lock:
+            _collections.pop(self.path, None)
+        shutil.rmtree(self.path, ignore_errors=True)
+        self._pending.clear()
+        self._deleted.clear()
+
+    def prepare(self, dimension: int, incremental: bool = True) -> bool:
+        manifest = self._manifest()
+        self._dimension = dimension
+        if incremental and manifest is not None and manifest["dimension"] == dimension:
+            return True
+        self.clear()
+        return False
+
+    def _write_rows(self, chunks: List[LangChainChunk], vectors: np.ndarray, keys: List[int], upsert: bool) -> None:
+        for chunk, vector, key in zip(chunks, vectors, keys):
+            # 分块序号随前面分块的增删变化，不写入向量库，由存储结果记录
+            row = {"id": key, "content": chunk.page_content, "metadata": chunk.metadata.model_dump(exclude={"chunk_id"})}
+            self._pending[key] = (row, vector)
+            self._deleted.discard(key)
+
+    def delete(self, ids: Iterable[int]) -> int:
+        ids = list(ids)
+        for key in ids:
+            self._pending.pop(key, None)
+        self._deleted.update(ids)
+        return len(ids)
+
+    def _plan(self, count: int, dimension: int) -> IndexPlan:
+        """按向量数确定索引，配置了量化时换成对应的量化索引"""
+        plan = plan_index(self.config, count, dimension)
+        if plan.index_type not in LOCAL_INDEX_TYPES:
+            if self.config.get("index_type", "auto") != "auto":
+                raise ValueError(f"本地存储不支持索引类型 {plan.index_type}，请选择 FLAT 或 HNSW")
+            # 超大规模时自动选择的 IVF_SQ8 换成同样量化存储的 HNSW_SQ
+            plan = plan_index(self.config.model_copy(
+                update={"default_config": {**self.config.default_config, "index_type": "HNSW_SQ"}}
+            ), count, dimension)
+        quantization = self.config.get("quantization", "none")
+        if quantization == "none":
+            return plan
+        index_type = QUANTIZED_INDEX_TYPES[quantization][plan.index_type]
+        params = {key: value for key, value in plan.params.items() if key != "sq_type"}
+        if index_type == "HNSW_SQ":
+            params["sq_type"] = "SQ8"
+        return IndexPlan(index_type, params)
+
+    def index_plan(self) -> IndexPlan:
+        manifest = self._manifest()
+        return IndexPlan(**manifest["plan"]) if manifest else IndexPlan("FLAT")
+
+    def quantization_report(self) -> Optional[Dict[str, Any]]:
+        manifest = self._manifest()
+        return manifest.get("report") if manifest else None
+
+    def optimize(self) -> IndexPlan:
+        """合并本次的写入和删除，保存新版本、按向量数重建索引，并测量压缩比和召回率"""
+        current = self._collection()
+        dimension = self._dimension or (current.dimension if current else None)
+        if dimension is None:
+            raise ValueError("本地集合尚未准备，无法确定向量维度")
+        removed = self._deleted | set(self._pending)
+        keep = [position for position, row in enumerate(current.rows) if row["id"] not in removed] if current else []
+        plan = self._plan(len(keep) + len(self._pending), dimension)
+        if current and not self._pending and len(keep) == len(current.rows) and plan == current.plan:
+            return plan
+
+        rows = [current.rows[position] for position in keep] if current else []
+        rows.extend(row for row, _ in self._pending.values())
+        parts = [np.asarray(current.vectors[keep], dtype=np.float32)] if current and keep else []
+        if self._pending:
+            parts.append(np.stack([vector for _, vector in self._pending.values()]).astype(np.float32))
+        vectors = np.concatenate(parts) if parts else np.zeros((0, dimension), dtype=np.float32)
+
+        version = uuid.uuid4().hex
+        files = self._files(version)
+        os.makedirs(self.path, exist_ok=True)
+        save_vectors(files["vectors"], vectors)
+        with open(files["rows"], "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False)
+        codes = None
+        if _uses_quantizer(plan):
+            quantizer = get_quantizer(PLAN_QUANTIZATION[plan.index_type]).fit(
+                vectors if len(vectors) else np.zeros((1, dimension), dtype=np.float32)
+            )
+            np.save(files["quantizer"], quantizer.params)
+            codes = quantizer.encode(vectors)
+            if plan.index_type != "BIN_HNSW":
+                np.save(files["codes"], codes)
+        if plan.index_type == "BIN_HNSW":
+            _import_faiss().write_index_binary(self._build_index(plan, vectors, codes), files["index"])
+        elif plan.index_type in ("HNSW", "HNSW_SQ"):
+            _import_faiss().write_index(self._build_index(plan, vectors, codes), files["index"])
+        del vectors, codes
+
+        collection = self._load(version, plan)
+        report = self._measure(collection)
+        tmp_path = f"{self._manifest_path()}.{version}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "dimension": dimension, "count": len(rows), "plan": plan.to_dict(),
+                       "report": report}, f)
+        os.replace(tmp_path, self._manifest_path())
+        with _collections_lock:
+            _collections[self.path] = collection
+        if current:
+            for path in self._files(current.version).values():
+                if os.path.exists(path):
+                    os.remove(path)
+        self._pending.clear()
+        self._deleted.clear()
+        logger.info(f"保存本地集合: collection={self.collection_name}, count={len(rows)}, {plan}, {report}")
+        return plan
+
+    @staticmethod
+    def _build_index(plan: IndexPlan, vectors: np.ndarray, codes: Optional[np.ndarray] = None):
+        faiss = _import_faiss()
+        dimension = vectors.shape[1]
+        if plan.index_type == "BIN_HNSW":
+            index = faiss.IndexBinaryHNSW(codes.shape[1] * 8, plan.params["M"])
+            vectors = codes
+        elif plan.index_type == "HNSW_SQ":
+            index = faiss.IndexHNSWSQ(dimension, faiss.ScalarQuantizer.QT_8bit, plan.params["M"],
+                                      faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWFlat(dimension, plan.params["M"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = plan.params["efConstruction"]
+        if len(vectors):
+            vectors = np.ascontiguousarray(vectors)
+            if not index.is_trained:
+                index.train(vectors)
+            index.add(vectors)
+        return index
+
+    def _measure(self, collection: LocalCollection) -> Dict[str, Any]:
+        """存储报告：每个向量常驻内存的编码大小、相对 float32 的压缩比，以及 recall@k
+
+        召回率以库中抽样的向量作为查询，比较未过滤检索与暴力检索的前 k 个结果；FLAT 索引为 1。
+        """
+        dimension = collection.dimension
+        quantization = PLAN_QUANTIZATION.get(collection.plan.index_type, "none")
+        code_bytes = get_quantizer(quantization).code_bytes(dimension) if quantization != "none" else dimension * 4
+        recall = 1.0
+        count = len(collection.rows)
+        if collection.plan.index_type != "FLAT" and count:
+            sample = np.sort(np.random.default_rng(0).choice(count, size=min(RECALL_SAMPLE, count), replace=False))
+            queries = np.asarray(collection.vectors[sample], dtype=np.float32)
+            _, expected = exact_top_k(collection.vectors, queries, RECALL_K)
+            _, actual = self._search_positions(collection, queries, RECALL_K)
+            found = sum(len(set(row.tolist()) & set(truth.tolist())) for row, truth in zip(actual, expected))
+            recall = round(found / expected.size, 4)
+        return {
+            "quantization": quantization,
+            "bytes_per_vector": code_bytes,
+            "compression": round(dimension * 4 / code_bytes, 2),
+            f"recall@{RECALL_K}": recall,
+        }
+
+    def _search_positions(
+        self,
+        collection: LocalCollection,
+        vectors: np.ndarray,
+        top_k: int,
+        ef: Optional[int] = None,
+        nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """未过滤的检索：按索引或量化编码取候选，量化时用完整向量重排"""
+        count = len(collection.rows)
+        quantizer = collection.quantizer
+        quantization = PLAN_QUANTIZATION.get(collection.plan.index_type)
+        factor = (int(self.config.get("rescore_factor", 0)) or RESCORE_FACTORS[quantization]) if quantization else 1
+        fetch = min(top_k * factor, count)
+        if collection.index is not None and count:
+            params = search_params(self.config, collection.plan, fetch, ef, nprobe)
+            search_options = _import_faiss().SearchParametersHNSW(efSearch=params["ef"])
+            if collection.plan.index_type == "BIN_HNSW":
+                distances, positions = collection.index.search(quantizer.encode(vectors), fetch, params=search_options)
+                scores = 1 - 2 * distances.astype(np.float32) / quantizer.params.shape[1]
+            else:
+                scores, positions = collection.index.search(vectors, fetch, params=search_options)
+        elif collection.codes is not None:
+            scores, positions = top_k_rows(lambda block: quantizer.scores(collection.codes, block), count, vectors, fetch)
+        else:
+            return exact_top_k(collection.vectors, vectors, top_k)
+        if factor > 1:
+            return rescore(collection.vectors, vectors, positions, top_k)
+        return scores[:, :top_k], positions[:, :top_k]
+
+    def search_many(
+        self,
+        queries: List[str],
+        vectors: np.ndarray,
+        top_k: int = 10,
+        filter: str = "",
+        output_fields: Optional[List[str]] = None,
+        ef: Optional[int] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """批量检索，参数同 search
+
+        有过滤条件时在满足条件的行中用完整向量暴力检索，结果是精确的；
+        否则按集合的索引检索（FLAT 为暴力检索，HNSW 按 ef 近似检索，量化索引检索后重排）。
+        """
+        if not queries:
+            return []
+        collection = self._collection()
+        if collection is None:
+            raise Exception(f"Collection '{self.collection_name}' not found. Please ensure the document has been processed for vector storage.")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != collection.dimension:
+            raise ValueError(f"查询向量维度 {vectors.shape[-1]} 与向量库维度 {collection.dimension} 不一致，请使用文档的嵌入模型")
+        output_fields = list(output_fields or LOCAL_OUTPUT_FIELDS)
+        unknown = [name for name in output_fields if name not in LOCAL_OUTPUT_FIELDS]
+        if unknown:
+            raise ValueError(f"本地存储不支持返回字段: {', '.join(unknown)}")
+
+        if filter.strip():
+            candidates = np.flatnonzero(collection.mask(filter))
+            scores, positions = exact_top_k(collection.vectors[candidates], vectors, top_k)
+            positions = candidates[positions]
+        else:
+            scores, positions = self._search_positions(collection, vectors, top_k, ef, nprobe)
+
+        results = []
+        for query_scores, query_positions in zip(scores, positions):
+            hits = []
+            for score, position in zip(query_scores.tolist(), query_positions.tolist()):
+                if position < 0:
+                    continue
+                row = collection.rows[position]
+                hits.append({"id": row["id"], "distance": score,
+                             "entity": {name: row[name] for name in output_fields}})
+            results.append(hits)
+        return results
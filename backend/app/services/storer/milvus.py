@@ -1,104 +1,459 @@
-from pymilvus import Function, FunctionType, MilvusClient, CollectionSchema, FieldSchema, DataType, IndexType, Collection
+from pymilvus import (
+    AnnSearchRequest, Function, FunctionType, MilvusClient, CollectionSchema, FieldSchema, DataType, IndexType, Collection,
+    RRFRanker, WeightedRanker
+)
+from pymilvus.client.types import LoadState
 from app.schemas.common_config import ConfigParams
-from typing import List
+from app.schemas.configuration.store import get_default_config
+from typing import Any, Dict, Iterable, List, Optional
 from langchain_core.documents import Document
 from app.schemas.chunk import LangChainChunk
 from app.schemas.embedding import LangChainEmbedding
-from app.schemas.store import LangChainStore, StoreMetaData
 import numpy as np
+import json
+import logging
+import threading
+from app.core.config import settings
+from app.services.storer.base import ChunkKeyer, SyncStats, VectorStorer, check_filter
+from app.services.storer.fusion import rrf_fuse, weighted_fuse
+from app.services.storer.local import LocalStorer
+from app.services.storer.index import IndexPlan, plan_index, search_params
 
-class MilvusStorer:
-    def __init__(self, config: ConfigParams, collection_name: str):
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 按主键查询、删除时每批的条数
+QUERY_BATCH_SIZE = 5000
+# 混合检索时每路召回的候选数下限
+HYBRID_CANDIDATES = 50
+# 集合属性中记录索引参数的键（Milvus Lite 的 describe_index 不返回构建参数）
+INDEX_PLAN_PROPERTY = "rage.index_plan"
+
+class MilvusClientManager:
+    """进程内共享的 Milvus 客户端
+
+    应用启动时打开一次，之后所有请求和后台任务复用同一个客户端：客户端底层的
+    gRPC 连接支持多线程并发请求，不必每次请求都重新打开 Milvus Lite 数据文件。
+    """
+    def __init__(self):
+        # Milvus Lite 并发创建连接时会失败，创建客户端需要串行
+        self._lock = threading.Lock()
+        self._client: Optional[MilvusClient] = None
+
+    def open(self) -> MilvusClient:
+        """打开客户端，已打开时直接返回"""
+        with self._lock:
+            if self._client is None:
+                self._client = MilvusClient(uri=settings.MILVUS_URI, token=settings.MILVUS_TOKEN or "")
+                logger.info(f"已连接 Milvus: {settings.MILVUS_URI}")
+            return self._client
+
+    def get(self) -> MilvusClient:
+        """获取共享客户端，尚未打开时（如命令行、测试）按需打开"""
+        client = self._client
+        return client if client is not None else self.open()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+                logger.info("已关闭 Milvus 连接")
+
+milvus_manager = MilvusClientManager()
+
+def is_milvus_lite() -> bool:
+    """URI 为本地 .db 文件时使用 Milvus Lite"""
+    return settings.MILVUS_URI.endswith(".db")
+
+def shared_collection_name(dimension: int) -> str:
+    """共享集合按向量维度区分，同一维度的文档写入同一个集合"""
+    return f"{settings.MILVUS_SHARED_COLLECTION}_{dimension}"
+
+def shared_index_config() -> ConfigParams:
+    """共享集合的索引配置
+
+    共享集合的索引由所有文档共用，按集合级的配置规划，不随写入文档的存储配置变化，
+    否则不同配置的文档会来回重建索引。
+    """
+    config = get_default_config().model_copy(deep=True)
+    config.default_config.update({
+        "index_type": settings.MILVUS_SHARED_INDEX_TYPE,
+        "target_recall": settings.MILVUS_SHARED_TARGET_RECALL,
+    })
+    return config
+
+def rebuild_shared_indexes(
+    collection_names: Iterable[str],
+    client: Optional[MilvusClient] = None
+) -> Dict[str, IndexPlan]:
+    """按集合中的向量数重建共享集合的索引
+
+    重建期间集合不可检索，应在维护时执行（python -m app.cli rebuild-index），不在请求中调用。
+
+    Args:
+        collection_names: 共享集合名，不存在的集合跳过
+        client: Milvus 客户端，默认使用共享客户端
+
+    Returns:
+        Dict[str, IndexPlan]: 每个共享集合重建后的索引
+    """
+    client = client or milvus_manager.get()
+    config = shared_index_config()
+    return {name: MilvusStorer(config, name, client=client).rebuild_index()
+            for name in sorted(set(collection_names)) if client.has_collection(name)}
+
+def get_storer(
+    config: ConfigParams,
+    document_id: int,
+    dimension: Optional[int] = None,
+    collection_name: Optional[str] = None
+) -> VectorStorer:
+    """按存储配置获取文档的存储器
+
+    store_method 为 local 时使用进程内存储，每个文档一个目录；
+    否则使用 Milvus：collection_mode 为 shared 时所有文档写入共享集合，以 document_id 为分区键，
+    其余情况（包括没有该配置的旧文档）每个文档一个集合。
+
+    Args:
+        config: 存储配置
+        document_id: 文档ID
+        dimension: 向量维度，写入共享集合时用于确定集合名
+        collection_name: 已记录的集合名，检索时使用
+    """
+    if config.get("store_method", "milvus") == "local":
+        return LocalStorer(config, collection_name or f"local_doc_{document_id}", document_id=document_id)
+    if config.get("collection_mode", "per_document") == "shared":
+        if not collection_name and dimension is None:
+            raise ValueError("共享集合需要指定向量维度")
+        return MilvusStorer(config, collection_name or shared_collection_name(dimension), document_id=document_id)
+    return MilvusStorer(config, collection_name or f"doc_{document_id}")
+
+class MilvusStorer(VectorStorer):
+    def __init__(
+        self,
+        config: ConfigParams,
+        collection_name: str,
+        client: Optional[MilvusClient] = None,
+        document_id: Optional[int] = None
+    ):
+        """
+        Args:
+            config: 存储配置
+            collection_name: 集合名
+            client: Milvus 客户端，默认使用共享客户端
+            document_id: 共享集合中的文档ID，写入时作为分区键，检索和删除时按它过滤
+        """
         self.config = config
-        self.client = MilvusClient("./milvus.db")
+        self.client = client or milvus_manager.get()
         self.collection_name = collection_name
+        self.document_id = document_id
 
     def delete_collection(self):
         self.client.drop_collection(self.collection_name)
 
-    def create_collection(self):
+    def clear(self) -> None:
+        """删除本文档的全部向量：共享集合中按文档过滤删除，单文档集合直接删除集合"""
+        if self.document_id is None:
+            self.delete_collection()
+        elif self.client.has_collection(self.collection_name):
+            self.client.delete(collection_name=self.collection_name, filter=self._filter())
+
+    def _filter(self, extra: str = "") -> str:
+        """本文档的过滤条件，与额外的过滤表达式同时生效"""
+        conditions = [f"(document_id == {self.document_id})"] if self.document_id is not None else []
+        if extra.strip():
+            conditions.append(f"({check_filter(extra)})")
+        return " and ".join(conditions)
+
+    def _ensure_loaded(self) -> None:
+        """检索前加载集合，进程重启后集合处于未加载状态"""
+        if self.client.get_load_state(self.collection_name)["state"] != LoadState.Loaded:
+            self.client.load_collection(self.collection_name)
+
+    def create_collection(self, dimension: int = 1024):
         schema = CollectionSchema(
             fields=[
-                FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-                FieldSchema(name="content", dtype=DataType.VARCHAR, enable_analyzer=True, max_length=1024, description="Store content"),
+                FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
+                FieldSchema(name="content", dtype=DataType.VARCHAR, enable_analyzer=True, max_length=1024,
+                            analyzer_params={"tokenizer": self.config.get("bm25_analyzer", "standard")},
+                            description="Store content"),
                 FieldSchema(name="metadata", dtype=DataType.JSON, description="Store metadata"),
-                FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=1024, description="Store vector"),
-                # FieldSchema(name="spare", dtype=DataType.SPARSE_FLOAT_VECTOR, description="Store spare"),
+                FieldSchema(name="vector", dtype=DataType.FLOAT_VECTOR, dim=dimension, description="Store vector"),
+                # 由 BM25 函数根据 content 生成，写入时不需要提供
+                FieldSchema(name="sparse", dtype=DataType.SPARSE_FLOAT_VECTOR, description="Store sparse"),
             ],
             description="Store collection",
         )
-        # bm25_function = Function(
-        #     name="bm25",
-        #     input_field_names=["content"],
-        #     output_field_names=["spare"],
-        #     description="BM25 function",
-        #     function_type=FunctionType.BM25,
-        # )
-        # schema.add_function(bm25_function)
+        if self.document_id is not None:
+            # 共享集合：按文档ID做分区键，按文档检索时只扫描对应分区
+            schema.add_field(field_name="document_id", datatype=DataType.INT64, is_partition_key=True)
+            schema.num_partitions = settings.MILVUS_NUM_PARTITIONS
+        bm25_function = Function(
+            name="bm25",
+            input_field_names=["content"],
+            output_field_names=["sparse"],
+            description="BM25 function",
+            function_type=FunctionType.BM25,
+        )
+        schema.add_function(bm25_function)
 
-        index_params = self.client.prepare_index_params()
-        # index_params.add_index(
-        #     field_name="spare",
-        #     index_type="SPARSE_INVERTED_INDEX",
-        #     metric_type="BM25",
-        #     params = {
-        #         "inverted_index_algo":"DAAT_MAXSCORE",
-        #         "bm25_k1":1.2,
-        #         "bm25_b":0.75,
-        #     }
-        # )
+        # 空集合先按向量数为 0 建索引，写入后由 optimize 按实际向量数调整
+        plan = plan_index(self._index_config(), 0, dimension)
+        index_params = self._index_params(plan)
         index_params.add_index(
-            field_name="vector",
-            index_type="IVF_FLAT",
-            metric_type="IP",
+            field_name="sparse",
+            index_type="SPARSE_INVERTED_INDEX",
+            metric_type="BM25",
             params = {
-                "nlist": 1024,
+                "inverted_index_algo":"DAAT_MAXSCORE",
+                "bm25_k1":1.2,
+                "bm25_b":0.75,
             }
         )
         self.client.create_collection(self.collection_name, schema=schema, index_params=index_params)
+        self._save_plan(plan)
+
+    def _index_params(self, plan: IndexPlan):
+        """稠密向量的索引参数"""
+        index_params = self.client.prepare_index_params()
+        index_params.add_index(
+            field_name="vector",
+            index_type=plan.index_type,
+            metric_type="IP",
+            params=plan.params,
+        )
+        return index_params
+
+    def _save_plan(self, plan: IndexPlan) -> None:
+        self.client.alter_collection_properties(
+            self.collection_name, properties={INDEX_PLAN_PROPERTY: json.dumps(plan.to_dict())}
+        )
+
+    def index_plan(self, description: Optional[Dict[str, Any]] = None) -> IndexPlan:
+        """集合当前的索引；没有记录时（旧集合）只知道索引类型"""
+        description = description or self.client.describe_collection(self.collection_name)
+        plan = description.get("properties", {}).get(INDEX_PLAN_PROPERTY)
+        if plan:
+            return IndexPlan(**json.loads(plan))
+        return IndexPlan(self.client.describe_index(self.collection_name, "vector")["index_type"])
+
+    def _index_config(self) -> ConfigParams:
+        """规划索引使用的配置：共享集合使用集合级的配置，单文档集合使用文档的存储配置"""
+        return shared_index_config() if self.document_id is not None else self.config
+
+    def optimize(self) -> IndexPlan:
+        """写入完成后落盘，单文档集合按集合中的向量数调整索引
 
-    def insert(self, chunks: List[LangChainChunk], embedding: List[LangChainEmbedding]) ->List[LangChainStore]:
-        datas = []
-        for chunk, embd in zip(chunks, embedding):
-            data = {
+        Milvus Lite 只对落盘的段建索引，未落盘的数据检索时逐条比较。
+        重建索引期间集合不可检索，共享集合上其他文档的检索会失败，
+        因此共享集合只落盘，索引需要调整时记录日志，由维护命令重建。
+        """
+        if self.document_id is None:
+            return self.rebuild_index()
+        self.client.flush(self.collection_name)
+        current = self.index_plan()
+        count = self.client.get_collection_stats(self.collection_name)["row_count"]
+        plan = plan_index(self._index_config(), count, self._dimension())
+        if plan != current:
+            logger.warning(f"共享集合的索引需要重建，请在维护时执行 python -m app.cli rebuild-index: "
+                           f"collection={self.collection_name}, count={count}, {current} -> {plan}")
+        return current
+
+    def rebuild_index(self) -> IndexPlan:
+        """落盘后按集合中的向量数重建索引，索引类型或参数不变时不重建"""
+        self.client.flush(self.collection_name)
+        count = self.client.get_collection_stats(self.collection_name)["row_count"]
+        plan = plan_index(self._index_config(), count, self._dimension())
+        current = self.index_plan()
+        if plan != current:
+            logger.info(f"重建索引: collection={self.collection_name}, count={count}, {current} -> {plan}")
+            self.client.release_collection(self.collection_name)
+            self.client.drop_index(self.collection_name, "vector")
+            self.client.create_index(self.collection_name, self._index_params(plan))
+            self._save_plan(plan)
+        return plan
+
+    def _dimension(self, description: Optional[Dict[str, Any]] = None) -> int:
+        description = description or self.client.describe_collection(self.collection_name)
+        vector_field = next(field for field in description["fields"] if field["name"] == "vector")
+        return vector_field["params"]["dim"]
+
+    def is_compatible(self, dimension: int) -> bool:
+        """集合已存在、使用稳定主键且向量维度一致时可以增量写入"""
+        if not self.client.has_collection(self.collection_name):
+            return False
+        description = self.client.describe_collection(self.collection_name)
+        if description.get("auto_id"):
+            return False
+        vector_field = next((field for field in description["fields"] if field["name"] == "vector"), None)
+        return vector_field is not None and vector_field.get("params", {}).get("dim") == dimension
+
+    def prepare(self, dimension: int, incremental: bool = True) -> bool:
+        """准备集合：可增量写入时保留，否则删除重建
+
+        Returns:
+            bool: 是否保留了已有集合
+        """
+        if self.document_id is not None and self.client.has_collection(self.collection_name):
+            # 共享集合不删除，重建时只删除本文档的向量
+            if incremental:
+                return True
+            self.clear()
+            return False
+        if incremental and self.is_compatible(dimension):
+            return True
+        self.delete_collection()
+        self.create_collection(dimension)
+        return False
+
+    def _rows(self, chunks: List[LangChainChunk], vectors, keys: List[int]) -> List[Dict[str, Any]]:
+        rows = []
+        for chunk, vector, key in zip(chunks, vectors, keys):
+            row = {
+                "id": key,
                 "content": chunk.page_content,
-                "metadata": chunk.metadata.model_dump(),
-                "vector": embd.embedding,
+                # 分块序号随前面分块的增删变化，不写入向量库，由存储结果记录
+                "metadata": chunk.metadata.model_dump(exclude={"chunk_id"}),
+                "vector": vector,
             }
-            datas.append(data)
+            if self.document_id is not None:
+                row["document_id"] = self.document_id
+            rows.append(row)
+        return rows
+
+    def _write_rows(self, chunks: List[LangChainChunk], vectors: np.ndarray, keys: List[int], upsert: bool) -> None:
+        rows = self._rows(chunks, vectors, keys)
+        if upsert:
+            self.client.upsert(collection_name=self.collection_name, data=rows)
+        else:
+            self.client.insert(collection_name=self.collection_name, data=rows)
 
-        self.client.insert(collection_name=self.collection_name, data=datas)
-        return [LangChainStore(content="",
-                               metadata=StoreMetaData.model_validate(chunk.metadata.model_dump()))
-                                        for chunk in chunks]
+    def delete(self, ids: Iterable[int]) -> int:
+        """按主键删除向量"""
+        ids = list(ids)
+        for start in range(0, len(ids), QUERY_BATCH_SIZE):
+            self.client.delete(collection_name=self.collection_name, ids=ids[start:start + QUERY_BATCH_SIZE])
+        return len(ids)
 
-    def search(self, query: str) -> str:
-        embd = np.random.rand(1024).tolist()
+    def search_many(
+        self,
+        queries: List[str],
+        vectors: np.ndarray,
+        top_k: int = 10,
+        filter: str = "",
+        output_fields: Optional[List[str]] = None,
+        ef: Optional[int] = None,
+        nprobe: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """批量检索：所有查询在一次请求中检索，参数同 search
+
+        Returns:
+            List[List[Dict[str, Any]]]: 每个查询的命中，顺序与 queries 一致
+        """
+        if not queries:
+            return []
         try:
-            result = self.client.search(
-                collection_name=self.collection_name,
-                anns_field="vector",
-                data=[embd],
-                limit=1,
-                output_fields=["content"],
-                search_params={"metric_type": "IP"},
-            )
-            # import pdb;pdb.set_trace()
-            # [[]]
-            if result == [[]]:
-                return "not found"
-            else:
-                return result[0][0]["content"]
+            self._ensure_loaded()
+            description = self.client.describe_collection(self.collection_name)
+            dimension = self._dimension(description)
+            vectors = np.asarray(vectors, dtype=np.float32)
+            if vectors.ndim != 2 or vectors.shape[1] != dimension:
+                raise ValueError(f"查询向量维度 {vectors.shape[-1]} 与向量库维度 {dimension} 不一致，请使用文档的嵌入模型")
+            output_fields = list(output_fields or ["content", "metadata"])
+            if self.document_id is not None:
+                output_fields.append("document_id")
+            dense_params = {
+                "metric_type": "IP",
+                "params": search_params(self.config, self.index_plan(description), top_k, ef, nprobe),
+            }
+            hit_lists = self._search_hits(queries, vectors.tolist(), top_k, self._filter(filter), output_fields,
+                                          dense_params, description)
+            if self.document_id is None:
+                return hit_lists
+            # 共享集合中再按命中的文档ID过滤一次，过滤表达式出错时也不会返回其他文档的分块
+            return [[hit for hit in hits if hit["entity"].get("document_id") == self.document_id]
+                    for hits in hit_lists]
+        except ValueError:
+            raise
         except Exception as e:
             if "collection not found" in str(e):
                 raise Exception(f"Collection '{self.collection_name}' not found. Please ensure the document has been processed for vector storage.")
             else:
                 raise Exception(f"Search failed: {str(e)}")
 
+    def _search_hits(
+        self,
+        queries: List[str],
+        vectors: List[List[float]],
+        limit: int,
+        filter: str,
+        output_fields: List[str],
+        dense_params: Dict[str, Any],
+        description: Dict[str, Any]
+    ) -> List[List[Dict[str, Any]]]:
+        """检索一组查询，返回每个查询按得分排序的命中
+
+        search_mode 为 hybrid 且集合有 BM25 稀疏字段时，同时检索稠密向量和 BM25，
+        按 fusion 配置（倒数排名或加权）融合；旧集合没有稀疏字段时只检索稠密向量。
+        """
+        hybrid = (self.config.get("search_mode", "dense") == "hybrid" and all(query.strip() for query in queries)
+                  and any(field["name"] == "sparse" for field in description["fields"]))
+        if not hybrid:
+            return [list(hits) for hits in self.client.search(
+                collection_name=self.collection_name,
+                anns_field="vector",
+                data=vectors,
+                filter=filter,
+                limit=limit,
+                output_fields=output_fields,
+                search_params=dense_params,
+            )]
+
+        # 每路多取一些候选，融合后再截断
+        candidates = max(limit, HYBRID_CANDIDATES)
+        sparse_params = {"metric_type": "BM25"}
+        if not is_milvus_lite():
+            requests = [
+                AnnSearchRequest(data=vectors, anns_field="vector", param=dense_params, limit=candidates, expr=filter),
+                AnnSearchRequest(data=queries, anns_field="sparse", param=sparse_params, limit=candidates, expr=filter),
+            ]
+            return [list(hits) for hits in self.client.hybrid_search(
+                collection_name=self.collection_name,
+                reqs=requests,
+                ranker=self._ranker(),
+                limit=limit,
+                output_fields=output_fields,
+            )]
+
+        # Milvus Lite 不支持 hybrid_search，两路分别批量检索后在本地按同样的规则融合
+        dense_hits, sparse_hits = [
+            self.client.search(collection_name=self.collection_name, anns_field=field, data=data,
+                               filter=filter, limit=candidates, output_fields=output_fields,
+                               search_params=params)
+            for field, data, params in (("vector", vectors, dense_params), ("sparse", queries, sparse_params))
+        ]
+        results = []
+        for hit_lists in zip(dense_hits, sparse_hits):
+            if self.config.get("fusion", "rrf") == "weighted":
+                dense_weight = self.config.get("dense_weight", 0.7)
+                hits = weighted_fuse(hit_lists, [dense_weight, 1 - dense_weight], ["IP", "BM25"])
+            else:
+                hits = rrf_fuse(hit_lists, self.config.get("rrf_k", 60))
+            results.append(hits[:limit])
+        return results
+
+    def _ranker(self):
+        if self.config.get("fusion", "rrf") == "weighted":
+            dense_weight = self.config.get("dense_weight", 0.7)
+            return WeightedRanker(dense_weight, 1 - dense_weight)
+        return RRFRanker(self.config.get("rrf_k", 60))
+
     def query(self, query: str) -> str:
+        self._ensure_loaded()
         result = self.client.query(
             collection_name=self.collection_name,
-            filter="",
+            filter=self._filter(),
             output_fields=["content"],
             limit=1,
         )
@@ -0,0 +1,113 @@
+from typing import Dict, Type
+import numpy as np
+
+# 按行分块把 int8 编码转成 float32 计算得分，限制临时矩阵的内存
+SCORE_BLOCK_ROWS = 4096
+
+
+class Quantizer:
+    """向量量化器基类
+
+    fit 按已有向量确定量化参数，encode 把 float32 向量压缩为编码，
+    scores 直接在编码上计算查询的近似得分（越大越相似）。量化参数保存为一个二维 float32 矩阵。
+    """
+    name: str = ""
+
+    def __init__(self, params: np.ndarray):
+        self.params = np.asarray(params, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> "Quantizer":
+        raise NotImplementedError
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """查询与每个编码的近似得分，形状为 (查询数, 编码数)"""
+        raise NotImplementedError
+
+    @staticmethod
+    def code_bytes(dimension: int) -> int:
+        """每个向量编码的字节数"""
+        raise NotImplementedError
+
+
+class ScalarQuantizer(Quantizer):
+    """逐维 8 位标量量化：每维按该维的最小、最大值线性映射到 int8，内存为 float32 的 1/4
+
+    x ≈ low + (code + 128) × scale，内积 q·x ≈ (q × scale)·code + q·(low + 128 × scale)，
+    一次矩阵乘法即可算出近似得分。
+    """
+    name = "int8"
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> "ScalarQuantizer":
+        vectors = np.asarray(vectors, dtype=np.float32)
+        low = vectors.min(axis=0)
+        scale = (vectors.max(axis=0) - low) / 255
+        return cls(np.stack([low, np.where(scale > 0, scale, 1.0)]))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        low, scale = self.params
+        codes = np.rint((np.asarray(vectors, dtype=np.float32) - low) / scale) - 128
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        low, scale = self.params
+        weights = queries * scale
+        bias = queries @ (low + 128 * scale)
+        result = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = np.asarray(codes[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            result[:, start:start + len(block)] = weights @ block.T
+        return result + bias[:, None]
+
+    @staticmethod
+    def code_bytes(dimension: int) -> int:
+        return dimension
+
+
+class BinaryQuantizer(Quantizer):
+    """逐维二值量化：每维与该维均值比较得到 1 位，内存为 float32 的 1/32
+
+    得分为两个编码相同位所占比例换算到 [-1, 1]（1 - 2 × 汉明距离 / 位数）。
+    编码按 8 字节对齐，按 uint64 计算汉明距离。
+    """
+    name = "binary"
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray) -> "BinaryQuantizer":
+        return cls(np.asarray(vectors, dtype=np.float32).mean(axis=0, keepdims=True))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        bits = np.asarray(vectors, dtype=np.float32) > self.params[0]
+        codes = np.packbits(bits, axis=1)
+        padding = -codes.shape[1] % 8
+        return np.pad(codes, ((0, 0), (0, padding))) if padding else codes
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        words = np.ascontiguousarray(codes).view(np.uint64)
+        query_words = self.encode(queries).view(np.uint64)
+        bits = self.params.shape[1]
+        result = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for row, query in enumerate(query_words):
+            distance = np.bitwise_count(words ^ query).sum(axis=1, dtype=np.int32)
+            result[row] = 1 - 2 * distance / bits
+        return result
+
+    @staticmethod
+    def code_bytes(dimension: int) -> int:
+        return (dimension + 63) // 64 * 8
+
+
+QUANTIZERS: Dict[str, Type[Quantizer]] = {
+    ScalarQuantizer.name: ScalarQuantizer,
+    BinaryQuantizer.name: BinaryQuantizer,
+}
+
+
+def get_quantizer(name: str) -> Type[Quantizer]:
+    if name not in QUANTIZERS:
+        raise ValueError(f"不支持的量化方式: {name}")
+    return QUANTIZERS[name]
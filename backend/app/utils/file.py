@@ -1,31 +1,138 @@
 import os
-import shutil
-from typing import Optional
+import uuid
+import hashlib
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Optional
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 
 
+@dataclass
+class SavedFile:
+    """已保存的上传文件"""
+    path: str
+    size: int
+    sha256: str
+    reused: bool = False  # 是否复用了已存在的相同内容文件
+
+
 def get_file_extension(filename: str) -> str:
     """获取文件扩展名"""
     return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
 
 
-async def save_upload_file(file: UploadFile) -> str:
-    """保存上传的文件"""
-    # 确保上传目录存在
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+def get_blob_path(sha256: str, file_ext: str = "") -> str:
+    """获取内容寻址的存储路径
+
+    按哈希前缀分两级目录存放，例如 uploads/ab/cd/abcd....pdf，
+    避免单个目录下文件过多。
+    """
+    filename = f"{sha256}.{file_ext}" if file_ext else sha256
+    return os.path.join(settings.UPLOAD_DIR, sha256[:2], sha256[2:4], filename)
+
+
+def _write_chunk(buffer: BinaryIO, hasher: Any, chunk: bytes) -> None:
+    """写入一个分块并更新哈希（在线程池中执行）"""
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+async def save_upload_file(file: UploadFile) -> SavedFile:
+    """流式保存上传的文件
+
+    按 UPLOAD_CHUNK_SIZE 分块读取上传内容，磁盘写入与哈希计算放到线程池中执行，
+    避免大文件拷贝阻塞事件循环；边写边计算 SHA-256 和字节数。
+    文件先写入临时目录，完成后按内容哈希移动到 get_blob_path 对应的位置；
+    相同内容的文件只保存一份。
+
+    Args:
+        file: 上传的文件
+
+    Returns:
+        SavedFile: 文件路径、大小和 SHA-256 哈希
+    """
+    # 确保临时目录存在
+    tmp_dir = os.path.join(settings.UPLOAD_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
 
-    # 生成文件路径
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
+    # 生成临时文件路径，避免同名文件互相覆盖
+    file_path = os.path.join(tmp_dir, uuid.uuid4().hex)
 
     # 保存文件
+    hasher = hashlib.sha256()
+    size = 0
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        buffer = await run_in_threadpool(open, file_path, "wb")
+        try:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                await run_in_threadpool(_write_chunk, buffer, hasher, chunk)
+                size += len(chunk)
+        finally:
+            await run_in_threadpool(buffer.close)
+    except Exception:
+        # 写入失败时清理不完整的文件
+        delete_file(file_path)
+        raise
     finally:
-        file.file.close()
+        await file.close()
+
+    # 移动到内容寻址路径，已存在相同内容时直接复用
+    sha256 = hasher.hexdigest()
+    blob_path = get_blob_path(sha256, get_file_extension(file.filename or ""))
+    reused = os.path.exists(blob_path)
+    if reused:
+        delete_file(file_path)
+    else:
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(file_path, blob_path)
+
+    return SavedFile(path=blob_path, size=size, sha256=sha256, reused=reused)
+
+
+def save_local_file(source_path: str) -> SavedFile:
+    """把本地文件导入到上传目录
+
+    与 save_upload_file 相同，按内容哈希存放，相同内容的文件只保存一份，
+    用于批量导入服务器本地的文件。
+
+    Args:
+        source_path: 本地文件路径
+
+    Returns:
+        SavedFile: 文件路径、大小和 SHA-256 哈希
+    """
+    tmp_dir = os.path.join(settings.UPLOAD_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    file_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(source_path, "rb") as source, open(file_path, "wb") as buffer:
+            while True:
+                chunk = source.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                _write_chunk(buffer, hasher, chunk)
+                size += len(chunk)
+    except Exception:
+        delete_file(file_path)
+        raise
+
+    sha256 = hasher.hexdigest()
+    blob_path = get_blob_path(sha256, get_file_extension(source_path))
+    reused = os.path.exists(blob_path)
+    if reused:
+        delete_file(file_path)
+    else:
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(file_path, blob_path)
 
-    return file_path
+    return SavedFile(path=blob_path, size=size, sha256=sha256, reused=reused)
 
 
 def get_file_size(file_path: str) -> int:
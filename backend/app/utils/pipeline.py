@@ -0,0 +1,97 @@
+import queue
+import threading
+from typing import Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failure:
+    """生产者线程中抛出的异常"""
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def iter_in_thread(iterable: Iterable[T], maxsize: int = 1, name: Optional[str] = None) -> Iterator[T]:
+    """在后台线程中消费 iterable，通过有界队列把结果交给调用方
+
+    生产者与消费者并行执行，队列满时生产者阻塞，因此内存占用受 maxsize 约束。
+    生产者抛出的异常会在消费者侧重新抛出；消费者提前结束时生产者会随之停止。
+
+    Args:
+        iterable: 在后台线程中迭代的对象
+        maxsize: 队列长度
+        name: 线程名称
+    """
+    items: "queue.Queue[object]" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(item: object) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """按固定大小分批，最后一批可能不足 size"""
+    batch: List[T] = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_with_limit(iterable: Iterable[T], semaphore: threading.Semaphore) -> Iterator[T]:
+    """每次取下一个元素时占用一个并发名额，产出后立即释放
+
+    用于限制多个流水线共享的某个阶段的并发度；名额不会在下游处理期间被占用。
+    """
+    iterator = iter(iterable)
+    try:
+        while True:
+            with semaphore:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close:
+            close()
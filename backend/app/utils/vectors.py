@@ -0,0 +1,58 @@
+import os
+import uuid
+from typing import Optional
+import numpy as np
+from app.core.config import settings
+
+# 支持的向量存储精度
+VECTOR_DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+def get_vector_path(document_id: int) -> str:
+    """获取文档嵌入向量文件的路径"""
+    return os.path.join(settings.EMBEDDING_DIR, f"doc_{document_id}.npy")
+
+
+def save_vectors(file_path: str, vectors: np.ndarray, dtype: str = "float32") -> None:
+    """把嵌入向量保存为连续的 .npy 文件
+
+    先写入临时文件再替换，已经以内存映射方式打开旧文件的读取方不受影响。
+
+    Args:
+        file_path: 目标路径
+        vectors: 二维向量矩阵，每行一个向量
+        dtype: 存储精度，float32 或 float16
+
+    Raises:
+        ValueError: 精度不支持或矩阵不是二维时抛出
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"不支持的向量精度: {dtype}")
+    if vectors.ndim != 2:
+        raise ValueError(f"向量矩阵必须是二维的: shape={vectors.shape}")
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=VECTOR_DTYPES[dtype]))
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_vectors(file_path: str, mmap: bool = True) -> Optional[np.ndarray]:
+    """读取嵌入向量文件，默认以只读内存映射方式打开，不复制数据
+
+    Returns:
+        np.ndarray: 向量矩阵，文件不存在时返回 None
+    """
+    if not os.path.exists(file_path):
+        return None
+    return np.load(file_path, mmap_mode="r" if mmap else None)
+
+
+def delete_vectors(file_path: Optional[str]) -> None:
+    """删除嵌入向量文件"""
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
@@ -0,0 +1,77 @@
+"""
+批量入库测试用例
+"""
+import threading
+import time
+import pytest
+from app.services.bulk_ingest import collect_files, resolve_import_paths
+from app.utils.pipeline import iter_in_thread, iter_with_limit
+
+
+def test_collect_files(tmp_path):
+    """目录中只收集支持的文件类型，可选择是否递归"""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.pdf").write_bytes(b"a")
+    (tmp_path / "b.txt").write_bytes(b"b")
+    (tmp_path / "sub" / "c.pdf").write_bytes(b"c")
+
+    assert collect_files([str(tmp_path)]) == [str(tmp_path / "a.pdf"), str(tmp_path / "sub" / "c.pdf")]
+    assert collect_files([str(tmp_path)], recursive=False) == [str(tmp_path / "a.pdf")]
+    # 直接指定的文件不做类型过滤，由入库时报错
+    assert collect_files([str(tmp_path / "b.txt")]) == [str(tmp_path / "b.txt")]
+    with pytest.raises(ValueError):
+        collect_files([str(tmp_path / "missing")])
+
+
+def test_resolve_import_paths(tmp_path):
+    """路径不能逃出批量导入目录"""
+    root = str(tmp_path)
+    assert resolve_import_paths(["a.pdf", "."], root) == [str(tmp_path / "a.pdf"), str(tmp_path)]
+    with pytest.raises(ValueError):
+        resolve_import_paths(["../a.pdf"], root)
+    with pytest.raises(ValueError):
+        resolve_import_paths(["/etc/passwd"], root)
+
+
+def test_iter_with_limit():
+    """多个流水线共享名额时，同时取元素的数量不超过上限"""
+    semaphore = threading.BoundedSemaphore(2)
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def slow_items():
+        nonlocal active, peak
+        for item in range(5):
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+            yield item
+
+    results = []
+
+    def consume():
+        results.append(list(iter_with_limit(slow_items(), semaphore)))
+
+    threads = [threading.Thread(target=consume) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [[0, 1, 2, 3, 4]] * 4
+    assert peak <= 2
+
+
+def test_iter_in_thread_error():
+    """生产者的异常在消费者侧重新抛出"""
+    def items():
+        yield 1
+        raise RuntimeError("boom")
+
+    iterator = iter_in_thread(items())
+    assert next(iterator) == 1
+    with pytest.raises(RuntimeError):
+        next(iterator)
@@ -0,0 +1,61 @@
+"""
+文档接口测试用例
+"""
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints import documents
+from app.core.config import settings
+from app.core.database import get_db
+from app.main import app
+from app.models.document import Document, DocumentPage
+from app.schemas.configuration.document import get_default_config
+from app.services.document import DocumentService
+from tests.conftest import write_pdf
+
+
+@pytest.fixture
+def api_sessions(session_factory, monkeypatch):
+    # 接口在线程池中执行，流式响应还会自己创建会话，都使用同一个文件数据库
+    monkeypatch.setattr(documents, "SessionLocal", session_factory)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield session_factory
+    app.dependency_overrides.pop(get_db, None)
+
+
+def test_parse_stream(api_sessions, tmp_path, monkeypatch):
+    """流式解析逐行返回页面，解析结果按批写入并保持页面顺序"""
+    monkeypatch.setattr(settings, "PARSE_PAGE_BATCH_SIZE", 2)
+    path = write_pdf(tmp_path / "a.pdf", [f"page {i}" for i in range(5)])
+    db = api_sessions()
+    db.add(Document(id=1, filename="a.pdf", file_path=path, file_type="pdf", file_size=1))
+    db.commit()
+    batches = []
+    insert_pages = DocumentService._insert_pages
+    monkeypatch.setattr(DocumentService, "_insert_pages",
+                        lambda self, document_id, pages, start=0: batches.append(len(pages))
+                        or insert_pages(self, document_id, pages, start))
+
+    response = TestClient(app).post(f"{settings.API_V1_STR}/documents/1/parse/stream",
+                                    json=get_default_config("pdf").model_dump())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["event"] for event in events] == ["page"] * 5 + ["done"]
+    assert [event["data"]["page_content"] for event in events[:5]] == [f"page {i}" for i in range(5)]
+    assert events[-1]["data"] == {"pages": 5}
+    assert batches == [2, 2, 1]
+
+    db.expire_all()
+    rows = db.query(DocumentPage).filter(DocumentPage.document_id == 1).order_by(DocumentPage.page_index).all()
+    assert [(row.page_index, row.content) for row in rows] == [(i, f"page {i}") for i in range(5)]
+    assert db.query(Document).first().status == "loaded"
+    db.close()
@@ -0,0 +1,44 @@
+"""
+嵌入缓存测试用例
+"""
+import numpy as np
+from app.core.config import settings
+from app.schemas.chunk import LangChainChunk
+from app.schemas.configuration.embedding import get_default_config
+from app.services.embedding_cache import EmbeddingCacheService, text_hash
+from app.services.embeddinger.LangChainEmbe import Embeddinger
+
+
+def _chunks(texts):
+    return [LangChainChunk(page_content=text, metadata={"source": "a.pdf", "page": 0, "chunk_id": i})
+            for i, text in enumerate(texts)]
+
+
+def test_embed_only_cache_misses(db, monkeypatch):
+    """命中缓存的分块不再嵌入，结果与不使用缓存时一致"""
+    embeddinger = Embeddinger(get_default_config(), db)
+    embedded = []
+    engine_embed = embeddinger.engine.embed
+    monkeypatch.setattr(embeddinger.engine, "embed", lambda texts: embedded.append(len(texts)) or engine_embed(texts))
+
+    first = embeddinger.embed(_chunks(["alpha beta", "gamma", "alpha beta"]))
+    second = embeddinger.embed(_chunks(["gamma", "alpha  beta\n", "delta"]))
+
+    assert embedded == [2, 1]  # 批内重复和空白差异都复用同一个向量
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(second[:2], first[[1, 0]])
+    np.testing.assert_allclose(second, engine_embed(["gamma", "alpha beta", "delta"]), rtol=1e-6)
+
+
+def test_cache_lru_eviction(db, monkeypatch):
+    """超出条目数时按最近访问时间淘汰"""
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_MAX_ENTRIES", 10)
+    cache = EmbeddingCacheService(db)
+    hashes = [text_hash(str(i)) for i in range(12)]
+    cache.set_many("model", [(hash_value, np.ones(4)) for hash_value in hashes[:6]])
+    cache.get_many("model", hashes[:3])
+    cache.set_many("model", [(hash_value, np.ones(4)) for hash_value in hashes[6:]])
+
+    assert cache.evict() == 3
+    assert set(cache.get_many("model", hashes)) == set(hashes[:3] + hashes[6:])
+    assert cache.get_many("other", hashes) == {}
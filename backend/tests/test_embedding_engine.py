@@ -0,0 +1,75 @@
+"""
+嵌入引擎测试用例
+"""
+import time
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.schemas.configuration.embedding import get_default_config
+from app.services.embeddinger.base import iter_token_batches
+from app.services.embeddinger.hashing import HashingEngine
+from app.services.embeddinger.LangChainEmbe import close_engines, get_engine
+
+
+def test_token_batches_respect_budget():
+    """按长度从长到短分批，每批条数和补齐后的 token 数都不超过上限"""
+    lengths = [5, 100, 30, 30, 200, 1, 60]
+    batches = list(iter_token_batches(lengths, batch_size=3, max_batch_tokens=120))
+
+    assert sorted(index for batch in batches for index in batch) == list(range(len(lengths)))
+    assert batches[0] == [4]  # 超过预算的单条文本单独成批
+    for batch in batches:
+        assert len(batch) <= 3
+        assert len(batch) == 1 or len(batch) * max(lengths[index] for index in batch) <= 120
+
+
+def test_hashing_engine_matrix():
+    """一次返回一个矩阵，行顺序与输入一致，结果确定且已归一化"""
+    engine = HashingEngine(dimension=64, batch_size=2)
+    texts = ["向量检索 retrieval", "short", "", "a much longer english sentence about embeddings"]
+    vectors = engine.embed(texts)
+
+    assert vectors.shape == (4, 64)
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vectors[[0, 1, 3]], axis=1), 1.0, rtol=1e-5)
+    assert not vectors[2].any()
+    np.testing.assert_array_equal(vectors[1], engine.embed(["short"])[0])
+    assert engine.embed([]).shape == (0, 64)
+
+
+def test_get_engine_dispatch():
+    """按 embedding_tool 选择引擎，相同配置复用同一个引擎"""
+    config = get_default_config().model_copy(deep=True)
+    assert get_engine(config) is get_engine(config)
+    assert get_engine(config).model_id == "hashing-1024"
+
+    config.default_config["embedding_tool"] = "onnx"
+    config.default_config["model_name"] = "missing-model"
+    with pytest.raises(ValueError):
+        get_engine(config)
+    config.default_config["embedding_tool"] = "unknown"
+    with pytest.raises(ValueError):
+        get_engine(config)
+
+
+def test_remote_engine_replaced_and_closed(monkeypatch):
+    """连接参数变化时关闭旧的远程引擎，应用退出时关闭全部引擎"""
+    config = get_default_config().model_copy(deep=True)
+    config.default_config["embedding_tool"] = "openai"
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "key-1")
+    first = get_engine(config)
+    assert get_engine(config) is first
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "key-2")
+    second = get_engine(config)
+    assert second is not first
+    for _ in range(50):
+        if first._loop.is_closed():
+            break
+        time.sleep(0.1)
+    assert first._loop.is_closed() and not second._loop.is_closed()
+
+    close_engines()
+    assert second._loop.is_closed()
+    assert get_engine(config) is not second
+    close_engines()
@@ -0,0 +1,38 @@
+"""
+文件工具测试用例
+"""
+import asyncio
+import hashlib
+import io
+from fastapi import UploadFile
+from app.core.config import settings
+from app.utils.file import save_upload_file
+
+
+def test_save_upload_file_streams_and_hashes(tmp_path, monkeypatch):
+    """分块保存上传文件，并返回正确的大小和哈希"""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 7)
+    content = b"rage-upload-" * 100
+    upload = UploadFile(file=io.BytesIO(content), filename="a.pdf")
+
+    saved = asyncio.run(save_upload_file(upload))
+
+    assert saved.size == len(content)
+    assert saved.sha256 == hashlib.sha256(content).hexdigest()
+    with open(saved.path, "rb") as f:
+        assert f.read() == content
+
+
+def test_save_upload_file_deduplicates_content(tmp_path, monkeypatch):
+    """相同内容的文件只保存一份，并按哈希分目录存放"""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    content = b"same contract"
+    first = asyncio.run(save_upload_file(UploadFile(file=io.BytesIO(content), filename="a.pdf")))
+    second = asyncio.run(save_upload_file(UploadFile(file=io.BytesIO(content), filename="b.pdf")))
+
+    assert not first.reused
+    assert second.reused
+    assert first.path == second.path
+    assert first.path.endswith(f"{first.sha256[:2]}/{first.sha256[2:4]}/{first.sha256}.pdf")
+    assert list((tmp_path / "tmp").iterdir()) == []
@@ -0,0 +1,94 @@
+"""
+混合检索测试用例
+"""
+import numpy as np
+from app.core.config import settings
+from app.schemas.chunk import LangChainChunk
+from app.schemas.configuration.store import get_default_config
+from app.schemas.store import StoreSearchRequest
+from app.services.store import build_search_filter
+from app.services.storer.fusion import rrf_fuse, weighted_fuse
+from app.services.storer.milvus import ChunkKeyer, MilvusClientManager, MilvusStorer
+
+
+def _hybrid_config():
+    config = get_default_config().model_copy(deep=True)
+    config.default_config["search_mode"] = "hybrid"
+    return config
+
+
+def _hits(*ids):
+    return [{"id": key, "distance": 1.0 / (rank + 1), "entity": {}} for rank, key in enumerate(ids)]
+
+
+def test_rrf_fuse():
+    """两路都排名靠前的结果排在前面，只出现在一路的结果也保留"""
+    fused = rrf_fuse([_hits("a", "b", "c"), _hits("b", "d")], k=60)
+    assert [hit["id"] for hit in fused] == ["b", "a", "d", "c"]
+    assert fused[0]["distance"] == 1 / 62 + 1 / 61
+
+
+def test_weighted_fuse():
+    """得分按度量类型归一化后加权，BM25 得分取绝对值"""
+    dense = [{"id": "a", "distance": 0.9, "entity": {}}, {"id": "b", "distance": 0.1, "entity": {}}]
+    sparse = [{"id": "b", "distance": -8.0, "entity": {}}]
+    assert [hit["id"] for hit in weighted_fuse([dense, sparse], [0.7, 0.3], ["IP", "BM25"])] == ["b", "a"]
+    assert [hit["id"] for hit in weighted_fuse([dense, sparse], [1.0, 0.0], ["IP", "BM25"])] == ["a", "b"]
+
+
+def test_dense_search_by_default():
+    """默认只检索稠密向量，混合检索需显式选择"""
+    assert get_default_config().default_config["search_mode"] == "dense"
+
+
+def test_hybrid_search_recalls_keywords(tmp_path, monkeypatch):
+    """关键词只出现在一个分块时，混合检索把它排在第一"""
+    monkeypatch.setattr(settings, "MILVUS_URI", str(tmp_path / "milvus.db"))
+    manager = MilvusClientManager()
+    storer = MilvusStorer(_hybrid_config(), "doc_1", client=manager.open())
+    try:
+        storer.prepare(8)
+        texts = [f"general section {i} of the agreement" for i in range(30)] + ["part number AX-3301 specification"]
+        chunks = [LangChainChunk(page_content=text, metadata={"source": "a.pdf", "page": 0, "chunk_id": i})
+                  for i, text in enumerate(texts)]
+        storer.write_stream(zip(chunks, np.random.rand(len(chunks), 8)), ChunkKeyer(1))
+        storer.optimize()
+        hits = storer.search("AX-3301", np.random.rand(8), top_k=3)
+        assert hits[0]["entity"]["content"] == "part number AX-3301 specification"
+        # 过滤条件与混合检索同时生效
+        hits = storer.search("AX-3301", np.random.rand(8), filter='metadata["page"] > 0')
+        assert hits == []
+    finally:
+        manager.close()
+
+
+def test_build_search_filter():
+    """页码范围、来源和自定义表达式组合为一个过滤表达式"""
+    request = StoreSearchRequest(query="q", page_from=2, page_to=5, source='a "b".pdf', filter='metadata["page"] != 3')
+    assert build_search_filter(request) == (
+        'metadata["page"] >= 2 and metadata["page"] <= 5 and metadata["source"] == "a \\"b\\".pdf"'
+        ' and (metadata["page"] != 3)'
+    )
+    assert build_search_filter(StoreSearchRequest(query="q")) == ""
+
+
+def test_search_many(tmp_path, monkeypatch):
+    """批量检索的每个查询与单独检索的结果一致"""
+    monkeypatch.setattr(settings, "MILVUS_URI", str(tmp_path / "milvus.db"))
+    manager = MilvusClientManager()
+    storer = MilvusStorer(_hybrid_config(), "doc_1", client=manager.open())
+    try:
+        storer.prepare(8)
+        chunks = [LangChainChunk(page_content=f"item {i} code X{i}", metadata={"source": "a.pdf", "page": i, "chunk_id": i})
+                  for i in range(20)]
+        vectors = np.random.rand(20, 8)
+        storer.write_stream(zip(chunks, vectors), ChunkKeyer(1))
+        storer.optimize()
+
+        queries = ["X3", "X7", "X11"]
+        results = storer.search_many(queries, vectors[[3, 7, 11]], top_k=2)
+        assert [hits[0]["entity"]["content"] for hits in results] == ["item 3 code X3", "item 7 code X7", "item 11 code X11"]
+        for query, index, hits in zip(queries, [3, 7, 11], results):
+            assert [hit["id"] for hit in hits] == [hit["id"] for hit in storer.search(query, vectors[index], top_k=2)]
+    finally:
+        manager.close()
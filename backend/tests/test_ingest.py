@@ -0,0 +1,71 @@
+"""
+端到端入库测试用例
+"""
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.models.document import Document
+from app.models.store import StoreItem
+from app.schemas.common_config import DocumentStatus
+from app.schemas.configuration.embedding import get_default_config as get_embedding_default_config
+from app.schemas.configuration.store import get_default_config as get_store_default_config
+from app.schemas.ingest import IngestRequest
+from app.services.ingest import IngestService
+from app.services.store import StoreService
+from tests.conftest import write_pdf
+
+
+@pytest.fixture
+def db(session_factory, tmp_path, monkeypatch):
+    # 解析在单独的线程中使用同一个会话，嵌入缓存另开会话，使用文件数据库
+    monkeypatch.setattr(settings, "VECTOR_DB_DIR", str(tmp_path / "vector_db"))
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def _request():
+    embedding_config = get_embedding_default_config().model_copy(deep=True)
+    embedding_config.default_config.update({"embedding_tool": "hashing", "dimension": 64})
+    store_config = get_store_default_config().model_copy(deep=True)
+    store_config.default_config["store_method"] = "local"
+    return IngestRequest(embedding_config=embedding_config, store_config=store_config)
+
+
+def _add_document(db, path):
+    document = Document(id=1, filename="a.pdf", file_path=path, file_type="pdf", file_size=1)
+    db.add(document)
+    db.commit()
+    return document
+
+
+def test_ingest_local_store(db, tmp_path, monkeypatch):
+    """解析、分块、嵌入和存储一次完成，向量库和存储结果按文档顺序保存全部分块"""
+    monkeypatch.setattr(settings, "INGEST_EMBEDDING_BATCH_SIZE", 2)
+    document = _add_document(db, write_pdf(tmp_path / "a.pdf", [f"page {i}" for i in range(5)]))
+
+    result = IngestService(db).ingest(1, _request())
+    assert (result.pages, result.chunks) == (5, 5)
+    assert document.status == DocumentStatus.STORED
+
+    items = db.query(StoreItem).filter(StoreItem.document_id == 1).order_by(StoreItem.id).all()
+    assert [(item.chunk_id, item.page) for item in items] == [(i, i) for i in range(5)]
+    storer = StoreService(db).get_document_storer(document)
+    hits = storer.search("", np.ones(64, dtype=np.float32), top_k=10)
+    assert sorted(hit["entity"]["content"] for hit in hits) == [f"page {i}" for i in range(5)]
+    assert {hit["id"] for hit in hits} == {item.vector_id for item in items}
+
+
+def test_ingest_parse_failure(db, tmp_path):
+    """解析线程中的错误以 HTTP 错误返回，不保存存储结果"""
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+    document = _add_document(db, str(path))
+
+    with pytest.raises(HTTPException) as error:
+        IngestService(db).ingest(1, _request())
+    assert error.value.status_code == 500
+    assert "处理文档失败" in error.value.detail
+    assert document.status != DocumentStatus.STORED
+    assert db.query(StoreItem).count() == 0
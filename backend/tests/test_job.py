@@ -0,0 +1,117 @@
+"""
+后台任务测试用例
+"""
+import time
+import pytest
+from app.core.config import settings
+from app.models.document import Document, DocumentPage
+from app.models.job import Job
+from app.schemas.chunk import LangChainChunk
+from app.schemas.configuration.document import get_default_config as get_load_default_config
+from app.schemas.configuration.embedding import get_default_config as get_embedding_default_config
+from app.schemas.job import JobStatus, JobType
+from app.services import job as job_module
+from app.services.chunk import ChunkService
+from app.services.job import JobCancelled, JobContext, JobRunner
+from tests.conftest import write_pdf
+
+
+def wait_for(session_factory, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db = session_factory()
+        job = db.query(Job).filter(Job.id == job_id).first()
+        db.close()
+        if job.status not in (JobStatus.PENDING, JobStatus.RUNNING):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_job_runner_executes_and_cancels(session_factory, monkeypatch):
+    """执行排队任务，并在进度检查点响应取消"""
+    def fake_chunk(db, document_id, config, context):
+        return {"chunks": document_id}
+
+    def fake_embedding(db, document_id, config, context):
+        while True:
+            context.report(message="running", force=True)
+            time.sleep(0.01)
+
+    monkeypatch.setitem(job_module.JOB_HANDLERS, JobType.CHUNK, fake_chunk)
+    monkeypatch.setitem(job_module.JOB_HANDLERS, JobType.EMBEDDING, fake_embedding)
+    db = session_factory()
+    done = Job(job_type=JobType.CHUNK, document_id=3, status=JobStatus.PENDING)
+    endless = Job(job_type=JobType.EMBEDDING, document_id=3, status=JobStatus.PENDING)
+    db.add_all([done, endless])
+    db.commit()
+
+    runner = JobRunner(workers=2, poll_interval=0.05, session_factory=session_factory)
+    runner.start()
+    try:
+        finished = wait_for(session_factory, done.id)
+        assert finished.status == JobStatus.SUCCEEDED
+        assert finished.result == {"chunks": 3}
+
+        db.query(Job).filter(Job.id == endless.id).update({"cancel_requested": True})
+        db.commit()
+        assert wait_for(session_factory, endless.id).status == JobStatus.CANCELLED
+    finally:
+        runner.stop(timeout=5)
+        db.close()
+
+
+def test_embedding_job_reports_batches(session_factory, tmp_path, monkeypatch):
+    """嵌入任务每批上报进度，取消请求在下一批之前生效"""
+    monkeypatch.setattr(settings, "EMBEDDING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EMBEDDING_PROGRESS_BATCH_SIZE", 2)
+    db = session_factory()
+    db.add(Document(id=1, filename="a.pdf", file_path="a.pdf", file_type="pdf", file_size=1))
+    job = Job(job_type=JobType.EMBEDDING, document_id=1, status=JobStatus.RUNNING)
+    db.add(job)
+    ChunkService(db)._save_chunks(1, [LangChainChunk(page_content=f"chunk {i}",
+                                                     metadata={"source": "a.pdf", "page": 0, "chunk_id": i})
+                                      for i in range(5)])
+    db.commit()
+    config = get_embedding_default_config().model_copy(deep=True)
+    config.default_config["use_cache"] = False
+    config = config.model_dump()
+    messages = []
+
+    context = JobContext(job.id, session_factory)
+    report = context.report
+    monkeypatch.setattr(context, "report", lambda **kwargs: messages.append(kwargs["message"]) or report(**kwargs))
+    assert job_module._run_embedding(db, 1, config, context) == {"embeddings": 5}
+    assert messages == ["已嵌入 2 个分块", "已嵌入 4 个分块", "已嵌入 5 个分块"]
+
+    db.query(Job).filter(Job.id == job.id).update({"cancel_requested": True})
+    db.commit()
+    messages.clear()
+    with pytest.raises(JobCancelled):
+        job_module._run_embedding(db, 1, config, context)
+    assert messages == ["已嵌入 2 个分块"]
+    db.close()
+
+
+def test_parse_job_reports_progress(session_factory, tmp_path, monkeypatch):
+    """解析任务逐页上报进度，进度写入不会被解析结果的写入阻塞"""
+    monkeypatch.setattr(settings, "PARSE_PAGE_BATCH_SIZE", 2)
+    monkeypatch.setattr(JobContext, "REPORT_INTERVAL", 0)
+    path = write_pdf(tmp_path / "a.pdf", [f"page {i}" for i in range(5)])
+    db = session_factory()
+    db.add(Document(id=1, filename="a.pdf", file_path=path, file_type="pdf", file_size=1))
+    job = Job(job_type=JobType.PARSE, document_id=1, status=JobStatus.PENDING,
+              config=get_load_default_config("pdf").model_dump())
+    db.add(job)
+    db.commit()
+
+    runner = JobRunner(workers=1, poll_interval=0.05, session_factory=session_factory)
+    runner.start()
+    try:
+        finished = wait_for(session_factory, job.id, timeout=10)
+    finally:
+        runner.stop(timeout=5)
+    assert finished.status == JobStatus.SUCCEEDED, finished.error
+    assert finished.result == {"pages": 5}
+    assert db.query(DocumentPage).filter(DocumentPage.document_id == 1).count() == 5
+    db.close()
@@ -0,0 +1,121 @@
+"""
+本地向量存储测试用例
+"""
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.models.document import Document
+from app.models.store import Store
+from app.schemas.chunk import LangChainChunk
+from app.schemas.configuration.store import get_default_config
+from app.services.storer import index
+from app.services.storer.base import ChunkKeyer, SyncStats
+from app.services.storer.local import LocalStorer, compile_filter
+from app.services.storer.milvus import get_storer
+from app.services.store import StoreService
+
+
+def _config(**values):
+    config = get_default_config().model_copy(deep=True)
+    config.default_config.update({"store_method": "local", **values})
+    return config
+
+
+def _chunks(count, prefix="item"):
+    return [LangChainChunk(page_content=f"{prefix} {i}", metadata={"source": "a.pdf", "page": i, "chunk_id": i})
+            for i in range(count)]
+
+
+def test_compile_filter():
+    """支持 Milvus 过滤表达式中的比较和逻辑运算，不支持的写法报错"""
+    row = {"id": 1, "content": "x", "metadata": {"page": 3, "source": "a.pdf"}}
+    assert compile_filter('metadata["page"] >= 2 and metadata["page"] <= 5 and (metadata["page"] != 4)')(row)
+    assert compile_filter('metadata["source"] in ["a.pdf", "b.pdf"] or id == 2')(row)
+    assert not compile_filter('not metadata["page"] > 0')(row)
+    assert not compile_filter('metadata["missing"] > 0')(row)
+    with pytest.raises(ValueError):
+        compile_filter('metadata["page"] like "1%"')
+    with pytest.raises(ValueError):
+        compile_filter("__import__('os')")
+
+
+def test_exact_search_and_incremental_write(tmp_path, monkeypatch):
+    """暴力检索结果与矩阵乘法一致，增量写入、删除和重新打开后结果不变"""
+    monkeypatch.setattr(settings, "VECTOR_DB_DIR", str(tmp_path))
+    storer = get_storer(_config(), 1)
+    assert isinstance(storer, LocalStorer)
+    rng = np.random.default_rng(0)
+    vectors = rng.random((50, 8), dtype=np.float32)
+    chunks = _chunks(50)
+    assert not storer.prepare(8)
+    storer.write_stream(zip(chunks, vectors), ChunkKeyer(1))
+    assert storer.optimize().index_type == "FLAT"
+
+    queries = rng.random((3, 8), dtype=np.float32)
+    results = storer.search_many(["", "", ""], queries, top_k=5)
+    for query, hits in zip(queries, results):
+        expected = np.argsort(-(vectors @ query))[:5]
+        assert [hit["entity"]["content"] for hit in hits] == [f"item {i}" for i in expected]
+    hits = storer.search("", queries[0], top_k=50, filter='metadata["page"] < 10')
+    assert len(hits) == 10 and all(hit["entity"]["metadata"]["page"] < 10 for hit in hits)
+
+    # 重新打开后增量写入：未变的分块跳过，移除的分块删除
+    reopened = get_storer(_config(), 1)
+    assert reopened.prepare(8)
+    existing = {key: chunk.metadata.page for key, chunk in zip(ChunkKeyer(1).keys(chunks), chunks)}
+    stats = SyncStats()
+    stored = reopened.write_stream(zip(chunks[:40], vectors[:40]), ChunkKeyer(1), existing, stats)
+    reopened.delete(set(existing) - {item.metadata.store_id for item in stored})
+    reopened.optimize()
+    assert (stats.inserted, stats.unchanged) == (0, 40)
+    hits = reopened.search("", vectors[45], top_k=40)
+    assert len(hits) == 40 and "item 45" not in {hit["entity"]["content"] for hit in hits}
+
+
+def test_hnsw_search(tmp_path, monkeypatch):
+    """向量数超过阈值时建 HNSW 索引，召回率接近暴力检索"""
+    monkeypatch.setattr(settings, "VECTOR_DB_DIR", str(tmp_path))
+    monkeypatch.setattr(index, "AUTO_FLAT_THRESHOLD", 16)
+    storer = LocalStorer(_config(), "local_doc_1")
+    storer.prepare(16)
+    rng = np.random.default_rng(0)
+    vectors = rng.random((2000, 16), dtype=np.float32)
+    storer.write_stream(zip(_chunks(2000), vectors), ChunkKeyer(1))
+    assert storer.optimize().index_type == "HNSW"
+
+    queries = rng.random((20, 16), dtype=np.float32)
+    results = LocalStorer(_config(), "local_doc_1").search_many([""] * 20, queries, top_k=10)
+    expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :10]
+    recall = np.mean([len({hit["entity"]["content"] for hit in hits} & {f"item {i}" for i in row}) / 10
+                      for hits, row in zip(results, expected)])
+    assert recall >= 0.9
+
+
+def test_embedding_model_change_rewrites(db, tmp_path, monkeypatch):
+    """嵌入模型变化而维度不变时全量写入，不复用旧模型的向量"""
+    monkeypatch.setattr(settings, "VECTOR_DB_DIR", str(tmp_path))
+    config = _config()
+    model = {"embedding_tool": "hashing", "dimension": 8, "normalize": True}
+    db.add(Store(id=1, document_id=1, config=config.model_dump(),
+                 meta_data={"collection": "local_doc_1", "embedding": model}))
+    db.add(Document(id=1, filename="a.pdf", file_path="a.pdf", file_type="pdf", file_size=1, store_id=1))
+    db.commit()
+    document = db.query(Document).first()
+    service = StoreService(db)
+    chunks = _chunks(5)
+    vectors = np.random.default_rng(0).random((5, 8), dtype=np.float32)
+
+    def sync(embedding, values):
+        storer, existing = service.prepare_storer(document, config, 8, embedding)
+        stats = SyncStats()
+        service.save_items(1, storer.write_stream(zip(chunks, values), ChunkKeyer(1), existing, stats))
+        storer.optimize()
+        return storer, stats
+
+    sync(model, vectors)
+    # 同一模型：内容未变的分块跳过
+    assert sync(model, -vectors)[1] == SyncStats(unchanged=5)
+    storer, stats = sync({**model, "normalize": False}, -vectors)
+    assert stats == SyncStats(inserted=5)
+    # 向量库中已是新写入的（取反的）向量，与正向量的内积均为负
+    assert all(hit["distance"] < 0 for hit in storer.search("", vectors[0], top_k=5))
@@ -0,0 +1,92 @@
+"""
+数据库升级测试用例
+"""
+import json
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.database import Base
+from app.core.migrations import upgrade_database
+from app.models.document import Document
+from app.models.store import StoreItem
+from app.services.chunk import ChunkService
+from app.services.document import DocumentService
+from app.services.embedding import EmbeddingService
+
+# 升级前版本的表结构
+BASELINE_SCHEMA = [
+    """CREATE TABLE documents (
+        id INTEGER PRIMARY KEY, filename VARCHAR(255) NOT NULL, file_path VARCHAR(512) NOT NULL,
+        file_type VARCHAR(10) NOT NULL, file_size INTEGER NOT NULL, status VARCHAR(8) NOT NULL,
+        meta_data JSON, config JSON, result JSON,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        processed_at DATETIME, chunk_id INTEGER, store_id INTEGER, embedding_id INTEGER)""",
+    """CREATE TABLE chunks (id INTEGER PRIMARY KEY, document_id INTEGER NOT NULL REFERENCES documents (id),
+        meta_data JSON, config JSON, result JSON)""",
+    """CREATE TABLE embeddings (id INTEGER PRIMARY KEY, document_id INTEGER NOT NULL REFERENCES documents (id),
+        meta_data JSON, config JSON, result JSON)""",
+    """CREATE TABLE stores (id INTEGER PRIMARY KEY, document_id INTEGER NOT NULL REFERENCES documents (id),
+        meta_data JSON, config JSON, result JSON)""",
+]
+
+
+def baseline_engine(path, statements=()):
+    """按升级前的表结构建库，并执行额外的 SQL 写入数据"""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA + list(statements):
+            connection.execute(text(statement))
+    return engine
+
+
+def test_upgrade_adds_columns(tmp_path):
+    """旧数据库补充新增的列和索引，重复升级不报错"""
+    engine = baseline_engine(tmp_path / "old.db", [
+        "INSERT INTO documents (id, filename, file_path, file_type, file_size, status) "
+        "VALUES (1, 'a.pdf', 'a.pdf', 'pdf', 1, 'PENDING')",
+    ])
+    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
+    upgrade_database(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("documents")}
+    assert "file_hash" in columns
+    assert "ix_documents_file_hash" in {index["name"] for index in inspect(engine).get_indexes("documents")}
+    db = sessionmaker(bind=engine)()
+    assert db.query(Document).filter(Document.file_hash.is_(None)).one().filename == "a.pdf"
+    db.close()
+
+
+def test_upgrade_migrates_legacy_results(tmp_path, monkeypatch):
+    """旧 result 列中的各阶段结果迁移到新表，分页接口可以读取，旧向量转存为向量文件"""
+    monkeypatch.setattr(settings, "EMBEDDING_DIR", str(tmp_path / "embeddings"))
+    vectors = np.arange(12, dtype=np.float32).reshape(3, 4)
+    pages = [{"page_content": f"page {i}", "metadata": {"source": "a.pdf", "page": i}} for i in range(2)]
+    chunks = [{"page_content": f"chunk {i}", "metadata": {"source": "a.pdf", "page": i // 2}} for i in range(3)]
+    embedded = [{"embedding": vector.tolist(), "metadata": {"source": "m", "page": i // 2, "embedding_id": i}}
+                for i, vector in enumerate(vectors)]
+    stored = [{"content": "", "metadata": {"source": "a.pdf", "page": i // 2}} for i in range(3)]
+    engine = baseline_engine(tmp_path / "old.db", [
+        "INSERT INTO documents (id, filename, file_path, file_type, file_size, status, result, chunk_id, embedding_id, store_id) "
+        f"VALUES (1, 'a.pdf', 'a.pdf', 'pdf', 1, 'STORED', '{json.dumps(pages)}', 1, 1, 1)",
+        f"INSERT INTO embeddings (id, document_id, result) VALUES (1, 1, '{json.dumps(embedded)}')",
+        f"INSERT INTO chunks (id, document_id, result) VALUES (1, 1, '{json.dumps(chunks)}')",
+        f"INSERT INTO stores (id, document_id, result) VALUES (1, 1, '{json.dumps(stored)}')",
+    ])
+    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
+    upgrade_database(engine)
+
+    db = sessionmaker(bind=engine)()
+    assert [page.page_content for page in DocumentService(db).iter_pages(1)] == ["page 0", "page 1"]
+    result = ChunkService(db).get_chunks(1, offset=1, limit=5)
+    assert result.total == 3
+    assert [(chunk.page_content, chunk.metadata.chunk_id) for chunk in result.items] == [("chunk 1", 1), ("chunk 2", 2)]
+    assert [(item.chunk_id, item.page) for item in db.query(StoreItem).order_by(StoreItem.chunk_id)] == \
+        [(0, 0), (1, 0), (2, 1)]
+    assert np.array_equal(EmbeddingService(db).get_vector_matrix(1), vectors)
+    assert EmbeddingService(db).get_embeddings(1).total == 3
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM chunks WHERE result IS NOT NULL")).scalar() == 0
+    db.close()
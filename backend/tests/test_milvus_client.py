@@ -0,0 +1,24 @@
+"""
+共享 Milvus 客户端测试用例
+"""
+from app.core.config import settings
+from app.services.storer.milvus import MilvusClientManager
+
+
+def test_client_shared_until_closed(tmp_path, monkeypatch):
+    """多次获取复用同一个客户端，关闭后按需重新打开"""
+    monkeypatch.setattr(settings, "MILVUS_URI", str(tmp_path / "milvus.db"))
+    manager = MilvusClientManager()
+    client = manager.open()
+    try:
+        assert manager.get() is client
+        assert manager.open() is client
+        assert not client.has_collection("missing")
+    finally:
+        manager.close()
+    reopened = manager.get()
+    try:
+        assert reopened is not client
+        assert not reopened.has_collection("missing")
+    finally:
+        manager.close()
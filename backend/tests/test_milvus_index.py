@@ -0,0 +1,89 @@
+"""
+向量索引选择测试用例
+"""
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.schemas.chunk import LangChainChunk
+from app.schemas.configuration.store import get_default_config
+from app.services.storer import index
+from app.services.storer.index import IndexPlan, plan_index, search_params
+from app.services.storer.milvus import ChunkKeyer, MilvusClientManager, MilvusStorer, rebuild_shared_indexes
+
+
+def _config(**values):
+    config = get_default_config().model_copy(deep=True)
+    config.default_config.update(values)
+    return config
+
+
+def test_auto_plan_follows_vector_count():
+    """自动模式按向量数选择索引，参数按向量数和目标召回率推算"""
+    config = _config()
+    assert plan_index(config, 200, 1024) == IndexPlan("FLAT")
+    assert plan_index(config, 1000000, 1024) == IndexPlan("HNSW", {"M": 16, "efConstruction": 200})
+    assert plan_index(config, 10 ** 7, 1024).index_type == "IVF_SQ8"
+    assert plan_index(_config(target_recall=0.99), 1000000, 1024).params["M"] == 32
+    # 集合增长 4 倍以内参数不变
+    assert plan_index(config, 300000, 1024) == plan_index(config, 1000000, 1024)
+
+
+def test_ivf_params_bounded_by_vector_count():
+    """nlist 不超过向量数能训练的聚类数，nprobe 按目标召回率取 nlist 的一部分"""
+    plan = plan_index(_config(index_type="IVF_FLAT", ivf_nlist=1024), 4096, 1024)
+    assert plan.params == {"nlist": 4096 // 39}
+    assert search_params(_config(), plan) == {"nprobe": 7}
+    assert search_params(_config(ivf_nprobe=8), plan) == {"nprobe": 8}
+    assert search_params(_config(), IndexPlan("HNSW", {"M": 16}), limit=100) == {"ef": 100}
+    with pytest.raises(ValueError):
+        plan_index(_config(index_type="IVF_PQ", pq_m=7), 4096, 1024)
+
+
+def test_optimize_rebuilds_index(tmp_path, monkeypatch):
+    """写入后按向量数重建索引，索引参数记录在集合属性中"""
+    monkeypatch.setattr(settings, "MILVUS_URI", str(tmp_path / "milvus.db"))
+    monkeypatch.setattr(index, "AUTO_FLAT_THRESHOLD", 16)
+    manager = MilvusClientManager()
+    storer = MilvusStorer(_config(), "doc_1", client=manager.open())
+    try:
+        storer.prepare(8)
+        assert storer.index_plan() == IndexPlan("FLAT")
+        chunks = [LangChainChunk(page_content=str(i), metadata={"source": "a.pdf", "page": 0, "chunk_id": i})
+                  for i in range(100)]
+        storer.write(chunks, np.random.rand(100, 8), ChunkKeyer(1).keys(chunks))
+
+        plan = storer.optimize()
+        assert plan.index_type == "HNSW"
+        assert storer.index_plan() == plan
+        assert storer.optimize() == plan
+        hits = storer.search("", np.random.rand(8), top_k=5)
+        assert len(hits) == 5 and hits[0]["entity"]["content"] in {chunk.page_content for chunk in chunks}
+    finally:
+        manager.close()
+
+
+def test_shared_collection_index_not_rebuilt_on_write(tmp_path, monkeypatch):
+    """共享集合的索引按集合级配置规划，写入时不重建，由维护命令重建"""
+    monkeypatch.setattr(settings, "MILVUS_URI", str(tmp_path / "milvus.db"))
+    monkeypatch.setattr(index, "AUTO_FLAT_THRESHOLD", 16)
+    manager = MilvusClientManager()
+    client = manager.open()
+    try:
+        first = MilvusStorer(_config(index_type="IVF_FLAT"), "chunks_8", client=client, document_id=1)
+        second = MilvusStorer(_config(index_type="HNSW"), "chunks_8", client=client, document_id=2)
+        first.prepare(8)
+        assert first.index_plan() == IndexPlan("FLAT")
+        for storer in (first, second):
+            chunks = [LangChainChunk(page_content=f"{storer.document_id}-{i}",
+                                     metadata={"source": "a.pdf", "page": 0, "chunk_id": i}) for i in range(50)]
+            storer.write(chunks, np.random.rand(50, 8), ChunkKeyer(storer.document_id).keys(chunks))
+            # 写入的文档配置不同，也不改变共享集合的索引
+            assert storer.optimize() == IndexPlan("FLAT")
+            assert len(first.search("", np.random.rand(8), top_k=5)) == 5
+
+        plans = rebuild_shared_indexes(["chunks_8", "chunks_16"], client)
+        assert list(plans) == ["chunks_8"] and plans["chunks_8"].index_type == "HNSW"
+        assert first.index_plan() == plans["chunks_8"]
+        assert {hit["entity"]["document_id"] for hit in second.search("", np.random.rand(8), top_k=5)} == {2}
+    finally:
+        manager.close()
@@ -0,0 +1,127 @@
+"""
+向量增量写入测试用例
+"""
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.schemas.chunk import LangChainChunk
+from app.schemas.configuration.store import get_default_config
+from app.services.storer.milvus import ChunkKeyer, MilvusClientManager, MilvusStorer, SyncStats, get_storer
+from app.services.storer.base import check_filter
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MILVUS_URI", str(tmp_path / "milvus.db"))
+    manager = MilvusClientManager()
+    yield manager.open()
+    manager.close()
+
+
+@pytest.fixture
+def storer(client):
+    return MilvusStorer(get_default_config(), "doc_1", client=client)
+
+
+def _chunks(texts):
+    return [LangChainChunk(page_content=text, metadata={"source": "a.pdf", "page": page, "chunk_id": i})
+            for i, (text, page) in enumerate(texts)]
+
+
+def _sync(storer, chunks, existing, incremental=True):
+    existing = existing if storer.prepare(4, incremental) else None
+    keys = ChunkKeyer(storer.document_id or 1).keys(chunks)
+    stats = SyncStats()
+    stored = storer.write(chunks, np.random.rand(len(chunks), 4), keys, existing, stats)
+    if existing:
+        stats.deleted = storer.delete(set(existing) - set(keys))
+    return stored, stats
+
+
+def _count(storer):
+    storer.client.load_collection(storer.collection_name)
+    return storer.client.query(storer.collection_name, filter=storer._filter(),
+                               output_fields=["count(*)"])[0]["count(*)"]
+
+
+def test_chunk_keys_are_stable():
+    """主键只取决于文档和内容，同一文档内重复内容按出现次序区分"""
+    keys = ChunkKeyer(1).keys(_chunks([("a", 0), ("b", 0), ("a", 1)]))
+    assert keys == ChunkKeyer(1).keys(_chunks([("a", 5), ("b", 5), ("a", 5)]))
+    assert len(set(keys)) == 3
+    assert keys[0] != ChunkKeyer(2).keys(_chunks([("a", 0)]))[0]
+    assert all(0 <= key < 2 ** 63 for key in keys)
+
+
+def test_incremental_write(storer):
+    """只写入新增和页码变化的分块，删除已移除的分块，其余保持不变"""
+    stored, stats = _sync(storer, _chunks([("a", 0), ("b", 0), ("c", 1), ("d", 2)]), {})
+    assert (stats.inserted, stats.updated, stats.unchanged, stats.deleted) == (4, 0, 0, 0)
+
+    existing = {item.metadata.store_id: item.metadata.page for item in stored}
+    stored, stats = _sync(storer, _chunks([("a", 0), ("c", 2), ("d", 2), ("e", 2)]), existing)
+    assert (stats.inserted, stats.updated, stats.unchanged, stats.deleted) == (1, 1, 2, 1)
+    assert [item.metadata.chunk_id for item in stored] == [0, 1, 2, 3]
+    assert _count(storer) == 4
+
+    # 记录缺失（如上次中途失败）时以 upsert 写入，不产生重复主键
+    _sync(storer, _chunks([("a", 0), ("c", 2), ("d", 2), ("e", 2)]), {})
+    assert _count(storer) == 4
+
+
+def test_shared_collection(client, monkeypatch):
+    """共享集合中按文档过滤检索，重建和删除只影响本文档的向量"""
+    monkeypatch.setattr("app.services.storer.milvus.milvus_manager.get", lambda: client)
+    # 默认每个文档一个集合，共享集合需显式选择
+    assert get_storer(get_default_config(), 1).collection_name == "doc_1"
+    config = get_default_config().model_copy(deep=True)
+    config.default_config["collection_mode"] = "shared"
+    first, second = get_storer(config, 1, dimension=4), get_storer(config, 2, dimension=4)
+    assert first.collection_name == second.collection_name
+    _sync(first, _chunks([("a", 0), ("b", 0)]), {})
+    _sync(second, _chunks([("c", 0), ("d", 0), ("e", 0)]), {})
+    assert (_count(first), _count(second)) == (2, 3)
+    assert first.query("") in {"a", "b"}
+    assert [hit["entity"]["document_id"] for hit in second.search("", np.random.rand(4))] == [2, 2, 2]
+
+    _sync(first, _chunks([("f", 0)]), {}, incremental=False)
+    assert (_count(first), _count(second)) == (1, 3)
+    second.clear()
+    assert (_count(first), _count(second)) == (1, 0)
+
+
+def test_shared_collection_filter_escape(client, monkeypatch):
+    """过滤表达式不能闭合外层括号，检索其他文档的分块"""
+    monkeypatch.setattr("app.services.storer.milvus.milvus_manager.get", lambda: client)
+    config = get_default_config().model_copy(deep=True)
+    config.default_config["collection_mode"] = "shared"
+    first, second = get_storer(config, 1, dimension=4), get_storer(config, 2, dimension=4)
+    _sync(first, _chunks([("a", 0), ("b", 0)]), {})
+    _sync(second, _chunks([("c", 0), ("d", 0), ("e", 0)]), {})
+    with pytest.raises(ValueError):
+        first.search("", np.random.rand(4), filter="id > 0)) or ((id != 0")
+    with pytest.raises(ValueError):
+        check_filter("id > 0) or (id != 0")
+    assert check_filter('metadata["source"] == "a)b"') == 'metadata["source"] == "a)b"'
+
+    # 即使过滤条件被绕过，命中中其他文档的分块也会被丢弃
+    monkeypatch.setattr(first, "_filter", lambda extra="": "")
+    assert [hit["entity"]["document_id"] for hit in first.search("", np.random.rand(4))] == [1, 1]
+
+
+def test_write_stream_batches(storer, monkeypatch):
+    """按行数和估算字节数分批写入，每批上报进度"""
+    monkeypatch.setitem(storer.config.default_config, "insert_batch_size", 3)
+    storer.prepare(4)
+    chunks = _chunks([(str(i), 0) for i in range(10)])
+    progress = []
+    stored = storer.write_stream(zip(chunks, np.random.rand(10, 4)), ChunkKeyer(1), progress=progress.append)
+    assert progress == [3, 6, 9, 10]
+    assert [item.metadata.store_id for item in stored] == ChunkKeyer(1).keys(chunks)
+    assert _count(storer) == 10
+
+    # 单行超过字节上限的一半时每批只写一行
+    monkeypatch.setattr("app.services.storer.base.ROW_OVERHEAD_BYTES", 10 * 1024 * 1024)
+    progress.clear()
+    storer.write_stream(zip(chunks[:3], np.random.rand(3, 4)), ChunkKeyer(1), {}, progress=progress.append)
+    assert progress == [1, 2, 3]
@@ -0,0 +1,22 @@
+"""
+解析结果缓存测试用例
+"""
+from app.core.config import settings
+from app.schemas.document import LangChainDocument
+from app.services.parse_cache import ParseCacheService
+
+
+def test_parse_cache_hit_and_lru_eviction(db, monkeypatch):
+    """命中缓存，并按最近访问顺序淘汰"""
+    monkeypatch.setattr(settings, "PARSE_CACHE_MAX_ENTRIES", 2)
+    cache = ParseCacheService(db)
+    pages = [LangChainDocument(page_content="page 1", metadata={"page": 0})]
+
+    cache.set("file-a", "cfg", pages)
+    cache.set("file-b", "cfg", pages)
+    assert cache.get("file-a", "cfg") == pages
+    cache.set("file-c", "cfg", pages)
+
+    assert cache.get("file-a", "cfg") == pages
+    assert cache.get("file-b", "cfg") is None
+    assert cache.get("file-c", "cfg") == pages
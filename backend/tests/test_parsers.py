@@ -0,0 +1,38 @@
+"""
+解析器测试用例
+"""
+import pytest
+from langchain_community.document_loaders import PyPDFLoader
+from app.schemas.configuration.document import get_default_config
+from app.services.parsers.langchain_parser import LangchainParser, shutdown_parse_executor
+from app.services.parsers.pdf_pages import extract_pages, parse_page_range
+from tests.conftest import write_pdf
+
+
+def test_parse_page_range():
+    """解析页码范围，结果从 0 开始、去重排序并裁剪到总页数"""
+    assert parse_page_range("all", 3) == [0, 1, 2]
+    assert parse_page_range("", 2) == [0, 1]
+    assert parse_page_range("1-3, 7,2,9-12", 10) == [0, 1, 2, 6, 8, 9]
+
+
+@pytest.mark.parametrize("page_range", ["0", "5-3", "a-b", "1-x"])
+def test_parse_page_range_invalid(page_range):
+    """格式错误或无效的页码范围抛出 ValueError"""
+    with pytest.raises(ValueError):
+        parse_page_range(page_range, 10)
+
+
+def test_page_parsing_matches_pypdf_loader(tmp_path):
+    """按页解析和并行解析的内容、元数据与 PyPDFLoader 一致"""
+    path = write_pdf(tmp_path / "a.pdf", [f"page {i}" for i in range(6)])
+    expected = [(doc.page_content, doc.metadata) for doc in PyPDFLoader(path).load()]
+    assert [(doc.page_content, doc.metadata) for doc in extract_pages(path, list(range(6)))] == expected
+
+    config = get_default_config("pdf").model_copy(deep=True)
+    config.default_config.update({"loader_tool": "langchain", "page_range": "all", "parallel_parse": True})
+    try:
+        pages = list(LangchainParser(config, workers=2).iter_parse(path))
+    finally:
+        shutdown_parse_executor()
+    assert [(doc.page_content, doc.metadata) for doc in pages] == expected
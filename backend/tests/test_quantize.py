@@ -0,0 +1,76 @@
+"""
+向量量化测试用例
+"""
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.schemas.chunk import LangChainChunk
+from app.schemas.configuration.store import get_default_config
+from app.services.storer import index
+from app.services.storer.base import ChunkKeyer
+from app.services.storer.local import LocalStorer
+from app.services.storer.quantize import BinaryQuantizer, ScalarQuantizer, get_quantizer
+
+
+def _config(**values):
+    config = get_default_config().model_copy(deep=True)
+    config.default_config.update({"store_method": "local", **values})
+    return config
+
+
+def _vectors(count, dimension):
+    # 嵌入向量按主题聚集，随机生成时围绕若干中心
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(20, dimension))
+    vectors = (centers[rng.integers(0, 20, count)] + rng.normal(size=(count, dimension)) * 0.5).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_scalar_quantizer_scores():
+    """int8 编码上的得分与完整向量的内积接近，每个向量 dimension 字节"""
+    vectors = _vectors(500, 64)
+    quantizer = ScalarQuantizer.fit(vectors)
+    codes = quantizer.encode(vectors)
+    assert codes.dtype == np.int8 and codes.shape == (500, 64)
+    queries = _vectors(3, 64)
+    assert np.abs(quantizer.scores(codes, queries) - queries @ vectors.T).max() < 0.05
+
+
+def test_binary_quantizer_scores():
+    """二值编码按 8 字节对齐，自身得分为 1，取反后为 -1"""
+    vectors = _vectors(100, 70)
+    quantizer = BinaryQuantizer.fit(vectors)
+    codes = quantizer.encode(vectors)
+    assert codes.shape == (100, BinaryQuantizer.code_bytes(70)) == (100, 16)
+    scores = quantizer.scores(codes, vectors[:2])
+    assert scores[0, 0] == 1 and scores[1, 1] == 1
+    flipped = 2 * quantizer.params[0] - vectors[:1]
+    assert quantizer.scores(codes[:1], flipped)[0, 0] == -1
+    with pytest.raises(ValueError):
+        get_quantizer("pq")
+
+
+@pytest.mark.parametrize("quantization, index_type, compression", [
+    ("int8", "SQ8", 4.0), ("binary", "BIN_FLAT", 32.0), ("int8", "HNSW_SQ", 4.0), ("binary", "BIN_HNSW", 32.0),
+])
+def test_quantized_search_with_rescore(tmp_path, monkeypatch, quantization, index_type, compression):
+    """在量化编码上检索并用完整向量重排，存储报告中记录压缩比和召回率"""
+    monkeypatch.setattr(settings, "VECTOR_DB_DIR", str(tmp_path))
+    if "HNSW" in index_type:
+        monkeypatch.setattr(index, "AUTO_FLAT_THRESHOLD", 16)
+    config = _config(quantization=quantization)
+    storer = LocalStorer(config, "local_doc_1")
+    storer.prepare(64)
+    vectors = _vectors(1000, 64)
+    chunks = [LangChainChunk(page_content=f"item {i}", metadata={"source": "a.pdf", "page": i, "chunk_id": i})
+              for i in range(1000)]
+    storer.write_stream(zip(chunks, vectors), ChunkKeyer(1))
+    assert storer.optimize().index_type == index_type
+
+    report = storer.quantization_report()
+    assert report["quantization"] == quantization and report["compression"] == compression
+    assert report["recall@10"] >= 0.9
+    # 重排后的得分是完整向量的内积
+    hits = LocalStorer(config, "local_doc_1").search("", vectors[7], top_k=3)
+    assert hits[0]["entity"]["content"] == "item 7"
+    assert hits[0]["distance"] == pytest.approx(1.0, abs=1e-5)
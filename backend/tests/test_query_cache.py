@@ -0,0 +1,75 @@
+"""
+检索缓存测试用例
+"""
+import pytest
+from app.models.document import Document
+from app.models.store import Store
+from app.schemas.configuration.embedding import get_default_config
+from app.schemas.store import StoreBatchSearchRequest, StoreSearchRequest, StoreSearchResult
+from app.services import query_cache
+from app.services.embeddinger.LangChainEmbe import Embeddinger
+from app.services.query_cache import TTLCache, invalidate_document_results, search_result_cache
+from app.services.store import StoreService
+
+
+@pytest.fixture
+def db(db):
+    """写入已存储的测试文档"""
+    db.add(Store(id=1, document_id=1, config={}, meta_data={"collection": "chunks_8", "version": "v1"}))
+    db.add(Document(id=1, filename="a.pdf", file_path="a.pdf", file_type="pdf", file_size=1, store_id=1))
+    db.commit()
+    search_result_cache.clear()
+    return db
+
+
+def test_ttl_cache_evicts_lru_and_expired(monkeypatch):
+    """超过条目数时淘汰最久未使用的条目，超过有效期的条目不再命中"""
+    now = [0.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    now[0] = 11
+    assert cache.get("a") is None and len(cache) == 1
+    assert TTLCache(max_entries=0, ttl=10).set("a", 1) is None
+
+
+def test_embed_queries_cached(db, monkeypatch):
+    """相同（规范化后）的查询只嵌入一次"""
+    embeddinger = Embeddinger(get_default_config(), db)
+    embedded = []
+    engine_embed = embeddinger.engine.embed
+    monkeypatch.setattr(embeddinger.engine, "embed", lambda texts: embedded.append(list(texts)) or engine_embed(texts))
+    query_cache.query_embedding_cache.clear()
+
+    first = embeddinger.embed_queries(["refund policy", "shipping"])
+    second = embeddinger.embed_queries(["refund  policy\n", "returns"])
+    assert embedded == [["refund policy", "shipping"], ["returns"]]
+    assert (first[0] == second[0]).all()
+
+
+def test_search_results_cached_per_query(db, monkeypatch):
+    """重复查询直接返回缓存结果，批量检索只检索未命中的查询，索引版本变化或失效后重新检索"""
+    searched = []
+
+    def search_store(self, document, store, queries, options):
+        searched.append(list(queries))
+        return [StoreSearchResult(query=query, hits=[]) for query in queries]
+    monkeypatch.setattr(StoreService, "_search_store", search_store)
+    service = StoreService(db)
+
+    request = StoreSearchRequest(query="q1", top_k=5)
+    assert service.do_search(1, request) is service.do_search(1, request)
+    service.do_batch_search(1, StoreBatchSearchRequest(queries=["q1", "q2"], top_k=5))
+    service.do_search(1, StoreSearchRequest(query="q1", top_k=3))
+    assert searched == [["q1"], ["q2"], ["q1"]]
+
+    db.get(Store, 1).meta_data = {"collection": "chunks_8", "version": "v2"}
+    db.commit()
+    service.do_search(1, request)
+    assert invalidate_document_results(1) == 4
+    service.do_search(1, request)
+    assert searched[3:] == [["q1"], ["q1"]]
@@ -0,0 +1,118 @@
+"""
+远程嵌入服务测试用例（本地模拟的 OpenAI 兼容服务）
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pytest
+from app.services.embeddinger.remote import RemoteEmbeddingError, RemoteEngine
+
+
+class FakeEmbeddingServer(ThreadingHTTPServer):
+    """每批超过 max_batch 条时返回 429；向量为 [文本长度, 1]"""
+    def __init__(self, max_batch: int, fail_status: int = 0):
+        super().__init__(("127.0.0.1", 0), FakeEmbeddingHandler)
+        self.max_batch = max_batch
+        self.fail_status = fail_status
+        self.batches = []
+        self.input_types = []
+        self.lock = threading.Lock()
+
+
+class FakeEmbeddingHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if "texts" in payload:
+            # Cohere 接口
+            with self.server.lock:
+                self.server.input_types.append(payload["input_type"])
+            return self._reply(200, {"embeddings": {"float": [[len(text), 1.0] for text in payload["texts"]]}})
+        texts = payload["input"]
+        with self.server.lock:
+            self.server.batches.append(len(texts))
+        if self.server.fail_status:
+            return self._reply(self.server.fail_status, {"error": "bad request"})
+        if len(texts) > self.server.max_batch:
+            return self._reply(429, {"error": "rate limited"}, {"Retry-After": "0"})
+        # 乱序返回，客户端应按 index 还原
+        data = [{"index": i, "embedding": [len(text), 1.0]} for i, text in enumerate(texts)]
+        self._reply(200, {"data": data[::-1]})
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def start(**kwargs):
+        server = FakeEmbeddingServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _engine(server, **kwargs):
+    return RemoteEngine(
+        "openai", model="fake", base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        retry_count=3, retry_backoff=0.01, normalize=False, **kwargs
+    )
+
+
+def test_remote_engine_splits_batches_on_429(server_factory):
+    """收到 429 后拆分批次重试，并发请求的结果按原顺序返回"""
+    server = server_factory(max_batch=4)
+    engine = _engine(server, batch_size=16, max_concurrency=4)
+    texts = ["x" * (i + 1) for i in range(40)]
+    try:
+        vectors = engine.embed(texts)
+    finally:
+        engine.close()
+
+    np.testing.assert_array_equal(vectors[:, 0], np.arange(1, 41))
+    assert max(server.batches) == 16  # 首批按配置的批大小发出，被限流后拆分
+    assert sum(size for size in server.batches if size <= 4) == 40  # 每条文本只成功嵌入一次
+
+
+def test_remote_engine_gives_up(server_factory):
+    """不可重试的错误直接失败"""
+    server = server_factory(max_batch=4, fail_status=400)
+    engine = _engine(server)
+    try:
+        with pytest.raises(RemoteEmbeddingError):
+            engine.embed(["a", "b"])
+    finally:
+        engine.close()
+    assert server.batches == [2]
+
+
+def test_cohere_input_type(server_factory):
+    """Cohere 入库使用 search_document，检索查询使用 search_query，两者的向量分开缓存"""
+    server = server_factory(max_batch=4)
+    engine = RemoteEngine("cohere", model="fake", base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                          normalize=False)
+    try:
+        engine.embed(["document"])
+        vectors = engine.embed_queries(["query"])
+    finally:
+        engine.close()
+    assert server.input_types == ["search_document", "search_query"]
+    np.testing.assert_array_equal(vectors, [[5, 1]])
+    assert engine.query_cache_id != engine.cache_id
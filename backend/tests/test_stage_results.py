@@ -0,0 +1,96 @@
+"""
+阶段结果分表存储测试用例
+"""
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.models.document import Document, DocumentPage
+from app.schemas.common_config import DocumentStatus
+from app.schemas.configuration.document import get_default_config as get_load_default_config
+from app.schemas.chunk import LangChainChunk
+from app.schemas.document import LangChainDocument
+from app.services.chunk import ChunkService
+from app.services.document import DocumentService
+from app.services.parsers import LangchainParser
+
+
+@pytest.fixture
+def db(db):
+    """写入测试文档"""
+    db.add(Document(id=1, filename="a.pdf", file_path="a.pdf", file_type="pdf", file_size=1))
+    db.commit()
+    return db
+
+
+def test_pages_saved_per_row_and_paginated(db):
+    """解析结果按页存储，支持分页和按页码过滤，重新解析时整体替换"""
+    service = DocumentService(db)
+    service._save_pages(1, [LangChainDocument(page_content=f"p{i}", metadata={"page": i}) for i in range(5)])
+    db.commit()
+
+    result = service.get_pages(1, offset=1, limit=2)
+    assert result.total == 5
+    assert [page.page_content for page in result.items] == ["p1", "p2"]
+    assert service.get_pages(1, page=3).items[0].page_content == "p3"
+    assert [page.page_content for page in service.iter_pages(1, batch_size=2)] == [f"p{i}" for i in range(5)]
+
+    service._save_pages(1, [LangChainDocument(page_content="new", metadata={"page": 0})])
+    db.commit()
+    assert service.get_pages(1).total == 1
+    with pytest.raises(HTTPException):
+        service.get_pages(2)
+
+
+def test_parse_commits_page_batches(session_factory, monkeypatch):
+    """解析结果每批单独提交，解析期间其他会话可以写入；解析失败时删除已写入的部分页面"""
+    monkeypatch.setattr(settings, "PARSE_PAGE_BATCH_SIZE", 2)
+    fail = [False]
+
+    def iter_parse(self, file_path):
+        for i in range(5):
+            if fail[0] and i == 3:
+                raise RuntimeError("broken page")
+            yield LangChainDocument(page_content=f"p{i}", metadata={"page": i})
+
+    monkeypatch.setattr(LangchainParser, "iter_parse", iter_parse)
+    db, other = session_factory(), session_factory()
+    db.add(Document(id=1, filename="a.pdf", file_path="a.pdf", file_type="pdf", file_size=1,
+                    status=DocumentStatus.LOADED))
+    db.commit()
+    service = DocumentService(db)
+    document = service.get_document(1)
+    pages = service.iter_parse_document(document, get_load_default_config("pdf"))
+
+    for _ in range(3):
+        next(pages)
+    # 第一批已提交，另一个会话可以写入，不会等待解析结束
+    assert other.query(DocumentPage).count() == 2
+    other.add(Document(id=2, filename="b.pdf", file_path="b.pdf", file_type="pdf", file_size=1))
+    other.commit()
+    assert len(list(pages)) == 2
+    assert document.status == DocumentStatus.LOADED
+    assert [page.page_content for page in service.iter_pages(1)] == [f"p{i}" for i in range(5)]
+
+    fail[0] = True
+    with pytest.raises(HTTPException):
+        list(service.iter_parse_document(document, get_load_default_config("pdf")))
+    assert other.query(DocumentPage).count() == 0
+    assert document.status == DocumentStatus.PENDING
+    db.close()
+    other.close()
+
+
+def test_get_single_chunk(db):
+    """按分块序号读取单个分块，不加载其他分块"""
+    service = ChunkService(db)
+    chunks = [
+        LangChainChunk(page_content=f"c{i}", metadata={"source": "a.pdf", "page": i // 2, "chunk_id": i})
+        for i in range(4)
+    ]
+    service._save_chunks(1, chunks)
+    db.commit()
+
+    assert service.get_chunk(1, 2) == chunks[2]
+    assert service.get_chunks(1, page=1).total == 2
+    with pytest.raises(HTTPException):
+        service.get_chunk(1, 10)
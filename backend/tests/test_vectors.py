@@ -0,0 +1,30 @@
+"""
+嵌入向量文件测试用例
+"""
+import numpy as np
+import pytest
+from app.utils.vectors import load_vectors, save_vectors
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_save_and_mmap_vectors(tmp_path, dtype):
+    """向量按指定精度保存，读取时为只读内存映射"""
+    vectors = np.random.rand(10, 8).astype(np.float32)
+    path = str(tmp_path / "doc_1.npy")
+    save_vectors(path, vectors, dtype)
+
+    loaded = load_vectors(path)
+    assert isinstance(loaded, np.memmap)
+    assert loaded.dtype == np.dtype(dtype)
+    assert loaded.shape == (10, 8)
+    np.testing.assert_allclose(loaded, vectors, rtol=1e-3)
+    assert not loaded.flags.writeable
+    assert load_vectors(str(tmp_path / "missing.npy")) is None
+
+
+def test_save_vectors_invalid(tmp_path):
+    """精度不支持或矩阵不是二维时报错"""
+    with pytest.raises(ValueError):
+        save_vectors(str(tmp_path / "a.npy"), np.zeros((2, 2)), "int8")
+    with pytest.raises(ValueError):
+        save_vectors(str(tmp_path / "a.npy"), np.zeros(4), "float32")
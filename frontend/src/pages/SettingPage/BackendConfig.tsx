@@ -168,6 +168,13 @@ const BackendConfig: React.FC<BackendConfigProps> = ({ config, loading }) => {
           >
             <Input placeholder=".pdf, .txt, .docx, .md" />
           </Form.Item>
+          <Form.Item
+            label="PDF并行解析进程数"
+            name={["system", "parse_workers"]}
+            tooltip="0 表示使用 CPU 核数"
+          >
+            <InputNumber min={0} max={256} placeholder="0" style={{ width: '100%' }} />
+          </Form.Item>
 
           <Form.Item>
             <Button type="primary" htmlType="submit" loading={loading}>
@@ -1,4 +1,4 @@
-import type { LangChainVecStore } from '@/types/vecStore';
+import type { LangChainVecStore, VecStoreSearchResult } from '@/types/vecStore';
 import type { ConfigParams } from '@/types/commonConfig';
 import { API_VEC_STORE_URL } from '@/constants/api';
 import { get, post } from '@/utils/request';
@@ -26,9 +26,10 @@ export class VecStoreService {
     }
   }
 
-  async searchVecStore(documentId: number, query: string): Promise<string> {
+  async searchVecStore(documentId: number, query: string, topK = 10): Promise<VecStoreSearchResult> {
     try {
-      return get<string>(`${API_VEC_STORE_URL}/${documentId}/search?query=${query}`);
+      const params = new URLSearchParams({ query, top_k: String(topK) });
+      return get<VecStoreSearchResult>(`${API_VEC_STORE_URL}/${documentId}/search?${params}`);
     } catch (error) {
       console.error("检索失败:", error);
       throw error;
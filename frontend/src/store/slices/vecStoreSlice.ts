@@ -1,7 +1,7 @@
 import { createSlice, type PayloadAction } from '@reduxjs/toolkit';
 import { vecStoreService } from '@/services/vecStoreService';
 import type { AppThunk, AppDispatch } from '@/store/types';
-import type { LangChainVecStore } from '@/types/vecStore';
+import type { LangChainVecStore, VecStoreSearchResult } from '@/types/vecStore';
 import type { ConfigParams } from '@/types/commonConfig';
 import {fetchDocuments} from '@/store/slices/documentSlice';
 export interface VecStoreState {
@@ -73,11 +73,21 @@ export const processVecStore = (documentId: number, config: ConfigParams): AppTh
   }
 };
 
+// 检索结果按得分顺序展示为文本
+const formatSearchResult = (result: VecStoreSearchResult): string => {
+  if (result.hits.length === 0) {
+    return 'not found';
+  }
+  return result.hits
+    .map((hit, index) => `#${index + 1} score=${hit.score.toFixed(4)} page=${hit.metadata?.page ?? '-'}\n${hit.content ?? ''}`)
+    .join('\n\n');
+};
+
 export const searchVecStore = (documentId: number, query: string): AppThunk<Promise<void>> => async (dispatch: AppDispatch) => {
   try {
     dispatch(setLoading(true));
     const result = await vecStoreService.searchVecStore(documentId, query);
-    dispatch(setSearchResult(result));
+    dispatch(setSearchResult(formatSearchResult(result)));
   } catch (error) {
     dispatch(setError(error instanceof Error ? error.message : '检索失败'));
     throw error;
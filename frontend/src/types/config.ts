@@ -3,6 +3,7 @@ export interface ModelConfig {
   openai: Record<string, string | number | boolean>;
   deepseek: Record<string, string | number | boolean>;
   anthropic: Record<string, string | number | boolean>;
+  cohere: Record<string, string | number | boolean>;
   local: Record<string, string | number | boolean>;
 }
 
@@ -18,6 +19,7 @@ export interface SystemConfig {
   log_level: string;
   max_file_size: number;
   allowed_file_types: string[];
+  parse_workers?: number;
 }
 
 export interface AllConfig {
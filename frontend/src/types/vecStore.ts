@@ -27,3 +27,16 @@ export interface LangChainVecStore {
   page_content: string;  // 文档内容
   metadata: VecStoreMetaData;
 }
+
+export interface VecStoreSearchHit {
+  id: number;
+  score: number;        // 相似度得分，越大越相似
+  document_id?: number;
+  content?: string;
+  metadata?: VecStoreMetaData;
+}
+
+export interface VecStoreSearchResult {
+  query: string;
+  hits: VecStoreSearchHit[];
+}